@@ -206,8 +206,105 @@ STRIPE_WEBHOOK_SECRET = "your_stripe_webhook_secret"
 # Exchange rate cache duration in minutes
 EXCHANGE_RATE_CACHE_DURATION = 30  # in minutes
 
+# Backend used by the statistics endpoints: "python", "numpy", "snapshot" or "database"
+TRADE_STATISTICS_BACKEND = "python"
+
+# Read the day based statistics (day performances, monthly summary, winning and
+# losing days, streaks) from the DailyAccountPnl rollup instead of the trade scan.
+# Both group closed trades by close day. Syncs only write the rollup while this is
+# on and manual trades are not rolled up, run rebuild_daily_pnl after turning it on
+TRADE_STATISTICS_DAILY_ROLLUP = False
+
+# How long the per account equity curve and drawdown are cached, in seconds. Keyed
+# on the data version of the user, so only cached like the statistics below
+EQUITY_CURVE_CACHE_TIMEOUT = 60 * 60
+
+# Points of the underwater chart sent with the statistics, longer histories are
+# downsampled with LTTB. 0 sends every point
+UNDERWATER_CHART_MAX_POINTS = 500
+
+# How long statistics, balance charts and account performance are cached, in seconds.
+# Entries are invalidated on any trade or account write, 0 disables the cache
+STATISTICS_CACHE_TIMEOUT = 5 * 60
+
+# The cache versions are bumped by the refresh worker and background refreshes, so
+# results are only cached in a cache all processes share. Set REDIS_URL for one,
+# docker-compose.yaml runs a Redis next to the api. Without it each process has its
+# own memory cache
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+
+# Cache results in the process memory cache anyway, for single process setups
+STATISTICS_CACHE_ALLOW_LOCAL = False
+
+# "inline" refreshes stale accounts while handling a request, "revalidate" serves
+# what is in the database and refreshes stale accounts after the response, and
+# "background" leaves that to the refresh_accounts management command so reads
+# only hit the database
+ACCOUNT_REFRESH_MODE = "inline"
+
+# In "revalidate" mode, accounts last refreshed longer ago than this many seconds
+# are still refreshed before the response
+ACCOUNT_REFRESH_MAX_STALENESS = 10 * 60
+
+# Syncs move the account balance by the profit they write. Every this many seconds,
+# and after full syncs, it is summed up again from the trades
+ACCOUNT_BALANCE_RECONCILE_INTERVAL = 60 * 60
+
+# Sync log entries kept per account for the sync telemetry endpoint, 0 turns the
+# log off
+ACCOUNT_SYNC_LOG_SIZE = 50
+
+# Bounds in seconds of how long a refreshed account stays cached. Within them the
+# time depends on recent trading, market hours and whether the user is online
+ACCOUNT_REFRESH_TTL_MIN = 10
+ACCOUNT_REFRESH_TTL_MAX = 60 * 60
+
+# Accounts of users that did not read their data in the online window are
+# refreshed this many times less often
+ACCOUNT_REFRESH_ONLINE_WINDOW = 5 * 60
+ACCOUNT_REFRESH_OFFLINE_FACTOR = 10
+
+# Maximum number of accounts of a user fetched from the trading platforms in parallel
+ACCOUNT_REFRESH_CONCURRENCY = 4
+
+# Seconds a request waits for a refresh of the same account that is already in progress
+ACCOUNT_REFRESH_WAIT_TIMEOUT = 60
+
+# Seconds between full history syncs of an account, refreshes in between only
+# fetch the deals after the sync cursor
+ACCOUNT_FULL_SYNC_INTERVAL = 24 * 60 * 60
+
+# The refresh_accounts worker reloads the accounts from the database every this many
+# seconds to pick up new and disabled ones, and retries failed refreshes after this
+# many seconds
+ACCOUNT_REFRESH_RELOAD_INTERVAL = 60
+ACCOUNT_REFRESH_RETRY_DELAY = 30
+
+# Write synced trades with bulk INSERT ... ON CONFLICT statements instead of one update_or_create per deal
+TRADE_SYNC_BULK_UPSERT = True
+
 TERMINAL_SERVER_URL = "https://trading-terminal.lytestudios.be"
 
+# Pooled client for the terminal server: kept-alive connections per process,
+# connect and read timeouts in seconds, and retries of connection and gateway errors
+TERMINAL_POOL_SIZE = 10
+TERMINAL_CONNECT_TIMEOUT = 5
+TERMINAL_READ_TIMEOUT = 30
+TERMINAL_MAX_RETRIES = 2
+TERMINAL_RETRY_BACKOFF = 0.5
+
+# cTrader FIX sessions are kept per process between refreshes, logged out after
+# this many idle seconds, and at most this many are kept open
+CTRADER_SESSION_IDLE_TIMEOUT = 15 * 60
+CTRADER_SESSION_MAX_SESSIONS = 100
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
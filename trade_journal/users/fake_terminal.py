@@ -0,0 +1,265 @@
+"""
+Local stand-ins for the trading platforms, to develop and benchmark account syncs
+without a live MetaTrader terminal or cTrader account.
+
+FakeTerminalServer serves /api/mt5/connect/ and /api/mt5/get_trades/ like the
+terminal server behind TERMINAL_SERVER_URL, FakeCTrader replaces the ejtraderCT
+client. Deal histories are generated from the account id and a seed, so every
+run sees the same trades.
+"""
+
+import json
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+HISTORY_START = datetime(2023, 1, 2, 8, tzinfo=timezone.utc)
+SYMBOLS = ("EURUSD", "GBPUSD", "USDJPY", "XAUUSD", "US30", "BTCUSD")
+DEPOSIT = 10000.0
+
+
+def get_account_random(account_id, seed: int) -> random.Random:
+    return random.Random(zlib.crc32(f"{seed}:{account_id}".encode()))
+
+
+def generate_deals(account_id, count: int, seed: int = 0) -> List[Dict]:
+    """
+    Returns the deal history of an account: a deposit followed by positions that
+    are opened and closed, two deals each, count deals in total
+    """
+    rng = get_account_random(account_id, seed)
+    deposited_at = HISTORY_START
+
+    deals = [
+        {
+            "ticket": 1,
+            "position_id": 1,
+            "type": 2,
+            "volume": 0,
+            "profit": DEPOSIT,
+            "time": int(deposited_at.timestamp()),
+            "time_msc": int(deposited_at.timestamp() * 1000),
+        }
+    ]
+
+    opened_at = deposited_at
+    for position_id in range(2, count // 2 + 2):
+        opened_at += timedelta(minutes=rng.randint(5, 600))
+        closed_at = opened_at + timedelta(minutes=rng.randint(1, 300))
+        side = rng.randint(0, 1)
+        price = round(rng.uniform(0.5, 2000), 5)
+        volume = rng.choice((0.01, 0.05, 0.1, 0.5, 1.0))
+        profit = round(rng.gauss(5, 60), 2)
+
+        for entry, deal_time, deal_price, deal_profit in (
+            (0, opened_at, price, 0),
+            (1, closed_at, round(price * (1 + profit / 10000), 5), profit),
+        ):
+            deals.append(
+                {
+                    "ticket": position_id * 2 + entry,
+                    "position_id": position_id,
+                    "entry": entry,
+                    "type": side if entry == 0 else 1 - side,
+                    "symbol": SYMBOLS[position_id % len(SYMBOLS)],
+                    "volume": volume,
+                    "price": deal_price,
+                    "profit": deal_profit,
+                    "time": int(deal_time.timestamp()),
+                    "time_msc": int(deal_time.timestamp() * 1000),
+                }
+            )
+
+    return sorted(deals, key=lambda deal: (deal["time_msc"], deal["ticket"]))
+
+
+class FakeTerminal:
+    """
+    State of the fake terminal server: the generated histories and the
+    configured latency and error rate.
+
+    latency is the mean response time in seconds, error_rate the share of
+    requests answered with a 503. Every get_trades call adds new_deals deals to
+    the history of the account, to simulate an account that keeps trading.
+    """
+
+    def __init__(
+        self,
+        deals: int = 200,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        new_deals: int = 0,
+        seed: int = 0,
+    ):
+        self.deals = deals
+        self.latency = latency
+        self.error_rate = error_rate
+        self.new_deals = new_deals
+        self.seed = seed
+
+        self.lock = threading.Lock()
+        self.histories: Dict[str, List[Dict]] = {}
+        self.calls: Dict[str, int] = {}
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+
+    def get_history(self, account_id: str) -> List[Dict]:
+        with self.lock:
+            calls = self.calls.get(account_id, 0)
+            self.calls[account_id] = calls + 1
+            size = self.deals + calls * self.new_deals
+
+            if len(self.histories.get(account_id, [])) != size:
+                self.histories[account_id] = generate_deals(account_id, size, self.seed)
+            return self.histories[account_id]
+
+    def delay(self) -> bool:
+        """
+        Waits for the simulated latency, returns False when the request should fail
+        """
+        with self.lock:
+            self.requests += 1
+            latency = self.rng.expovariate(1 / self.latency) if self.latency else 0
+            failed = self.rng.random() < self.error_rate
+            self.errors += int(failed)
+
+        time.sleep(latency)
+        return not failed
+
+    def handle(self, path: str, body: Dict) -> tuple:
+        """
+        Returns the (status, payload) of a request
+        """
+        if not self.delay():
+            return 503, {"status": "error", "message": "Terminal unavailable"}
+
+        if path == "/api/mt5/connect/":
+            if body.get("password") == "invalid":
+                return 400, {"status": "error", "message": "Invalid credentials"}
+            return 200, {
+                "status": "success",
+                "account_info": {"login": str(body.get("account")), "currency": "USD"},
+            }
+
+        if path == "/api/mt5/get_trades/":
+            deals = self.get_history(str(body.get("account_id")))
+            since = body.get("since")
+            if since is not None:
+                deals = [deal for deal in deals if deal["time_msc"] >= since]
+            return 200, {"orders": deals}
+
+        return 404, {"status": "error", "message": f"Unknown path {path}"}
+
+
+class FakeTerminalHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    terminal: FakeTerminal = None
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])) or b"{}")
+        status, payload = self.terminal.handle(self.path, body)
+
+        content = json.dumps(payload).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up waiting
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeTerminalServer:
+    """
+    Serves a FakeTerminal on a local port from a background thread,
+    point TERMINAL_SERVER_URL at url to use it
+    """
+
+    def __init__(self, terminal: FakeTerminal = None, port: int = 0):
+        self.terminal = terminal or FakeTerminal()
+        handler = type(
+            "BoundFakeTerminalHandler", (FakeTerminalHandler,), {"terminal": self.terminal}
+        )
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self) -> "FakeTerminalServer":
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class FakeCTrader:
+    """
+    Stand-in for ejtraderCT.Ctrader with the interface CTraderService uses.
+    Positions are generated like the terminal deal histories, logging on takes
+    connect_latency seconds.
+    """
+
+    def __init__(
+        self,
+        server,
+        username,
+        password,
+        positions: int = 50,
+        connect_latency: float = 0.0,
+        seed: int = 0,
+    ):
+        time.sleep(connect_latency)
+        self.username = str(username)
+        self.connected = password != "invalid"
+        self.client = {"currency": "USD"}
+        self.position_count = positions
+        self.seed = seed
+
+    def isconnected(self) -> bool:
+        return self.connected
+
+    def logout(self):
+        self.connected = False
+
+    def positions(self) -> List[Dict]:
+        rng = get_account_random(self.username, self.seed)
+        positions = []
+
+        for position_id in range(1, self.position_count + 1):
+            price = round(rng.uniform(0.5, 2000), 5)
+            diff = round(rng.gauss(5, 60), 2)
+            positions.append(
+                {
+                    "position_id": position_id,
+                    "side": rng.choice(("Buy", "Sell")),
+                    "name": SYMBOLS[position_id % len(SYMBOLS)],
+                    "amount": rng.choice((1000, 5000, 10000)),
+                    "price": price,
+                    "gain": round(diff / 100, 4),
+                    "diff": diff,
+                }
+            )
+
+        return positions
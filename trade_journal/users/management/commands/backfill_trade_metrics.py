@@ -0,0 +1,107 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from users.models import ManualTrade, TradeAccount
+from users.services.daily_pnl_service import DailyPnlService
+from users.services.snapshot_service import StatisticsSnapshotService
+from users.services.statistics_cache import StatisticsCache
+from users.services.trade_metrics import (
+    DERIVED_FIELDS,
+    TRADE_INPUT_FIELDS,
+    TradeMetricsService,
+)
+
+
+def get_chunks(ids, size: int):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+class Command(BaseCommand):
+    help = (
+        "Computes the derived trade columns (duration, gain, success, pips, risk in "
+        "pips, R-multiple) of existing trades, in chunks of ids written by parallel "
+        "workers. The daily pnl and statistics snapshots of the changed accounts "
+        "are rebuilt afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--account",
+            type=int,
+            action="append",
+            dest="accounts",
+            help="Id of a trade account to backfill, can be repeated. Defaults to all accounts.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Chunks written in parallel. Needs a database that allows "
+            "concurrent writers.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Count the changes without writing them."
+        )
+
+    def backfill_chunk(self, ids, dry_run: bool) -> set:
+        """
+        Updates the trades of a chunk whose derived columns are out of date and
+        returns the ids of their accounts
+        """
+        try:
+            trades = ManualTrade.objects.filter(id__in=ids).only(
+                "id", "account_id", *TRADE_INPUT_FIELDS, *DERIVED_FIELDS
+            )
+            changed = TradeMetricsService.get_updates(trades)
+
+            if changed and not dry_run:
+                with transaction.atomic():
+                    ManualTrade.objects.bulk_update(changed, DERIVED_FIELDS)
+            return {trade.account_id for trade in changed}
+        finally:
+            if threading.current_thread() is not threading.main_thread():
+                connections.close_all()
+
+    def handle(self, *args, **options):
+        trades = ManualTrade.objects.filter(account__isnull=False)
+        if options["accounts"]:
+            trades = trades.filter(account_id__in=options["accounts"])
+
+        ids = list(trades.order_by("id").values_list("id", flat=True))
+        chunks = list(get_chunks(ids, max(1, options["chunk_size"])))
+        self.stdout.write(f"Checking {len(ids)} trades in {len(chunks)} chunk(s)")
+
+        def backfill(chunk):
+            return self.backfill_chunk(chunk, options["dry_run"])
+
+        changed_accounts = set()
+        if options["workers"] > 1:
+            with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+                results = list(executor.map(backfill, chunks))
+        else:
+            results = [backfill(chunk) for chunk in chunks]
+        for account_ids in results:
+            changed_accounts |= account_ids
+
+        if options["dry_run"]:
+            self.stdout.write(f"{len(changed_accounts)} account(s) have trades to update")
+            return
+
+        # bulk_update sends no signals, the aggregates of the accounts are rebuilt here
+        accounts = TradeAccount.objects.filter(id__in=changed_accounts)
+        for account in accounts:
+            DailyPnlService.rebuild(account)
+            StatisticsSnapshotService.rebuild(account)
+        for user_id in {account.user_id for account in accounts}:
+            StatisticsCache.bump_version(user_id)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Backfilled the trade metrics of {len(changed_accounts)} account(s)"
+            )
+        )
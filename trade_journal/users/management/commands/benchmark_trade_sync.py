@@ -0,0 +1,135 @@
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from users.models import CustomUser, ManualTrade, Platform, TradeAccount, TradeType
+from users.services.meta_trader_service import MetaTraderService
+from users.services.trade_upsert import TradeUpsertService
+
+
+def build_history(deal_count: int) -> list:
+    """
+    Synthetic MetaTrader history of positions opened and closed an hour apart
+    """
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    deals = []
+
+    for position_id in range(1, deal_count // 2 + 1):
+        opened = start + timedelta(hours=position_id)
+        for entry, time_ in ((0, opened), (1, opened + timedelta(minutes=45))):
+            deals.append(
+                {
+                    "ticket": position_id * 2 + entry,
+                    "position_id": position_id,
+                    "entry": entry,
+                    "type": position_id % 2,
+                    "symbol": ("EURUSD", "GBPUSD", "XAUUSD")[position_id % 3],
+                    "volume": 0.1,
+                    "price": 1.1 + position_id % 100 / 1000,
+                    "profit": (position_id % 7 - 3) * 10.0 if entry else 0,
+                    "time": int(time_.timestamp()),
+                    "time_msc": int(time_.timestamp() * 1000),
+                }
+            )
+
+    return deals
+
+
+def write_per_deal(account: TradeAccount, deals: list):
+    """
+    The sync before the bulk upsert: one update_or_create per deal, so the entry
+    and the exit of a position are each written with their own queries
+    """
+    for deal in deals:
+        trade_type = TradeType.sell if deal["type"] == 0 else TradeType.buy
+        time_ = datetime.fromtimestamp(deal["time_msc"] / 1000, tz=timezone.utc)
+
+        if deal["entry"] == 0:
+            defaults = {
+                "trade_type": trade_type,
+                "symbol": deal["symbol"],
+                "quantity": deal["volume"],
+                "volume": deal["volume"],
+                "open_price": deal["price"],
+                "open_time": time_,
+                "active": False,
+            }
+        else:
+            defaults = {
+                "trade_type": trade_type,
+                "symbol": deal["symbol"],
+                "quantity": deal["volume"],
+                "volume": deal["volume"],
+                "close_price": deal["price"],
+                "profit": deal["profit"],
+                "gain": 0,
+                "close_time": time_,
+                "active": False,
+            }
+
+        ManualTrade.objects.update_or_create(
+            account=account, exchange_id=str(deal["position_id"]), defaults=defaults
+        )
+
+
+def write_bulk(account: TradeAccount, deals: list):
+    """
+    The current sync: the deals are folded into one row per position, which are
+    written with bulk upserts
+    """
+    TradeUpsertService.write(account, MetaTraderService.get_trade_rows(deals), bulk=True)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the old per-deal update_or_create sync with the bulk upsert of "
+        "folded positions on the same synthetic deal history. Everything is "
+        "written inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--deals",
+            type=int,
+            default=10000,
+            help="Number of deals in the synthetic history.",
+        )
+
+    def handle(self, *args, **options):
+        deals = build_history(options["deals"])
+
+        self.stdout.write(
+            f"{len(deals)} deals, {len({deal['position_id'] for deal in deals})} positions"
+        )
+
+        with transaction.atomic():
+            name = f"benchmark-{uuid.uuid4().hex[:8]}"
+            user = CustomUser.objects.create(username=name, email=f"{name}@example.com")
+
+            for label, write in (("per-deal", write_per_deal), ("bulk", write_bulk)):
+                account = TradeAccount.objects.create(
+                    user=user, platform=Platform.meta_trader_5, account_name=label
+                )
+
+                # First sync inserts every position, the second one updates them all
+                for phase in ("insert", "update"):
+                    queries = []
+
+                    def count_query(execute, sql, params, many, context):
+                        queries.append(sql)
+                        return execute(sql, params, many, context)
+
+                    with connection.execute_wrapper(count_query):
+                        started = time.perf_counter()
+                        write(account, deals)
+                        elapsed = time.perf_counter() - started
+
+                    self.stdout.write(
+                        f"{label:>8} {phase}: {elapsed * 1000:9.1f} ms, "
+                        f"{len(queries):6d} queries"
+                    )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,190 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from unittest.mock import patch
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test.utils import override_settings
+
+from users.fake_terminal import FakeCTrader, FakeTerminal, FakeTerminalServer
+from users.models import CustomUser, Platform, TradeAccount
+from users.services import AccountService
+from users.services.c_trader_service import CTraderService
+from users.services.c_trader_sessions import reset_c_trader_sessions
+from users.services.terminal_client import get_terminal_client, reset_terminal_client
+
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE")
+
+
+def get_percentile(values, percentile: float) -> float:
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(percentile / 100 * len(values)) - 1))
+    return values[index]
+
+
+class QueryCounter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.writes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        with self.lock:
+            self.queries += 1
+            self.writes += sql.lstrip().upper().startswith(WRITE_STATEMENTS)
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test of account syncs against a local fake terminal server and fake "
+        "cTrader sessions. Creates synthetic users, runs check_refresh for each of "
+        "them for a number of rounds, and reports throughput, latency percentiles "
+        "and database writes. The synthetic users are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--accounts", type=int, default=2, help="Accounts per user.")
+        parser.add_argument(
+            "--ctrader-accounts",
+            type=int,
+            default=0,
+            help="How many of the accounts of each user are cTrader accounts.",
+        )
+        parser.add_argument("--deals", type=int, default=500, help="Deals per account.")
+        parser.add_argument(
+            "--new-deals",
+            type=int,
+            default=2,
+            help="Deals added to every account between refreshes.",
+        )
+        parser.add_argument("--rounds", type=int, default=3)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Users refreshed in parallel. Needs a database that allows "
+            "concurrent writers.",
+        )
+        parser.add_argument(
+            "--latency", type=float, default=0.05, help="Mean terminal latency, seconds."
+        )
+        parser.add_argument(
+            "--error-rate", type=float, default=0.0, help="Share of failing requests."
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep the synthetic users."
+        )
+
+    def create_users(self, options) -> list:
+        run = uuid.uuid4().hex[:8]
+        users = []
+
+        for index in range(options["users"]):
+            name = f"loadtest-{run}-{index}"
+            user = CustomUser.objects.create(username=name, email=f"{name}@example.com")
+            for number in range(options["accounts"]):
+                c_trader = number < options["ctrader_accounts"]
+                TradeAccount.objects.create(
+                    user=user,
+                    account_id=f"{run}{index:04d}{number:02d}",
+                    account_name=f"Load test {number}",
+                    platform=Platform.c_trader if c_trader else Platform.meta_trader_5,
+                    server="FakeBroker",
+                    password="secret",
+                )
+            users.append(user)
+
+        return users
+
+    def handle(self, *args, **options):
+        terminal = FakeTerminal(
+            deals=options["deals"],
+            latency=options["latency"],
+            error_rate=options["error_rate"],
+            new_deals=options["new_deals"],
+            seed=options["seed"],
+        )
+        counter = QueryCounter()
+
+        def refresh(user) -> float:
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                AccountService.check_refresh(user, force_refresh=True)
+                elapsed = time.perf_counter() - started
+            if threading.current_thread() is not threading.main_thread():
+                connections.close_all()
+            return elapsed
+
+        users = self.create_users(options)
+        reset_terminal_client()
+        reset_c_trader_sessions()
+
+        try:
+            with FakeTerminalServer(terminal) as server, override_settings(
+                TERMINAL_SERVER_URL=server.url, ACCOUNT_REFRESH_MODE="inline"
+            ), patch.object(
+                CTraderService,
+                "create_client",
+                side_effect=partial(
+                    FakeCTrader,
+                    positions=options["deals"] // 2,
+                    connect_latency=options["latency"] * 10,
+                    seed=options["seed"],
+                ),
+            ), ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+                for round_number in range(1, options["rounds"] + 1):
+                    queries, writes = counter.queries, counter.writes
+                    started = time.perf_counter()
+
+                    if options["concurrency"] > 1:
+                        latencies = list(executor.map(refresh, users))
+                    else:
+                        latencies = [refresh(user) for user in users]
+
+                    self.report(
+                        round_number,
+                        latencies,
+                        time.perf_counter() - started,
+                        counter.queries - queries,
+                        counter.writes - writes,
+                        options,
+                    )
+
+            self.stdout.write(
+                f"Terminal: {terminal.requests} requests, {terminal.errors} failed"
+            )
+            metrics = get_terminal_client().get_metrics()
+            self.stdout.write(
+                "Terminal client: "
+                + ", ".join(f"{name} {value}" for name, value in metrics.items())
+            )
+        finally:
+            reset_terminal_client()
+            reset_c_trader_sessions()
+            if not options["keep"]:
+                CustomUser.objects.filter(id__in=[user.id for user in users]).delete()
+
+    def report(self, round_number, latencies, elapsed, queries, writes, options):
+        accounts = len(latencies) * options["accounts"]
+        self.stdout.write(
+            f"Round {round_number}: {len(latencies)} users, {accounts} accounts in "
+            f"{elapsed:.2f}s, {len(latencies) / elapsed:.1f} users/s, "
+            f"{accounts / elapsed:.1f} accounts/s"
+        )
+        self.stdout.write(
+            "  latency "
+            + ", ".join(
+                f"p{percentile} {get_percentile(latencies, percentile) * 1000:.0f} ms"
+                for percentile in (50, 95, 99)
+            )
+            + f", max {max(latencies) * 1000:.0f} ms"
+        )
+        self.stdout.write(f"  {queries} queries, {writes} writes")
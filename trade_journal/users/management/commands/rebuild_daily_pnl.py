@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from users.models import TradeAccount
+from users.services.daily_pnl_service import DailyPnlService
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the daily pnl rollup of trade accounts from their trades"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--account",
+            type=int,
+            action="append",
+            dest="accounts",
+            help="Id of a trade account to rebuild, can be repeated. Defaults to all accounts.",
+        )
+
+    def handle(self, *args, **options):
+        accounts = TradeAccount.objects.all()
+
+        if options["accounts"]:
+            accounts = accounts.filter(id__in=options["accounts"])
+
+        rebuilt = 0
+        for account in accounts.iterator():
+            DailyPnlService.rebuild(account)
+            rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the daily pnl of {rebuilt} account(s)"))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from users.models import TradeAccount
+from users.services.snapshot_service import StatisticsSnapshotService
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the persisted statistics snapshots of trade accounts from their trades"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--account",
+            type=int,
+            action="append",
+            dest="accounts",
+            help="Id of a trade account to rebuild, can be repeated. Defaults to all accounts.",
+        )
+        parser.add_argument(
+            "--stale-only",
+            action="store_true",
+            help="Only rebuild snapshots that are marked as stale.",
+        )
+
+    def handle(self, *args, **options):
+        accounts = TradeAccount.objects.all()
+
+        if options["accounts"]:
+            accounts = accounts.filter(id__in=options["accounts"])
+
+        if options["stale_only"]:
+            accounts = accounts.filter(statistics_snapshot__is_stale=True)
+
+        rebuilt = 0
+        for account in accounts.iterator():
+            snapshot = StatisticsSnapshotService.rebuild(account)
+            rebuilt += 1
+            self.stdout.write(
+                f"Rebuilt account {account.id}: {snapshot.trade_count} trades"
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} snapshot(s)"))
@@ -0,0 +1,66 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from users.services.c_trader_sessions import get_c_trader_sessions
+from users.services.refresh_scheduler import AccountRefreshScheduler
+from users.services.terminal_client import get_terminal_client
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker that refreshes trade accounts from the trading platforms as their "
+        "cache expires. Run with ACCOUNT_REFRESH_MODE = 'background' so read "
+        "requests only serve what is already in the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Refresh the accounts that are due once and exit.",
+        )
+        parser.add_argument(
+            "--reload-interval",
+            type=float,
+            default=None,
+            help="Seconds between reloading the accounts from the database.",
+        )
+
+    def handle(self, *args, **options):
+        scheduler = AccountRefreshScheduler(reload_interval=options["reload_interval"])
+
+        if options["once"]:
+            refreshed = scheduler.run_pending()
+            self.stdout.write(self.style.SUCCESS(f"Refreshed {refreshed} account(s)"))
+            self.write_terminal_metrics()
+            return
+
+        stopping = []
+
+        def stop(signum, frame):
+            self.stdout.write("Stopping after the current refresh")
+            stopping.append(signum)
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        self.stdout.write("Refreshing accounts, press CTRL-C to stop")
+        scheduler.run(should_stop=lambda: bool(stopping))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Refreshed {scheduler.refreshed} account(s), {scheduler.failed} failed"
+            )
+        )
+        self.write_terminal_metrics()
+
+    def write_terminal_metrics(self):
+        for label, metrics in (
+            ("Terminal server", get_terminal_client().get_metrics()),
+            ("cTrader sessions", get_c_trader_sessions().get_metrics()),
+        ):
+            self.stdout.write(
+                f"{label}: "
+                + ", ".join(f"{name} {value}" for name, value in metrics.items())
+            )
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0025_remove_tradeaccount_status_tradeaccount_password_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountStatisticsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.JSONField(default=dict)),
+                ('trade_count', models.IntegerField(default=0)),
+                ('is_stale', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistics_snapshot', to='users.tradeaccount')),
+            ],
+        ),
+    ]
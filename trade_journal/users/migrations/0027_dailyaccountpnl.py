@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from users.services.daily_pnl_service import create_rollup_rows, get_rollup_days
+
+
+def backfill_daily_pnl(apps, schema_editor):
+    ManualTrade = apps.get_model("users", "ManualTrade")
+    DailyAccountPnl = apps.get_model("users", "DailyAccountPnl")
+
+    create_rollup_rows(
+        DailyAccountPnl,
+        get_rollup_days(ManualTrade.objects.filter(account__isnull=False)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0026_accountstatisticssnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAccountPnl',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('trade_count', models.IntegerField(default=0)),
+                ('profit', models.FloatField(default=0.0)),
+                ('won', models.FloatField(default=0.0)),
+                ('lost', models.FloatField(default=0.0)),
+                ('volume', models.FloatField(default=0.0)),
+                ('breakeven_count', models.IntegerField(default=0)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_pnl', to='users.tradeaccount')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('account', 'day'), name='unique_daily_pnl_per_account')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_pnl, migrations.RunPython.noop),
+    ]
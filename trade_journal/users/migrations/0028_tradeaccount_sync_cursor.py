@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0027_dailyaccountpnl'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tradeaccount',
+            name='last_full_sync_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tradeaccount',
+            name='sync_cursor_ticket',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tradeaccount',
+            name='sync_cursor_time_msc',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
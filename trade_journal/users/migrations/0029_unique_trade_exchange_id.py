@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:50
+
+from django.db import migrations, models
+from django.db.models import Count
+
+from users.services.daily_pnl_service import create_rollup_rows, get_rollup_days
+
+
+def remove_duplicate_trades(apps, schema_editor):
+    """
+    Keeps the most recently updated trade per (account, exchange_id), moving the
+    notes of the duplicates over to it, and rebuilds the aggregates of the
+    accounts that had duplicates
+    """
+    ManualTrade = apps.get_model("users", "ManualTrade")
+    TradeNote = apps.get_model("users", "TradeNote")
+    AccountStatisticsSnapshot = apps.get_model("users", "AccountStatisticsSnapshot")
+    DailyAccountPnl = apps.get_model("users", "DailyAccountPnl")
+
+    duplicates = (
+        ManualTrade.objects.filter(account__isnull=False, exchange_id__isnull=False)
+        .values("account_id", "exchange_id")
+        .annotate(trade_count=Count("id"))
+        .filter(trade_count__gt=1)
+        .order_by()
+    )
+
+    accounts = set()
+    for duplicate in duplicates:
+        trades = list(
+            ManualTrade.objects.filter(
+                account_id=duplicate["account_id"],
+                exchange_id=duplicate["exchange_id"],
+            ).order_by("-updated_at", "-id")
+        )
+        kept, removed = trades[0], [trade.id for trade in trades[1:]]
+
+        TradeNote.objects.filter(trade_id__in=removed).update(trade_id=kept.id)
+        ManualTrade.objects.filter(id__in=removed).delete()
+        accounts.add(duplicate["account_id"])
+
+    if not accounts:
+        return
+
+    AccountStatisticsSnapshot.objects.filter(account_id__in=accounts).update(
+        is_stale=True
+    )
+
+    DailyAccountPnl.objects.filter(account_id__in=accounts).delete()
+    create_rollup_rows(
+        DailyAccountPnl,
+        get_rollup_days(ManualTrade.objects.filter(account_id__in=accounts)),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0028_tradeaccount_sync_cursor'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_trades, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='manualtrade',
+            constraint=models.UniqueConstraint(fields=('account', 'exchange_id'), name='unique_trade_per_account_exchange_id'),
+        ),
+    ]
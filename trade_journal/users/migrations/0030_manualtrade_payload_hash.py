@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0029_unique_trade_exchange_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='manualtrade',
+            name='payload_hash',
+            field=models.CharField(blank=True, max_length=16, null=True),
+        ),
+    ]
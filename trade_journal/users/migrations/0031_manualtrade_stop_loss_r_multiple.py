@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0030_manualtrade_payload_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='manualtrade',
+            name='r_multiple',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='manualtrade',
+            name='stop_loss',
+            field=models.DecimalField(blank=True, decimal_places=5, max_digits=25, null=True),
+        ),
+    ]
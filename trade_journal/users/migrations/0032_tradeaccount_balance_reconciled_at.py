@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0031_manualtrade_stop_loss_r_multiple'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tradeaccount',
+            name='balance_reconciled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
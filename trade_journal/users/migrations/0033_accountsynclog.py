@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0032_tradeaccount_balance_reconciled_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountSyncLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform', models.CharField(choices=[('MetaTrader4', 'Meta Trader 4'), ('MetaTrader5', 'Meta Trader 5'), ('TradeLocker', 'Trade Locker'), ('CTrader', 'C Trader'), ('Manual', 'Manual')], max_length=64)),
+                ('started_at', models.DateTimeField()),
+                ('fetch_seconds', models.FloatField(default=0.0)),
+                ('parse_seconds', models.FloatField(default=0.0)),
+                ('upsert_seconds', models.FloatField(default=0.0)),
+                ('total_seconds', models.FloatField(default=0.0)),
+                ('payload_size', models.IntegerField(default=0)),
+                ('rows_inserted', models.IntegerField(default=0)),
+                ('rows_updated', models.IntegerField(default=0)),
+                ('rows_unchanged', models.IntegerField(default=0)),
+                ('lag_seconds', models.FloatField(blank=True, null=True)),
+                ('error', models.CharField(blank=True, default='', max_length=255)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_logs', to='users.tradeaccount')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['account', '-started_at'], name='sync_log_account_idx'), models.Index(fields=['started_at'], name='sync_log_started_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0033_accountsynclog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='last_seen_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
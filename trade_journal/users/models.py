@@ -12,6 +12,8 @@ class CustomUser(AbstractUser):
     email = models.EmailField(unique=True)
     date_of_birth = models.DateField(null=True, blank=True)
     currency = models.CharField(max_length=10, null=True, default="USD")
+    # When the user last read their data, accounts of online users refresh more often
+    last_seen_at = models.DateTimeField(null=True, blank=True)
 
 
 class ExchangeRate(models.Model):
@@ -64,6 +66,14 @@ class TradeAccount(models.Model):
 
     cached_at = models.DateTimeField(null=True)
     cached_until = models.DateTimeField(null=True)
+
+    # Incremental sync watermark, the last deal received from the platform
+    sync_cursor_time_msc = models.BigIntegerField(null=True, blank=True)
+    sync_cursor_ticket = models.BigIntegerField(null=True, blank=True)
+    last_full_sync_at = models.DateTimeField(null=True, blank=True)
+    # Syncs move the balance by the profit they change, it is summed up again from time to time
+    balance_reconciled_at = models.DateTimeField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -138,6 +148,10 @@ class ManualTrade(models.Model):
     risk_in_balance_percent = models.FloatField(default=0, null=True, blank=True)
     # Trade risk in pips
     risk_in_pips = models.FloatField(default=0, null=True, blank=True)
+    # Stop loss price the trade was opened with
+    stop_loss = models.DecimalField(max_digits=25, decimal_places=5, null=True, blank=True)
+    # Result in multiples of the initial risk
+    r_multiple = models.FloatField(null=True, blank=True)
     # Trade market value
     market_value = models.FloatField(default=0, null=True, blank=True)
 
@@ -146,6 +160,17 @@ class ManualTrade(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     active = models.BooleanField(default=False)
 
+    # Digest of the values the last sync wrote, unchanged trades are not written again
+    payload_hash = models.CharField(max_length=16, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "exchange_id"],
+                name="unique_trade_per_account_exchange_id",
+            )
+        ]
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -193,6 +218,102 @@ class ManualTrade(models.Model):
         return f"{self.trade_type} {self.quantity} {self.symbol} at ${self.open_price}"
 
 
+class AccountStatisticsSnapshot(models.Model):
+    """
+    Persisted statistics aggregate of all non-deposit trades of an account,
+    kept up to date by the sync services
+    """
+
+    account = models.OneToOneField(
+        TradeAccount,
+        on_delete=models.CASCADE,
+        related_name="statistics_snapshot",
+    )
+
+    # Serialized TradeStatisticsAccumulator state
+    state = models.JSONField(default=dict)
+    trade_count = models.IntegerField(default=0)
+
+    # Set when the state can no longer be updated incrementally and needs a rebuild
+    is_stale = models.BooleanField(default=False)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Statistics snapshot for account {self.account_id}"
+
+
+class DailyAccountPnl(models.Model):
+    """
+    Realized results of the closed, non-deposit trades of an account per close day
+    """
+
+    account = models.ForeignKey(
+        TradeAccount,
+        on_delete=models.CASCADE,
+        related_name="daily_pnl",
+    )
+    day = models.DateField()
+
+    trade_count = models.IntegerField(default=0)
+    profit = models.FloatField(default=0.0)
+    won = models.FloatField(default=0.0)
+    lost = models.FloatField(default=0.0)
+    volume = models.FloatField(default=0.0)
+    breakeven_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "day"], name="unique_daily_pnl_per_account"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.day} pnl for account {self.account_id}: {self.profit}"
+
+
+class AccountSyncLog(models.Model):
+    """
+    Timings and row counts of one sync of an account. Only the latest
+    ACCOUNT_SYNC_LOG_SIZE entries of each account are kept.
+    """
+
+    account = models.ForeignKey(
+        TradeAccount,
+        on_delete=models.CASCADE,
+        related_name="sync_logs",
+    )
+    platform = models.CharField(max_length=64, choices=Platform.choices)
+    started_at = models.DateTimeField()
+
+    # Seconds spent fetching from the platform, folding and diffing the rows,
+    # and writing them along with the aggregates
+    fetch_seconds = models.FloatField(default=0.0)
+    parse_seconds = models.FloatField(default=0.0)
+    upsert_seconds = models.FloatField(default=0.0)
+    total_seconds = models.FloatField(default=0.0)
+
+    # Deals or positions the platform sent
+    payload_size = models.IntegerField(default=0)
+    rows_inserted = models.IntegerField(default=0)
+    rows_updated = models.IntegerField(default=0)
+    rows_unchanged = models.IntegerField(default=0)
+
+    # Seconds since the previous refresh of the account, None on its first one
+    lag_seconds = models.FloatField(null=True, blank=True)
+    error = models.CharField(max_length=255, blank=True, default="")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["account", "-started_at"], name="sync_log_account_idx"),
+            models.Index(fields=["started_at"], name="sync_log_started_idx"),
+        ]
+
+    def __str__(self):
+        return f"Sync of account {self.account_id} at {self.started_at}: {self.total_seconds:.2f}s"
+
+
 # -- Note specific --
 
 
@@ -1,4 +1,11 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from decimal import Decimal
+from typing import Dict, List
+
+from django.conf import settings
+from django.db.models import Count, F, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce
 
 from ..models import ManualTrade, TradeAccount
 
@@ -19,44 +26,291 @@ class AccountService:
         print(f"Deleted account: {account.id}")
 
     @staticmethod
-    def calculate_account_balance(account: TradeAccount):
-        trades = ManualTrade.objects.filter(account=account)
-        return sum(trade.profit for trade in trades)
+    def calculate_account_balance(account: TradeAccount) -> Decimal:
+        profit = ManualTrade.objects.filter(account=account).aggregate(
+            profit=Coalesce(Sum("profit"), Value(0.0))
+        )["profit"]
+        return Decimal(str(profit)).quantize(Decimal("0.01"))
+
+    @staticmethod
+    def apply_balance_delta(account: TradeAccount, delta: float):
+        """
+        Moves the stored balance by the profit a sync added or changed, in one
+        UPDATE that does not overwrite concurrent changes
+        """
+        amount = Decimal(str(delta)).quantize(Decimal("0.01"))
+        if not amount:
+            return
+
+        TradeAccount.objects.filter(id=account.id).update(balance=F("balance") + amount)
+        account.balance = (account.balance or Decimal("0")) + amount
+
+    @staticmethod
+    def needs_balance_reconcile(account: TradeAccount, now) -> bool:
+        """
+        The running balance is summed up again from the trades after full syncs
+        and every ACCOUNT_BALANCE_RECONCILE_INTERVAL seconds, which corrects
+        rounding drift and trades changed outside of the syncs
+        """
+        reconciled_at = account.balance_reconciled_at
+        if reconciled_at is None:
+            return True
+        if account.last_full_sync_at and account.last_full_sync_at > reconciled_at:
+            return True
+
+        interval = getattr(settings, "ACCOUNT_BALANCE_RECONCILE_INTERVAL", 60 * 60)
+        return (now - reconciled_at).total_seconds() >= interval
+
+    @staticmethod
+    def apply_trade_changes(changes):
+        """
+        Updates the aggregates derived from the trades a sync wrote
+        """
+        from .daily_pnl_service import DailyPnlService
+        from .snapshot_service import StatisticsSnapshotService
+        from .statistics_cache import StatisticsCache
+
+        StatisticsSnapshotService.apply_changes(changes)
+        if DailyPnlService.is_enabled():
+            DailyPnlService.apply_changes(changes)
+        AccountService.apply_balance_delta(changes.account, changes.get_profit_delta())
+
+        # Bulk writes do not send the signals the cached results are invalidated on
+        if changes.has_changes():
+            StatisticsCache.bump_version(changes.account.user_id)
 
     @staticmethod
     def update_account_cache(account: TradeAccount):
-        account.balance = AccountService.calculate_account_balance(account)
+        from .refresh_policy import RefreshPolicy
 
-        account.cached_until = timezone.now() + timezone.timedelta(seconds=10)
-        account.cached_at = timezone.now()
+        now = timezone.now()
+        account.cached_until = now + timezone.timedelta(
+            seconds=RefreshPolicy.get_ttl(account, now)
+        )
+        account.cached_at = now
+
+        # Saves that only touch the cache fields keep the cached statistics valid
+        update_fields = ["cached_at", "cached_until", "updated_at"]
+        if AccountService.needs_balance_reconcile(account, now):
+            balance = AccountService.calculate_account_balance(account)
+            if balance != account.balance:
+                logger.info(
+                    f"Reconciled the balance of account {account.id}: "
+                    f"{account.balance} -> {balance}"
+                )
+                account.balance = balance
+                update_fields.append("balance")
+            account.balance_reconciled_at = now
+            update_fields.append("balance_reconciled_at")
 
-        account.save()
+        account.save(update_fields=update_fields)
 
     @staticmethod
-    def refresh_account(account: TradeAccount):
+    def fetch_account_trades(account: TradeAccount):
+        """
+        Fetches the trades of an account from its platform. Does not touch the
+        database, so it can run in a worker thread.
+        """
+        from .c_trader_service import CTraderService
+        from .meta_trader_service import MetaTraderService
+
+        match account.platform:
+            case Platform.meta_trader_4 | Platform.meta_trader_5:
+                return MetaTraderService.fetch_new_trades(account)
+            case Platform.c_trader:
+                return CTraderService.fetch_trades_terminal(account)
+
+        return None
+
+    @staticmethod
+    def apply_account_trades(account: TradeAccount, trades):
+        """
+        Writes the fetched trades of an account and renews its cache
+        """
+        from .c_trader_service import CTraderService
         from .meta_trader_service import MetaTraderService
 
         match account.platform:
             case Platform.meta_trader_4 | Platform.meta_trader_5:
-                MetaTraderService.refresh_account(account)
+                meta_trades, full_sync = trades
+                MetaTraderService.apply_new_trades(account, meta_trades, full_sync)
+            case Platform.c_trader:
+                if trades:
+                    CTraderService.update_trades(trades, account)
 
         AccountService.update_account_cache(account)
 
+    @staticmethod
+    def refresh_account(account: TradeAccount):
+        from .sync_telemetry import SyncRecord
+
+        record = SyncRecord(account)
+        with record:
+            AccountService.apply_account_trades(
+                account, record.fetch(AccountService.fetch_account_trades)
+            )
+
+    @staticmethod
+    def refresh_accounts(
+        accounts: List[TradeAccount], stale_only: bool = False
+    ) -> Dict[int, Exception]:
+        """
+        Refreshes the accounts, fetching up to ACCOUNT_REFRESH_CONCURRENCY of them in
+        parallel while the database writes stay on the calling thread.
+
+        An account that is already being refreshed in this process is not fetched
+        again, the caller waits for that refresh and shares its outcome. With
+        stale_only, accounts another caller refreshed in the meantime are skipped.
+
+        Returns the error of every account that failed to refresh.
+        """
+        from .single_flight import account_refreshes
+
+        leading, joined = [], []
+        for account in accounts:
+            flight, leader = account_refreshes.claim(account.id)
+            (leading if leader else joined).append((account, flight))
+
+        errors = {}
+        try:
+            refreshing = [account for account, _ in leading]
+            if stale_only and refreshing:
+                fresh = set(
+                    TradeAccount.objects.filter(
+                        id__in=[account.id for account in refreshing],
+                        cached_until__gt=timezone.now(),
+                    ).values_list("id", flat=True)
+                )
+                refreshing = [
+                    account for account in refreshing if account.id not in fresh
+                ]
+
+            if refreshing:
+                errors = AccountService.run_refreshes(refreshing)
+        except Exception as e:
+            errors = {account.id: e for account, _ in leading}
+            raise
+        finally:
+            for account, flight in leading:
+                account_refreshes.finish(account.id, flight, errors.get(account.id))
+
+        timeout = getattr(settings, "ACCOUNT_REFRESH_WAIT_TIMEOUT", 60)
+        for account, flight in joined:
+            error = account_refreshes.wait(flight, timeout)
+            if error is not None:
+                errors[account.id] = error
+            else:
+                account.refresh_from_db()
+
+        return errors
+
+    @staticmethod
+    def run_refreshes(accounts: List[TradeAccount]) -> Dict[int, Exception]:
+        errors = {}
+        concurrency = min(
+            getattr(settings, "ACCOUNT_REFRESH_CONCURRENCY", 4), len(accounts)
+        )
+
+        if concurrency <= 1:
+            for account in accounts:
+                try:
+                    AccountService.refresh_account(account)
+                except Exception as e:
+                    errors[account.id] = e
+            return errors
+
+        from .sync_telemetry import SyncRecord
+
+        with ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="account-refresh"
+        ) as executor:
+            futures = {
+                executor.submit(
+                    record.fetch, AccountService.fetch_account_trades
+                ): record
+                for record in map(SyncRecord, accounts)
+            }
+
+            # Apply in completion order, so the fastest accounts are written first
+            for future in as_completed(futures):
+                record = futures[future]
+                try:
+                    with record:
+                        AccountService.apply_account_trades(
+                            record.account, future.result()
+                        )
+                except Exception as e:
+                    errors[record.account.id] = e
+
+        return errors
+
+    @staticmethod
+    def is_revalidating() -> bool:
+        return getattr(settings, "ACCOUNT_REFRESH_MODE", "inline") == "revalidate"
+
+    @staticmethod
+    def get_data_as_of(user):
+        """
+        Returns when the least recently refreshed enabled account of the user was
+        refreshed, None when one was never refreshed
+        """
+        accounts = TradeAccount.objects.filter(user=user, disabled=False).aggregate(
+            oldest=Min("cached_at"),
+            never_refreshed=Count("id", filter=Q(cached_at__isnull=True)),
+        )
+        if accounts["never_refreshed"]:
+            return None
+        return accounts["oldest"]
+
     @staticmethod
     def check_refresh(user, force_refresh=False):
+        from .refresh_policy import RefreshPolicy
+        from .refresh_scheduler import AccountRefreshScheduler
+
+        # Accounts of offline users are cached longer, refresh them as soon as the
+        # user is back. The worker picks the new due times up on its next reload
+        if RefreshPolicy.mark_user_seen(user):
+            TradeAccount.objects.filter(
+                user=user, cached_until__gt=timezone.now()
+            ).update(cached_until=timezone.now())
+
+        # The refresh_accounts worker keeps the accounts up to date
+        if AccountRefreshScheduler.is_enabled() and not force_refresh:
+            return
+
         def needs_refresh(account: TradeAccount) -> bool:
             if not account.cached_at or not account.cached_until:
                 return True
 
             return account.cached_until <= timezone.now()
 
-        accounts = TradeAccount.objects.filter(user=user)
-
-        for account in accounts:
-            if not force_refresh and not needs_refresh(account):
-                continue
+        accounts = [
+            account
+            for account in TradeAccount.objects.filter(user=user)
+            if force_refresh or needs_refresh(account)
+        ]
+
+        if AccountService.is_revalidating() and not force_refresh:
+            from .background_refresh import refresh_in_background
+
+            # Serve what is in the database and refresh after the response, unless
+            # the data is older than the hard limit
+            max_staleness = getattr(settings, "ACCOUNT_REFRESH_MAX_STALENESS", 10 * 60)
+            too_old = [
+                account
+                for account in accounts
+                if not account.cached_at
+                or (timezone.now() - account.cached_at).total_seconds() >= max_staleness
+            ]
+            refresh_in_background(
+                [account for account in accounts if account not in too_old]
+            )
+            accounts = too_old
 
-            AccountService.refresh_account(account)
+        # Parallel requests of the user refresh the same accounts, only one fetches them
+        errors = AccountService.refresh_accounts(accounts, stale_only=not force_refresh)
+        for account_id, error in errors.items():
+            logger.error(f"Failed to refresh account {account_id}: {error}")
 
     @staticmethod
     def authenticate(
@@ -0,0 +1,63 @@
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from ..models import TradeAccount
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_pid = None
+_pending = set()
+_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor, _executor_pid
+
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        # A forked worker starts its own threads, the parent's do not survive the fork
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "ACCOUNT_REFRESH_CONCURRENCY", 4),
+            thread_name_prefix="account-revalidate",
+        )
+        _executor_pid = pid
+        _pending.clear()
+    return _executor
+
+
+def refresh_in_background(accounts: List[TradeAccount]) -> Optional[Future]:
+    """
+    Refreshes the accounts on a worker thread of this process and returns right
+    away. Accounts already waiting for a background refresh are not queued again.
+    """
+    from .account_service import AccountService
+
+    with _lock:
+        executor = get_executor()
+        accounts = [account for account in accounts if account.id not in _pending]
+        if not accounts:
+            return None
+        _pending.update(account.id for account in accounts)
+
+    def refresh():
+        close_old_connections()
+        try:
+            errors = AccountService.refresh_accounts(accounts, stale_only=True)
+            for account_id, error in errors.items():
+                logger.error(f"Failed to refresh account {account_id}: {error}")
+        except Exception as e:
+            logger.error(f"Failed to refresh accounts in the background: {e}")
+        finally:
+            with _lock:
+                _pending.difference_update(account.id for account in accounts)
+            # Connections of worker threads are not closed at the end of a request
+            connections.close_all()
+
+    return executor.submit(refresh)
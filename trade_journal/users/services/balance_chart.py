@@ -0,0 +1,168 @@
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Dict, Iterable, List, Tuple
+
+CHART_KEY_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+CHART_RESOLUTIONS = ("raw", "hour", "day", "week")
+
+
+class BalanceCurve:
+    """
+    Cumulative profit over time, stored as prefix sums over the sorted trade times
+    so the balance at any moment is a binary search away
+    """
+
+    def __init__(self, points: Iterable[Tuple[datetime, float]]):
+        ordered = sorted(points, key=lambda point: point[0])
+
+        self.times = [time for time, _ in ordered]
+        self.balances = list(accumulate(profit for _, profit in ordered))
+
+    def __len__(self):
+        return len(self.times)
+
+    def balance_at(self, date: datetime):
+        """
+        Returns the cumulative profit of all trades up to and including the given date
+        """
+        index = bisect_right(self.times, date)
+        return self.balances[index - 1] if index else 0
+
+
+def check_resolution(resolution: str):
+    if resolution not in CHART_RESOLUTIONS:
+        raise ValueError(
+            f"Unknown resolution '{resolution}', expected one of: {', '.join(CHART_RESOLUTIONS)}"
+        )
+
+
+def get_chart_points(
+    curve: BalanceCurve,
+    dates: Iterable[datetime],
+    from_date: datetime,
+    to_date: datetime,
+) -> List[Tuple[datetime, float]]:
+    """
+    Returns the balance at from_date (left out when zero), at each of the given
+    dates and at to_date, limited to the [from_date, to_date] range at a one
+    second resolution
+    """
+    lower = from_date.replace(microsecond=0)
+    upper = to_date.replace(microsecond=0)
+
+    points = []
+
+    def add_for_date(date, disallow_zero=False):
+        if not date or not lower <= date.replace(microsecond=0) <= upper:
+            return
+
+        balance = curve.balance_at(date)
+        if balance == 0 and disallow_zero:
+            return
+
+        points.append((date, balance))
+
+    add_for_date(from_date, disallow_zero=True)
+
+    for date in dates:
+        add_for_date(date)
+
+    add_for_date(to_date)
+
+    return points
+
+
+def get_bucket_start(date: datetime, resolution: str) -> datetime:
+    if resolution == "hour":
+        return date.replace(minute=0, second=0, microsecond=0)
+
+    day = date.replace(hour=0, minute=0, second=0, microsecond=0)
+    if resolution == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def bucket_points(
+    points: List[Tuple[datetime, float]], resolution: str
+) -> List[Tuple[datetime, float]]:
+    """
+    Reduces chronological points to the closing balance of each hour, day or week
+    """
+    buckets = {}
+    for date, balance in points:
+        buckets[get_bucket_start(date, resolution)] = balance
+    return list(buckets.items())
+
+
+def downsample_lttb(
+    points: List[Tuple[datetime, float]], threshold: int
+) -> List[Tuple[datetime, float]]:
+    """
+    Largest-Triangle-Three-Buckets downsampling of chronological points. Keeps the
+    first and last point and, per bucket, the point that spans the largest triangle
+    with its neighbours, which preserves the peaks and troughs of the curve.
+    """
+    if threshold >= len(points) or threshold < 3:
+        return points
+
+    x = [date.timestamp() for date, _ in points]
+    y = [balance for _, balance in points]
+
+    sampled = [points[0]]
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third point of the triangle
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, len(points))
+        average_x = sum(x[next_start:next_end]) / (next_end - next_start)
+        average_y = sum(y[next_start:next_end]) / (next_end - next_start)
+
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        max_area = -1
+        selected = start
+        for j in range(start, end):
+            area = abs(
+                (x[a] - average_x) * (y[j] - y[a]) - (x[a] - x[j]) * (average_y - y[a])
+            )
+            if area > max_area:
+                max_area = area
+                selected = j
+
+        sampled.append(points[selected])
+        a = selected
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def build_balance_chart(
+    curve: BalanceCurve,
+    dates: Iterable[datetime],
+    from_date: datetime,
+    to_date: datetime,
+    resolution: str = "raw",
+    max_points: int = None,
+) -> Dict[str, float]:
+    """
+    Builds the keyed balance chart. Raw charts without a point limit keep one point
+    per trade, otherwise the points are sorted in time, bucketed to the closing
+    balance per resolution and downsampled to at most max_points.
+    """
+    points = get_chart_points(curve, dates, from_date, to_date)
+
+    if resolution != "raw" or max_points:
+        points.sort(key=lambda point: point[0])
+
+        if resolution != "raw":
+            points = bucket_points(points, resolution)
+
+        if max_points:
+            points = downsample_lttb(points, max_points)
+
+    return {date.strftime(CHART_KEY_FORMAT): balance for date, balance in points}
@@ -1,7 +1,5 @@
-import requests
-from django.conf import settings
-
-from ..models import ManualTrade, TradeAccount, TradeType
+from ..models import TradeAccount, TradeType
+from .c_trader_sessions import get_c_trader_sessions
 import logging
 from ejtraderCT import Ctrader
 
@@ -14,7 +12,7 @@ class CTraderService:
     @staticmethod
     def refresh_account(account: TradeAccount):
         # Fetch and update trades
-        trades = CTraderService.fetch_trades_terminal(account.account_id)
+        trades = CTraderService.fetch_trades_terminal(account)
 
         # If there's nothing to iterate over, return None
         if not trades:
@@ -23,7 +21,33 @@ class CTraderService:
         CTraderService.update_trades(trades, account)
 
     @staticmethod
-    def update_trades(trades, account, active=False):
+    def update_trades(trades, account, active=False, bulk=None):
+        from .account_service import AccountService
+        from .sync_telemetry import measure_sync
+        from .trade_changes import TradeChanges
+        from .trade_upsert import TradeUpsertService
+
+        with measure_sync("parse"):
+            # Only the trades that differ from what the last sync wrote reach the database
+            rows = TradeUpsertService.get_changed_rows(
+                account, CTraderService.get_trade_rows(trades, active)
+            )
+            if not rows:
+                return
+
+        with measure_sync("upsert"):
+            changes = TradeChanges(account, [exchange_id for exchange_id, _ in rows])
+
+            TradeUpsertService.write(account, rows, bulk=bulk)
+
+            AccountService.apply_trade_changes(changes.collect())
+
+    @staticmethod
+    def get_trade_rows(trades, active=False) -> list:
+        """
+        Maps the cTrader positions to (exchange_id, values) rows
+        """
+        rows = []
 
         for trade in trades:
             trade_type = None
@@ -33,42 +57,55 @@ class CTraderService:
             elif trade["side"] == "Buy":
                 trade_type = TradeType.buy
 
-            ManualTrade.objects.update_or_create(
-                account=account,
-                exchange_id=str(trade["position_id"]),
-                defaults={
-                    "trade_type": trade_type,
-                    "symbol": trade["name"],
-                    "quantity": trade["amount"],
-                    "volume": trade["amount"],
-                    "open_price": trade["price"],
-                    "gain": trade["gain"],
-                    "profit": trade["diff"],
-                    "active": active,
-                },
+            rows.append(
+                (
+                    str(trade["position_id"]),
+                    {
+                        "trade_type": trade_type,
+                        "symbol": trade["name"],
+                        "quantity": trade["amount"],
+                        "volume": trade["amount"],
+                        "open_price": trade["price"],
+                        "gain": trade["gain"],
+                        "profit": trade["diff"],
+                        "active": active,
+                    },
+                )
             )
 
+        return rows
 
     @staticmethod
-    def _get_client(server, username, password):
+    def create_client(server, username, password):
         c_trader = Ctrader(server="h8.p.c-trader.cn", account=f"demo.${str(server).lower()}.${str(username).lower()}", password=password)
 
         status = c_trader.isconnected()
-        
+
         if status:
             return c_trader
         else:
+            c_trader.logout()
             raise Exception("Invalid credentials")
 
     @staticmethod
     def fetch_trades_terminal(account: TradeAccount):
-        c_trader = CTraderService._get_client(account.server, account.account_id, account.password)
+        """
+        Fetches the positions of an account over its cached session. Does not touch
+        the database, so it can run in a worker thread. Returns None when the
+        logon or the fetch failed, the account cache is renewed all the same so
+        requests do not retry the logon until the account is due again.
+        """
+        try:
+            with get_c_trader_sessions().session(
+                account.server, account.account_id, account.password
+            ) as c_trader:
+                return c_trader.positions()
+        except Exception as e:
+            logger.error(f"Error fetching positions for account {account.account_id}: {e}")
+            return None
 
-        return c_trader.positions()
-    
     @staticmethod
     def authenticate_sync(server, username, password):
-
-        c_trader = CTraderService._get_client(server, username, password)
-
-        return username, c_trader.client["currency"]
+        # The session stays cached for the first refresh of the new account
+        with get_c_trader_sessions().session(server, username, password) as c_trader:
+            return username, c_trader.client["currency"]
@@ -0,0 +1,215 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CTraderSession:
+    def __init__(self, client, password: str, now: float):
+        self.client = client
+        self.password = password
+        self.created_at = now
+        self.last_used_at = now
+        # Held while the session is in use, a FIX session handles one caller at a time
+        self.lock = threading.Lock()
+
+
+class CTraderSessionCache:
+    """
+    Keeps the cTrader FIX sessions of the current process alive between refreshes,
+    keyed by server and account, so only the first refresh pays for the logon.
+
+    A session is checked with isconnected() before it is handed out and logged on
+    again when it dropped. Sessions unused for CTRADER_SESSION_IDLE_TIMEOUT seconds
+    are logged out, and at most CTRADER_SESSION_MAX_SESSIONS are kept, least
+    recently used first out. Use get_c_trader_sessions() to get the cache of the
+    current process.
+    """
+
+    def __init__(
+        self,
+        connect: Callable,
+        idle_timeout: float = None,
+        max_sessions: int = None,
+    ):
+        self.connect = connect
+        self.idle_timeout = (
+            idle_timeout
+            if idle_timeout is not None
+            else getattr(settings, "CTRADER_SESSION_IDLE_TIMEOUT", 15 * 60)
+        )
+        self.max_sessions = (
+            max_sessions
+            if max_sessions is not None
+            else getattr(settings, "CTRADER_SESSION_MAX_SESSIONS", 100)
+        )
+
+        self.sessions: "OrderedDict[tuple, CTraderSession]" = OrderedDict()
+        self.lock = threading.Lock()
+        # One lock per key, so a session is only logged on once when requested concurrently
+        self.key_locks: Dict[tuple, threading.Lock] = {}
+
+        self.hits = 0
+        self.connects = 0
+        self.reconnects = 0
+        self.evictions = 0
+
+    @contextmanager
+    def session(self, server, username, password):
+        """
+        Yields a connected client for the account, reusing the cached session when
+        it is still alive
+        """
+        key = (str(server).lower(), str(username).lower())
+
+        with self.lock:
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            session = self.get_session(key, server, username, password)
+
+            with session.lock:
+                try:
+                    yield session.client
+                except Exception:
+                    # The session may be left in an unknown state, start over next time
+                    self.discard(key, session)
+                    raise
+                finally:
+                    session.last_used_at = time.monotonic()
+
+    def get_session(self, key: tuple, server, username, password) -> CTraderSession:
+        now = time.monotonic()
+        self.evict_idle(now)
+
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is not None:
+                # Keeps it from being evicted as idle before the caller holds it
+                session.last_used_at = now
+                self.sessions.move_to_end(key)
+
+        if session is not None:
+            if session.password == password and self.is_alive(session):
+                with self.lock:
+                    self.hits += 1
+                return session
+
+            self.discard(key, session)
+            with self.lock:
+                self.reconnects += 1
+
+        session = CTraderSession(self.connect(server, username, password), password, now)
+
+        with self.lock:
+            self.connects += 1
+            self.sessions[key] = session
+            evicted = []
+            while len(self.sessions) > self.max_sessions:
+                evicted.append(self.sessions.popitem(last=False)[1])
+            self.evictions += len(evicted)
+
+        for least_recently_used in evicted:
+            self.logout(least_recently_used)
+
+        return session
+
+    @staticmethod
+    def is_alive(session: CTraderSession) -> bool:
+        try:
+            return bool(session.client.isconnected())
+        except Exception:
+            return False
+
+    def evict_idle(self, now: float = None):
+        """
+        Logs out the sessions that were not used for idle_timeout seconds
+        """
+        now = now if now is not None else time.monotonic()
+
+        with self.lock:
+            idle = [
+                key
+                for key, session in self.sessions.items()
+                if now - session.last_used_at >= self.idle_timeout
+                and not session.lock.locked()
+            ]
+            evicted = [self.sessions.pop(key) for key in idle]
+            self.evictions += len(evicted)
+
+        for session in evicted:
+            self.logout(session)
+
+    def discard(self, key: tuple, session: CTraderSession):
+        with self.lock:
+            if self.sessions.get(key) is session:
+                del self.sessions[key]
+        self.logout(session)
+
+    @staticmethod
+    def logout(session: CTraderSession):
+        try:
+            session.client.logout()
+        except Exception as e:
+            logger.warning(f"Failed to log out cTrader session: {e}")
+
+    def close(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+
+        for session in sessions:
+            self.logout(session)
+
+    def get_metrics(self) -> Dict:
+        with self.lock:
+            return {
+                "sessions": len(self.sessions),
+                "hits": self.hits,
+                "connects": self.connects,
+                "reconnects": self.reconnects,
+                "evictions": self.evictions,
+            }
+
+
+_sessions = None
+_sessions_pid = None
+_sessions_lock = threading.Lock()
+
+
+def get_c_trader_sessions() -> CTraderSessionCache:
+    """
+    Returns the session cache of the current process. A forked worker starts
+    with an empty cache, FIX sockets are never shared between processes.
+    """
+    from .c_trader_service import CTraderService
+
+    global _sessions, _sessions_pid
+
+    pid = os.getpid()
+    if _sessions is None or _sessions_pid != pid:
+        with _sessions_lock:
+            if _sessions is None or _sessions_pid != pid:
+                _sessions = CTraderSessionCache(CTraderService.create_client)
+                _sessions_pid = pid
+    return _sessions
+
+
+def reset_c_trader_sessions():
+    """
+    Logs out the sessions of the current process, the next call creates a new cache
+    """
+    global _sessions, _sessions_pid
+
+    with _sessions_lock:
+        if _sessions is not None and _sessions_pid == os.getpid():
+            _sessions.close()
+        _sessions = None
+        _sessions_pid = None
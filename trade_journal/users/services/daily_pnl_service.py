@@ -0,0 +1,180 @@
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, List
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+from ..models import DailyAccountPnl, ManualTrade, TradeAccount
+from .statistics_engine import calculate_day_statistics, get_min_gain_threshold
+from .trade_changes import TradeChanges
+
+ROLLUP_FIELDS = ("trade_count", "profit", "won", "lost", "volume", "breakeven_count")
+
+
+def get_rollup_values(row, sign: int = 1) -> Dict:
+    profit = row.profit or 0.0
+    breakeven = row.gain is not None and abs(float(row.gain)) < get_min_gain_threshold()
+
+    return {
+        "trade_count": sign,
+        "profit": sign * profit,
+        "won": sign * profit if profit > 0 else 0.0,
+        "lost": sign * profit if profit < 0 else 0.0,
+        "volume": sign * (row.volume or 0.0),
+        "breakeven_count": sign if breakeven else 0,
+    }
+
+
+def get_rollup_days(trades):
+    """
+    Groups closed trades per account and close day into the rollup columns.
+    Only uses the queryset API, so the data migrations run it on their
+    historical models as well.
+    """
+    threshold = get_min_gain_threshold()
+
+    return (
+        trades.filter(is_top_up=False, close_time__isnull=False)
+        .annotate(day=TruncDate("close_time"))
+        .values("account_id", "day")
+        .annotate(
+            rollup_trade_count=Count("id"),
+            rollup_profit=Coalesce(Sum("profit"), Value(0.0)),
+            rollup_won=Coalesce(Sum("profit", filter=Q(profit__gt=0)), Value(0.0)),
+            rollup_lost=Coalesce(Sum("profit", filter=Q(profit__lt=0)), Value(0.0)),
+            rollup_volume=Coalesce(Sum("volume"), Value(0.0)),
+            rollup_breakeven_count=Count(
+                "id", filter=Q(gain__gt=-threshold, gain__lt=threshold)
+            ),
+        )
+        .order_by()
+    )
+
+
+def create_rollup_rows(model, days, batch_size: int = 1000):
+    """
+    Writes the rows of get_rollup_days with the given DailyAccountPnl model
+    """
+    model.objects.bulk_create(
+        (
+            model(
+                account_id=values["account_id"],
+                day=values["day"],
+                **{field: values[f"rollup_{field}"] for field in ROLLUP_FIELDS},
+            )
+            for values in days.iterator()
+        ),
+        batch_size=batch_size,
+    )
+
+
+class DailyPnlService:
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return getattr(settings, "TRADE_STATISTICS_DAILY_ROLLUP", False)
+
+    @staticmethod
+    def rebuild(account: TradeAccount):
+        """
+        Recomputes the daily rollup of an account from its trades
+        """
+        with transaction.atomic():
+            DailyAccountPnl.objects.filter(account=account).delete()
+            create_rollup_rows(
+                DailyAccountPnl,
+                get_rollup_days(ManualTrade.objects.filter(account=account)),
+            )
+
+    @staticmethod
+    def apply_changes(changes: TradeChanges):
+        """
+        Applies the difference of the trades a sync created or modified to the rollup
+        """
+        deltas = defaultdict(lambda: dict.fromkeys(ROLLUP_FIELDS, 0))
+
+        for before, after in changes.changed():
+            for row, sign in ((before, -1), (after, 1)):
+                if not row or row.is_top_up or not row.close_time:
+                    continue
+                delta = deltas[row.close_time.date()]
+                for field, value in get_rollup_values(row, sign).items():
+                    delta[field] += value
+
+        deltas = {
+            day: delta
+            for day, delta in deltas.items()
+            if any(value != 0 for value in delta.values())
+        }
+        if not deltas:
+            return
+
+        with transaction.atomic():
+            # Missing days start at zero, a day a concurrent sync just created is
+            # left alone, so both syncs add their deltas to the same row
+            DailyAccountPnl.objects.bulk_create(
+                [DailyAccountPnl(account=changes.account, day=day) for day in deltas],
+                ignore_conflicts=True,
+            )
+            for day, delta in deltas.items():
+                DailyAccountPnl.objects.filter(account=changes.account, day=day).update(
+                    **{field: F(field) + value for field, value in delta.items()}
+                )
+
+            DailyAccountPnl.objects.filter(
+                account=changes.account, day__in=deltas.keys(), trade_count__lte=0
+            ).delete()
+
+    @staticmethod
+    def get_days(
+        accounts: List[TradeAccount], from_date: datetime = None, to_date: datetime = None
+    ) -> Dict[date, Dict]:
+        """
+        Sums the rollup rows of the accounts per day, newest first like the trade
+        scan adds them, in the same range the trades are filtered on
+        """
+        rollups = DailyAccountPnl.objects.filter(account__in=accounts)
+
+        if from_date and to_date:
+            rollups = rollups.filter(day__gte=from_date.date(), day__lt=to_date.date())
+
+        rows = (
+            rollups.values("day")
+            .annotate(**{f"rollup_{field}": Sum(field) for field in ROLLUP_FIELDS})
+            .order_by("-day")
+        )
+
+        return {
+            row["day"]: {field: row[f"rollup_{field}"] for field in ROLLUP_FIELDS}
+            for row in rows
+        }
+
+    @staticmethod
+    def apply_to_statistics(statistics: Dict, days: Dict[date, Dict]) -> Dict:
+        """
+        Fills the day based parts of a statistics payload, computed without them
+        by the trade scan, from the rollup
+        """
+        if not statistics["overall_statistics"]["total_trades"]:
+            return statistics
+
+        day_statistics = calculate_day_statistics(
+            {
+                day: {
+                    "total_trades": values["trade_count"],
+                    "total_profit": values["profit"],
+                    "total_won": values["won"],
+                    "total_loss": values["lost"],
+                    "total_invested": values["profit"],
+                }
+                for day, values in days.items()
+            }
+        )
+        statistics["overall_statistics"].update(day_statistics["overall_statistics"])
+        statistics["day_performances"] = day_statistics["day_performances"]
+        statistics["monthly_summary"] = day_statistics["monthly_summary"]
+
+        return statistics
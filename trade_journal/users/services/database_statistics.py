@@ -0,0 +1,220 @@
+from datetime import timedelta, timezone
+from decimal import Decimal
+from typing import Dict
+
+from django.db.models import (
+    Count,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    Max,
+    Min,
+    Q,
+    QuerySet,
+    Sum,
+    Value,
+)
+from django.db.models.functions import (
+    Coalesce,
+    ExtractHour,
+    ExtractWeekDay,
+    TruncDate,
+)
+
+from ..models import TradeType
+from .statistics_engine import (
+    HOLD_TIME_TYPES,
+    SESSIONS_BY_HOUR,
+    TradeStatisticsAccumulator,
+    get_min_gain_threshold,
+)
+
+# Trade times come back from the database in UTC, group on the same dates
+PROFIT = Coalesce("profit", Value(0.0))
+QUANTITY = Coalesce("quantity", Value(0.0))
+HOLD_TIME = ExpressionWrapper(
+    F("close_time") - F("open_time"), output_field=DurationField()
+)
+
+
+def sum_or_zero(expression, **extra):
+    return Coalesce(Sum(expression, **extra), Value(0.0))
+
+
+def seconds(value) -> float:
+    if value is None:
+        return 0.0
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    # Backends without a native interval type return microseconds
+    return value / 1_000_000
+
+
+class DatabaseStatisticsBackend:
+    """
+    Computes the statistics with grouped aggregate queries, so only the
+    aggregates are sent over the wire instead of every trade row.
+
+    The aggregates are loaded into a TradeStatisticsAccumulator, which builds
+    the same payload as the python backend.
+    """
+
+    @staticmethod
+    def get_filters() -> Dict[str, Q]:
+        threshold = get_min_gain_threshold()
+        breakeven = Q(gain__gt=-threshold, gain__lt=threshold)
+        countable = Q(gain__isnull=False) & ~breakeven
+
+        return {
+            "breakeven": breakeven,
+            "countable": countable,
+            "won": countable & Q(profit__gt=0),
+            "lost": countable & Q(profit__lt=0),
+            "timed": Q(duration_in_minutes__gt=0),
+            "held": Q(open_time__isnull=False, close_time__isnull=False),
+            "symbol": Q(symbol__isnull=False) & ~Q(symbol=""),
+        }
+
+    @staticmethod
+    def load_totals(accumulator: TradeStatisticsAccumulator, trades: QuerySet):
+        filters = DatabaseStatisticsBackend.get_filters()
+
+        hold_times = {}
+        for success in HOLD_TIME_TYPES:
+            hold_times[f"hold_count_{success}"] = Count("id", filter=Q(success=success))
+            hold_times[f"hold_seconds_{success}"] = Sum(
+                HOLD_TIME, filter=filters["held"] & Q(success=success)
+            )
+
+        totals = trades.aggregate(
+            stat_total_trades=Count("id"),
+            stat_total_profit=sum_or_zero(PROFIT),
+            stat_total_invested=sum_or_zero(QUANTITY),
+            stat_open_trades=Count("id", filter=Q(close_time__isnull=True)),
+            stat_long=Count("id", filter=Q(trade_type=TradeType.buy)),
+            stat_short=Count("id", filter=Q(trade_type=TradeType.sell)),
+            stat_breakeven_trades=Count("id", filter=filters["breakeven"]),
+            stat_countable_trades=Count("id", filter=filters["countable"]),
+            stat_winning_trades=Count("id", filter=filters["won"]),
+            stat_losing_trades=Count("id", filter=filters["lost"]),
+            stat_total_won=sum_or_zero("profit", filter=filters["won"]),
+            stat_total_lost=sum_or_zero("profit", filter=filters["lost"]),
+            stat_best_win=Max("profit", filter=filters["won"]),
+            stat_worst_loss=Min("profit", filter=filters["lost"]),
+            stat_timed_trades=Count("id", filter=filters["timed"]),
+            stat_timed_minutes=sum_or_zero(
+                "duration_in_minutes", filter=filters["timed"]
+            ),
+            stat_hold_seconds=Sum(HOLD_TIME, filter=filters["held"]),
+            stat_breakeven_days=Count(
+                "id",
+                filter=filters["symbol"] & Q(profit__gte=-0.2, profit__lte=0.2)
+                | filters["symbol"] & Q(profit__isnull=True),
+            ),
+            **hold_times,
+        )
+
+        for key, value in totals.items():
+            if key.startswith("stat_"):
+                setattr(accumulator, key[len("stat_"):], value)
+
+        accumulator.hold_seconds = seconds(totals["stat_hold_seconds"])
+        for success in HOLD_TIME_TYPES:
+            accumulator.hold_count_by_type[success] = totals[f"hold_count_{success}"]
+            accumulator.hold_seconds_by_type[success] = seconds(
+                totals[f"hold_seconds_{success}"]
+            )
+
+    @staticmethod
+    def load_groupings(accumulator: TradeStatisticsAccumulator, trades: QuerySet):
+        filters = DatabaseStatisticsBackend.get_filters()
+        symbol_trades = trades.filter(filters["symbol"])
+
+        # Grouped in the order the symbols first appear in trades ordered by -close_time
+        for row in (
+            symbol_trades.values("symbol")
+            .annotate(
+                stat_total_trades=Count("id"),
+                stat_total_profit=sum_or_zero(PROFIT),
+                stat_total_invested=sum_or_zero(QUANTITY),
+                stat_breakeven_trades=Count("id", filter=filters["breakeven"]),
+                last_close_time=Max("close_time"),
+            )
+            .order_by(F("last_close_time").desc(), "symbol")
+        ):
+            accumulator.symbol_stats[row["symbol"]] = {
+                "total_trades": row["stat_total_trades"],
+                "total_profit": row["stat_total_profit"],
+                "total_invested": row["stat_total_invested"],
+                "breakeven_trades": row["stat_breakeven_trades"],
+            }
+
+        for row in (
+            trades.filter(open_time__isnull=False)
+            .annotate(
+                week_day=ExtractWeekDay("open_time", tzinfo=timezone.utc),
+                hour=ExtractHour("open_time", tzinfo=timezone.utc),
+            )
+            .values("week_day", "hour")
+            .annotate(stat_trades=Count("id"))
+            .order_by()
+        ):
+            # ExtractWeekDay counts from 1 on Sunday, weekday() from 0 on Monday
+            accumulator.day_counts[(row["week_day"] + 5) % 7] += row["stat_trades"]
+            for session in SESSIONS_BY_HOUR[row["hour"]]:
+                accumulator.session_counts[session] += row["stat_trades"]
+
+    @staticmethod
+    def load_days(accumulator: TradeStatisticsAccumulator, trades: QuerySet):
+        # Newest day first, the order trades ordered by -close_time add them in
+        for row in (
+            trades.filter(close_time__isnull=False)
+            .annotate(close_day=TruncDate("close_time", tzinfo=timezone.utc))
+            .values("close_day")
+            .annotate(
+                stat_total_trades=Count("id"),
+                stat_total_profit=sum_or_zero(PROFIT),
+                stat_total_won=sum_or_zero(PROFIT, filter=Q(profit__gt=0)),
+                stat_total_loss=sum_or_zero(PROFIT, filter=~Q(profit__gt=0)),
+            )
+            .order_by("-close_day")
+        ):
+            accumulator.day_performances[row["close_day"]] = {
+                "total_trades": row["stat_total_trades"],
+                "total_profit": row["stat_total_profit"],
+                "total_won": row["stat_total_won"],
+                "total_loss": row["stat_total_loss"],
+                "total_invested": row["stat_total_profit"],
+            }
+
+    @staticmethod
+    def build_accumulator(trades: QuerySet, days: bool = True) -> TradeStatisticsAccumulator:
+        # Any ordering of the queryset would end up in the GROUP BY clauses
+        trades = trades.order_by()
+
+        accumulator = TradeStatisticsAccumulator(days=days)
+        DatabaseStatisticsBackend.load_totals(accumulator, trades)
+        if accumulator.total_trades:
+            DatabaseStatisticsBackend.load_groupings(accumulator, trades)
+            if days:
+                DatabaseStatisticsBackend.load_days(accumulator, trades)
+
+        return accumulator
+
+    @staticmethod
+    def calculate_statistics(trades: QuerySet, balance=0, days: bool = True) -> Dict:
+        return DatabaseStatisticsBackend.build_accumulator(trades, days=days).result(
+            balance=balance
+        )
+
+    @staticmethod
+    def calculate_account_totals(trades: QuerySet) -> Dict:
+        """
+        Returns {account_id: (trade count, Decimal profit)}
+        """
+        return {
+            row["account_id"]: (row["stat_trades"], Decimal(row["stat_profit"]))
+            for row in trades.order_by()
+            .values("account_id")
+            .annotate(stat_trades=Count("id"), stat_profit=sum_or_zero(PROFIT))
+        }
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Tuple
+
+from .balance_chart import CHART_KEY_FORMAT, downsample_lttb
+
+DRAWDOWN_FIELDS = (
+    "max_drawdown",
+    "max_drawdown_percent",
+    "average_drawdown",
+    "average_drawdown_percent",
+    "max_drawdown_started_at",
+    "max_drawdown_trough_at",
+    "max_drawdown_recovered_at",
+    "max_drawdown_duration",
+    "max_drawdown_recovery_time",
+)
+
+
+def empty_drawdown() -> Dict:
+    return {
+        "max_drawdown": 0,
+        "max_drawdown_percent": 0,
+        "average_drawdown": 0,
+        "average_drawdown_percent": 0,
+        "max_drawdown_started_at": None,
+        "max_drawdown_trough_at": None,
+        "max_drawdown_recovered_at": None,
+        "max_drawdown_duration": timedelta(0),
+        "max_drawdown_recovery_time": None,
+    }
+
+
+class DrawdownEngine:
+    """
+    Drawdown of the cumulative equity curve, built in a single pass over
+    chronological (time, amount, is_top_up) points.
+
+    Deposits and withdrawals move the equity and the peak together, so they
+    neither count as a drawdown nor as a recovery.
+    """
+
+    def __init__(self, start_equity: float = 0):
+        self.equity = start_equity
+        self.peak = start_equity
+        self.peak_time = None
+
+        self.points = 0
+        self.drawdown_total = 0
+        self.drawdown_percent_total = 0
+        self.underwater = []
+
+        self.max_drawdown = 0
+        self.max_drawdown_percent = 0
+        self.started_at = None
+        self.trough_at = None
+        self.recovered_at = None
+
+        # Peak the current drawdown started from, while it is the deepest one
+        self.pending_recovery = False
+
+    def add_all(self, points: Iterable[Tuple[datetime, float, bool]]):
+        for time, amount, is_top_up in points:
+            self.add(time, amount, is_top_up)
+        return self
+
+    def add(self, time: datetime, amount: float, is_top_up: bool = False):
+        self.equity += amount or 0
+
+        if is_top_up:
+            self.peak += amount or 0
+
+        if self.peak_time is None or self.equity >= self.peak:
+            if self.pending_recovery and self.equity >= self.peak:
+                self.recovered_at = time
+                self.pending_recovery = False
+            self.peak = max(self.peak, self.equity)
+            self.peak_time = time
+
+        drawdown = self.peak - self.equity
+        drawdown_percent = (drawdown / self.peak) * 100 if self.peak > 0 else 0
+
+        if drawdown > self.max_drawdown:
+            self.max_drawdown = drawdown
+            self.max_drawdown_percent = drawdown_percent
+            self.started_at = self.peak_time
+            self.trough_at = time
+            self.recovered_at = None
+            self.pending_recovery = True
+
+        self.points += 1
+        self.drawdown_total += drawdown
+        self.drawdown_percent_total += drawdown_percent
+        self.underwater.append((time, drawdown))
+
+    def get_underwater_chart(self, max_points: int = None) -> Dict[str, float]:
+        """
+        Drawdown per point, downsampled to at most max_points with LTTB, which
+        keeps the troughs of the curve
+        """
+        underwater = self.underwater
+        if max_points:
+            underwater = downsample_lttb(underwater, max_points)
+
+        return {
+            time.strftime(CHART_KEY_FORMAT): drawdown
+            for time, drawdown in underwater
+        }
+
+    def result(self) -> Dict:
+        if not self.points:
+            return empty_drawdown()
+
+        ended_at = self.recovered_at or self.underwater[-1][0]
+
+        return {
+            "max_drawdown": self.max_drawdown,
+            "max_drawdown_percent": self.max_drawdown_percent,
+            "average_drawdown": self.drawdown_total / self.points,
+            "average_drawdown_percent": self.drawdown_percent_total / self.points,
+            "max_drawdown_started_at": self.started_at,
+            "max_drawdown_trough_at": self.trough_at,
+            "max_drawdown_recovered_at": self.recovered_at,
+            "max_drawdown_duration": (
+                ended_at - self.started_at if self.started_at else timedelta(0)
+            ),
+            "max_drawdown_recovery_time": (
+                self.recovered_at - self.trough_at if self.recovered_at else None
+            ),
+        }
@@ -0,0 +1,160 @@
+from heapq import merge
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.cache import cache
+from ..models import ManualTrade, TradeAccount
+from .drawdown import DrawdownEngine
+from .statistics_cache import StatisticsCache
+
+
+def get_point_time(point):
+    return point[0]
+
+
+def get_underwater_chart_max_points() -> int:
+    return getattr(settings, "UNDERWATER_CHART_MAX_POINTS", 500)
+
+
+class EquityCurveService:
+    """
+    Per account equity curve, the chronological (time, amount, is_top_up) points of
+    all trades and deposits, cached together with the drawdown of the account.
+
+    Shared by the balance chart and the statistics. The cache key holds the data
+    version of the user, which is bumped whenever a trade or account of the user
+    is written, so any change creates a new entry.
+    """
+
+    @staticmethod
+    def get_cache_keys(accounts: List[TradeAccount]) -> Dict[int, str]:
+        versions = {}
+        keys = {}
+        for account in accounts:
+            if account.user_id not in versions:
+                versions[account.user_id] = StatisticsCache.get_version(account.user_id)
+            keys[account.id] = f"equity_curve:{account.id}:{versions[account.user_id]}"
+        return keys
+
+    @staticmethod
+    def build_curve(account: TradeAccount) -> Dict:
+        """
+        Loads the points of an account and computes its drawdown over the full history
+        """
+        # If the trade has no close time, it is considered to be open and the open_time is used
+        points = sorted(
+            (
+                (close_time or open_time, profit or 0, is_top_up)
+                for open_time, close_time, profit, is_top_up in ManualTrade.objects.filter(
+                    account=account, open_time__isnull=False
+                ).values_list("open_time", "close_time", "profit", "is_top_up")
+            ),
+            key=get_point_time,
+        )
+
+        engine = DrawdownEngine().add_all(points)
+
+        return {
+            "points": points,
+            "drawdown": engine.result(),
+            "underwater_chart": engine.get_underwater_chart(
+                get_underwater_chart_max_points()
+            ),
+        }
+
+    @staticmethod
+    def get_curves(accounts: List[TradeAccount]) -> Dict[int, Dict]:
+        """
+        Returns the cached curve of each account, building the missing ones
+        """
+        accounts = list(accounts)
+
+        # Without the writes of the other processes in the versions, the
+        # curves are built on every read
+        if not StatisticsCache.has_shared_versions():
+            return {
+                account.id: EquityCurveService.build_curve(account) for account in accounts
+            }
+
+        keys = EquityCurveService.get_cache_keys(accounts)
+        cached = cache.get_many(keys.values())
+
+        curves = {}
+        for account in accounts:
+            curve = cached.get(keys[account.id])
+            if curve is None:
+                curve = EquityCurveService.build_curve(account)
+                cache.set(
+                    keys[account.id],
+                    curve,
+                    getattr(settings, "EQUITY_CURVE_CACHE_TIMEOUT", 60 * 60),
+                )
+            curves[account.id] = curve
+
+        return curves
+
+    @staticmethod
+    def get_points(accounts: List[TradeAccount]) -> List:
+        """
+        Returns the chronological points of all given accounts
+        """
+        return list(
+            merge(
+                *(curve["points"] for curve in EquityCurveService.get_curves(accounts).values()),
+                key=get_point_time,
+            )
+        )
+
+    @staticmethod
+    def get_drawdown(
+        accounts: List[TradeAccount], from_date=None, to_date=None
+    ) -> tuple:
+        """
+        Returns the drawdown and underwater chart of the combined equity of the accounts,
+        limited to the points within the date range when one is given. The chart is
+        downsampled to UNDERWATER_CHART_MAX_POINTS
+        """
+        curves = EquityCurveService.get_curves(accounts)
+
+        if len(curves) == 1 and not (from_date and to_date):
+            curve = next(iter(curves.values()))
+            return curve["drawdown"], curve["underwater_chart"]
+
+        points = merge(
+            *(curve["points"] for curve in curves.values()), key=get_point_time
+        )
+
+        start_equity = 0
+        in_range = []
+        for point in points:
+            time = point[0]
+            if from_date and to_date:
+                if time < from_date:
+                    start_equity += point[1]
+                    continue
+                if time > to_date:
+                    break
+            in_range.append(point)
+
+        engine = DrawdownEngine(start_equity).add_all(in_range)
+        return engine.result(), engine.get_underwater_chart(
+            get_underwater_chart_max_points()
+        )
+
+    @staticmethod
+    def apply_to_statistics(
+        statistics: Dict, accounts: List[TradeAccount], from_date=None, to_date=None
+    ) -> Dict:
+        """
+        Fills the drawdown fields of a statistics payload from the equity curve
+        """
+        if not statistics["overall_statistics"]["total_trades"]:
+            return statistics
+
+        drawdown, underwater_chart = EquityCurveService.get_drawdown(
+            accounts, from_date, to_date
+        )
+        statistics["overall_statistics"].update(drawdown)
+        statistics["underwater_chart"] = underwater_chart
+
+        return statistics
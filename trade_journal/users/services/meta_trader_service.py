@@ -1,7 +1,11 @@
-import requests
+from collections import defaultdict
+from typing import Dict
+
 from django.conf import settings
+from django.utils import timezone
 
-from ..models import ManualTrade, TradeAccount, TradeType
+from ..models import TradeAccount, TradeType
+from .terminal_client import get_terminal_client
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,17 +15,170 @@ class MetaTraderService:
 
     @staticmethod
     def refresh_account(account: TradeAccount):
-        # Fetch and update trades
-        meta_trades = MetaTraderService.fetch_trades_terminal(account.account_id)
+        # Fetch and update the trades after the sync cursor
+        meta_trades, full_sync = MetaTraderService.fetch_new_trades(account)
+        MetaTraderService.apply_new_trades(account, meta_trades, full_sync)
+
+    @staticmethod
+    def get_deal_cursor(trade) -> tuple:
+        """
+        Returns the (time_msc, ticket) position of a deal or order in the history
+        """
+        time_msc = (
+            trade.get("time_msc")
+            or trade.get("time_done_msc")
+            or trade.get("time_setup_msc")
+            or int(trade.get("time") or 0) * 1000
+        )
+        return int(time_msc), int(trade.get("ticket") or 0)
+
+    @staticmethod
+    def needs_full_sync(account: TradeAccount) -> bool:
+        if account.sync_cursor_time_msc is None or not account.last_full_sync_at:
+            return True
+
+        interval = getattr(settings, "ACCOUNT_FULL_SYNC_INTERVAL", 24 * 60 * 60)
+        return (timezone.now() - account.last_full_sync_at).total_seconds() >= interval
+
+    @staticmethod
+    def fetch_new_trades(account: TradeAccount) -> tuple:
+        """
+        Fetches the deals after the sync cursor of the account, or its whole history
+        when a full reconcile is due. Returns (trades, full_sync), trades is None
+        when the terminal could not be reached.
+        """
+        full_sync = MetaTraderService.needs_full_sync(account)
+
+        if full_sync:
+            return MetaTraderService.fetch_trades_terminal(account.account_id), True
+
+        meta_trades = MetaTraderService.fetch_trades_terminal(
+            account.account_id, since=account.sync_cursor_time_msc
+        )
+        if meta_trades is None:
+            return None, False
 
-        # If there's nothing to iterate over, return None
-        if not meta_trades:
+        # Terminals that do not support since still send the full history
+        cursor = (account.sync_cursor_time_msc, account.sync_cursor_ticket or 0)
+        return [
+            trade
+            for trade in meta_trades
+            if MetaTraderService.get_deal_cursor(trade) > cursor
+        ], False
+
+    @staticmethod
+    def apply_new_trades(account: TradeAccount, meta_trades, full_sync: bool):
+        """
+        Writes the fetched trades and moves the sync cursor past them
+        """
+        if meta_trades is None:
             return
 
-        MetaTraderService.update_trades(meta_trades, account)
+        if meta_trades:
+            MetaTraderService.update_trades(meta_trades, account, full_sync=full_sync)
+
+        update_fields = []
+
+        if meta_trades:
+            time_msc, ticket = max(
+                MetaTraderService.get_deal_cursor(trade) for trade in meta_trades
+            )
+            if (time_msc, ticket) > (
+                account.sync_cursor_time_msc or 0,
+                account.sync_cursor_ticket or 0,
+            ):
+                account.sync_cursor_time_msc = time_msc
+                account.sync_cursor_ticket = ticket
+                update_fields += ["sync_cursor_time_msc", "sync_cursor_ticket"]
+
+        if full_sync:
+            account.last_full_sync_at = timezone.now()
+            update_fields.append("last_full_sync_at")
+
+        if update_fields:
+            account.save(update_fields=update_fields)
 
     @staticmethod
-    def update_trades(meta_trades, account, active=False):
+    def update_trades(meta_trades, account, active=False, bulk=None, full_sync=True):
+        from .account_service import AccountService
+        from .sync_telemetry import measure_sync
+        from .trade_changes import TradeChanges
+        from .trade_metrics import TradeMetricsService
+        from .trade_upsert import TradeUpsertService
+
+        with measure_sync("parse"):
+            # Deals after the sync cursor continue positions the earlier syncs wrote
+            known = (
+                None
+                if full_sync
+                else MetaTraderService.get_known_positions(account, meta_trades)
+            )
+
+            # Only the trades that differ from what the last sync wrote reach the database
+            rows = TradeUpsertService.get_changed_rows(
+                account, MetaTraderService.get_trade_rows(meta_trades, active, known)
+            )
+            if not rows:
+                return
+
+            # Gain, success, pips... are computed once here, analytics read the columns
+            rows = TradeMetricsService.add_derived_fields(account, rows)
+
+        with measure_sync("upsert"):
+            changes = TradeChanges(account, [exchange_id for exchange_id, _ in rows])
+
+            TradeUpsertService.write(account, rows, bulk=bulk)
+
+            AccountService.apply_trade_changes(changes.collect())
+
+    @staticmethod
+    def get_known_positions(account: TradeAccount, meta_trades) -> Dict[str, Dict]:
+        """
+        Returns the stored profit and volume of the positions that have exit deals
+        but no entry deal among the fetched deals, so they were opened, and maybe
+        partly closed, before the sync cursor
+        """
+        from ..models import ManualTrade
+
+        entered, exited = set(), set()
+        for trade in meta_trades:
+            if "entry" in trade:
+                (entered if trade["entry"] == 0 else exited).add(str(trade["position_id"]))
+
+        continued = exited - entered
+        if not continued:
+            return {}
+
+        return {
+            exchange_id: {"profit": profit, "volume": volume}
+            for exchange_id, profit, volume in ManualTrade.objects.filter(
+                account=account, exchange_id__in=continued
+            ).values_list("exchange_id", "profit", "volume")
+        }
+
+    @staticmethod
+    def get_trade_rows(meta_trades, active=False, known=None) -> list:
+        """
+        Folds the deals and orders of the terminal into one (exchange_id, values)
+        row per position, so every position is written once per sync
+        """
+        return list(MetaTraderService.get_positions(meta_trades, active, known).items())
+
+    @staticmethod
+    def get_positions(meta_trades, active=False, known=None) -> Dict[str, Dict]:
+        """
+        Folds the deals and orders of the terminal into position records keyed by
+        position_id, in the order the positions first appear.
+
+        The entry deal sets the open side of a position and its exit deals the close
+        side. A position closed in parts gets the profit of all its exit deals, the
+        time and price of the last one and the volume it was opened with. The
+        duration is computed when both times are known.
+
+        known holds the stored profit and volume of positions whose earlier deals
+        came with previous syncs, see get_known_positions. Their exits in this
+        batch are added to those.
+        """
         from django.utils.timezone import is_aware, make_aware
 
         def get_aware_datetime(date_str):
@@ -31,12 +188,23 @@ class MetaTraderService:
                 ret = make_aware(ret)
             return ret
 
+        positions = {}
+        entry_volumes = defaultdict(float)
+        exit_volumes = defaultdict(float)
+        exit_profits = defaultdict(float)
+        known_volumes = {}
+
+        for exchange_id, stored in (known or {}).items():
+            exit_profits[exchange_id] = stored["profit"] or 0.0
+            known_volumes[exchange_id] = stored["volume"]
+
         for trade in meta_trades:
+            exchange_id = str(trade["position_id"])
+            position = positions.setdefault(exchange_id, {})
+
             if trade["type"] == 2:
-                ManualTrade.objects.update_or_create(
-                    account=account,
-                    exchange_id=str(trade["position_id"]),
-                    defaults={
+                position.update(
+                    {
                         "profit": trade["profit"],
                         "gain": 0,
                         "open_time": get_aware_datetime(trade["time"]),
@@ -44,82 +212,104 @@ class MetaTraderService:
                         "is_top_up": True,
                         "active": active,
                         "volume": trade["volume"],
-                    },
+                    }
                 )
-                continue
-            else:
-                if "entry" in trade:
-                    trade_type = None
-
-                    if trade["type"] == 0:
-                        trade_type = TradeType.sell
-                    elif trade["type"] == 1:
-                        trade_type = TradeType.buy
-
-                    if trade["entry"] == 0:
-                        ManualTrade.objects.update_or_create(
-                            account=account,
-                            exchange_id=str(trade["position_id"]),
-                            defaults={
-                                "trade_type": trade_type,
-                                "symbol": trade["symbol"],
-                                "quantity": trade["volume"],
-                                "volume": trade["volume"],
-                                "open_price": trade["price"],
-                                "open_time": get_aware_datetime(trade["time_msc"]),
-                                "active": active,
-                            },
-                        )
-
-                    if trade["entry"] == 1:
-                        ManualTrade.objects.update_or_create(
-                            account=account,
-                            exchange_id=str(trade["position_id"]),
-                            defaults={
-                                "trade_type": trade_type,
-                                "symbol": trade["symbol"],
-                                "quantity": trade["volume"],
-                                "volume": trade["volume"],
-                                "close_price": trade["price"],
-                                "profit": trade["profit"],
-                                "gain": 0,
-                                "close_time": get_aware_datetime(trade["time_msc"]),
-                                "active": active,
-                            },
-                        )
-                else:
-                    trade_type = None
-
-                    if trade["type"] == 3:
-                        trade_type = TradeType.sell
-                    elif trade["type"] == 2:
-                        trade_type = TradeType.buy
-
-                    ManualTrade.objects.update_or_create(
-                        account=account,
-                        exchange_id=str(trade["position_id"]),
-                        defaults={
+            elif "entry" in trade:
+                trade_type = None
+
+                if trade["type"] == 0:
+                    trade_type = TradeType.sell
+                elif trade["type"] == 1:
+                    trade_type = TradeType.buy
+
+                if trade["entry"] == 0:
+                    entry_volumes[exchange_id] += trade["volume"]
+                    position.update(
+                        {
+                            "trade_type": trade_type,
+                            "symbol": trade["symbol"],
+                            "quantity": entry_volumes[exchange_id],
+                            "volume": entry_volumes[exchange_id],
+                            "open_price": trade["price"],
+                            "open_time": get_aware_datetime(trade["time_msc"]),
+                            "active": active,
+                        }
+                    )
+                    if trade.get("sl"):
+                        position["stop_loss"] = trade["sl"]
+
+                if trade["entry"] == 1:
+                    exit_volumes[exchange_id] += trade["volume"]
+                    exit_profits[exchange_id] += trade["profit"]
+                    # Positions opened before the fetched deals keep their stored volume,
+                    # or the volume of their exits
+                    volume = (
+                        entry_volumes.get(exchange_id)
+                        or known_volumes.get(exchange_id)
+                        or exit_volumes[exchange_id]
+                    )
+                    position.update(
+                        {
                             "trade_type": trade_type,
                             "symbol": trade["symbol"],
-                            "quantity": trade["volume_current"],
-                            "volume": trade["volume_current"],
-                            "open_price": trade["price_open"],
-                            "close_price": trade["price_stoplimit"],
-                            "profit": 0,
+                            "quantity": volume,
+                            "volume": volume,
+                            "close_price": trade["price"],
+                            "profit": exit_profits[exchange_id],
                             "gain": 0,
-                            "open_time": get_aware_datetime(trade["time_setup_msc"]),
-                            "close_time": get_aware_datetime(trade["time_done_msc"]),
+                            "close_time": get_aware_datetime(trade["time_msc"]),
                             "active": active,
-                        },
+                        }
                     )
+            else:
+                trade_type = None
+
+                if trade["type"] == 3:
+                    trade_type = TradeType.sell
+                elif trade["type"] == 2:
+                    trade_type = TradeType.buy
+
+                position.update(
+                    {
+                        "trade_type": trade_type,
+                        "symbol": trade["symbol"],
+                        "quantity": trade["volume_current"],
+                        "volume": trade["volume_current"],
+                        "open_price": trade["price_open"],
+                        "close_price": trade["price_stoplimit"],
+                        "profit": 0,
+                        "gain": 0,
+                        "open_time": get_aware_datetime(trade["time_setup_msc"]),
+                        "close_time": get_aware_datetime(trade["time_done_msc"]),
+                        "active": active,
+                    }
+                )
+                if trade.get("sl"):
+                    position["stop_loss"] = trade["sl"]
+
+        for position in positions.values():
+            if position.get("open_time") and position.get("close_time"):
+                position["duration_in_minutes"] = (
+                    position["close_time"] - position["open_time"]
+                ).total_seconds() / 60
+
+        # Deals of other kinds, like reversals, do not make a position on their own
+        return {
+            exchange_id: position for exchange_id, position in positions.items() if position
+        }
 
     @staticmethod
-    def fetch_trades_terminal(account_id: str):
+    def fetch_trades_terminal(account_id: str, since: int = None):
+        """
+        Fetches the deals and orders of an account, only those after the since
+        time_msc when given. Returns None when the terminal could not be reached.
+        """
         try:
-            base_url = settings.TERMINAL_SERVER_URL
-            response = requests.post(
-                base_url + "/api/mt5/get_trades/", json={"account_id": account_id}
-            )
+            payload = {"account_id": account_id}
+            if since is not None:
+                payload["since"] = since
+
+            response = get_terminal_client().post("/api/mt5/get_trades/", payload)
             if response.status_code == 200:
                 data = response.json()
                 orders = data["orders"]
@@ -128,17 +318,16 @@ class MetaTraderService:
                 print(
                     f"Error fetching trades for account {account_id}: {response.text}"
                 )
-                return []
+                return None
         except Exception as e:
             print(f"Error fetching trades for account {account_id}: {str(e)}")
-            return []
+            return None
 
     @staticmethod
     def authenticate_sync(server, username, password, platform) -> str:
-        base_url = settings.TERMINAL_SERVER_URL
-        response = requests.post(
-            base_url + "/api/mt5/connect/",
-            json={
+        response = get_terminal_client().post(
+            "/api/mt5/connect/",
+            {
                 "account": username,
                 "password": password,
                 "server": server,
@@ -0,0 +1,293 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict
+
+import numpy as np
+from django.db.models import QuerySet
+
+from ..models import TradeType
+from .drawdown import empty_drawdown
+from .statistics_engine import (
+    DAY_NAMES,
+    HOLD_TIME_TYPES,
+    SESSION_HOURS,
+    TradeStatisticsAccumulator,
+    calculate_day_statistics,
+    empty_statistics,
+    get_min_gain_threshold,
+    normalize_distribution,
+)
+
+SECONDS_PER_DAY = 86400
+
+NUMPY_STATISTICS_FIELDS = (
+    "profit",
+    "gain",
+    "quantity",
+    "trade_type",
+    "symbol",
+    "open_time",
+    "close_time",
+    "duration_in_minutes",
+    "success",
+    "account_id",
+)
+
+TRADE_TYPE_CODES = {TradeType.buy: 1, TradeType.sell: 2}
+
+
+def to_epoch(value):
+    return value.timestamp() if value else np.nan
+
+
+def factorize(values: np.ndarray):
+    """
+    Encodes values as integer codes, numbering the uniques in order of first appearance
+    """
+    uniques, first_index, inverse = np.unique(
+        values, return_index=True, return_inverse=True
+    )
+    order = np.argsort(first_index)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return uniques[order], rank[inverse.reshape(-1)]
+
+
+def grouped_sum(codes: np.ndarray, size: int, weights=None) -> np.ndarray:
+    return np.bincount(codes, weights=weights, minlength=size)
+
+
+class TradeColumns:
+    """
+    Trade rows loaded as one NumPy array per column
+    """
+
+    def __init__(self, rows):
+        columns = list(zip(*rows)) if rows else [()] * len(NUMPY_STATISTICS_FIELDS)
+        (
+            profit,
+            gain,
+            quantity,
+            trade_type,
+            symbol,
+            open_time,
+            close_time,
+            duration,
+            success,
+            account_id,
+        ) = columns
+
+        self.size = len(profit)
+        self.profit = np.array(profit, dtype=float)
+        self.gain = np.array(
+            [np.nan if value is None else float(value) for value in gain], dtype=float
+        )
+        self.quantity = np.array(quantity, dtype=float)
+        self.trade_type = np.array(
+            [TRADE_TYPE_CODES.get(value, 0) for value in trade_type], dtype=np.int8
+        )
+        self.symbol = np.array([value or "" for value in symbol], dtype=str)
+        self.open_epoch = np.array([to_epoch(value) for value in open_time], dtype=float)
+        self.close_epoch = np.array(
+            [to_epoch(value) for value in close_time], dtype=float
+        )
+        self.duration = np.array(duration, dtype=float)
+        self.success = np.array([value or "" for value in success], dtype=str)
+        self.account_id = np.array(
+            [-1 if value is None else value for value in account_id], dtype=np.int64
+        )
+
+        # Missing numbers count as zero, like in the row based calculation
+        np.nan_to_num(self.profit, copy=False)
+        np.nan_to_num(self.quantity, copy=False)
+        np.nan_to_num(self.duration, copy=False)
+
+    @classmethod
+    def from_queryset(cls, trades):
+        return cls(list(trades.values_list(*NUMPY_STATISTICS_FIELDS)))
+
+
+class NumpyStatisticsBackend:
+
+    @staticmethod
+    def calculate_statistics(trades, balance=0, days: bool = True) -> Dict:
+        # Lists of trades are not worth loading into columns, the python engine reads them
+        if not isinstance(trades, QuerySet):
+            return (
+                TradeStatisticsAccumulator(days=days)
+                .add_all(trades)
+                .result(balance=balance)
+            )
+
+        columns = TradeColumns.from_queryset(trades)
+
+        if not columns.size:
+            return empty_statistics(balance)
+
+        profit = columns.profit
+        total_trades = columns.size
+        threshold = get_min_gain_threshold()
+
+        # Win / loss
+        has_gain = ~np.isnan(columns.gain)
+        breakeven = has_gain & (np.abs(np.nan_to_num(columns.gain)) < threshold)
+        countable = has_gain & ~breakeven
+        wins = profit[countable & (profit > 0)]
+        losses = profit[countable & (profit < 0)]
+
+        winning_trades = wins.size
+        countable_trades = int(countable.sum())
+        total_won = float(wins.sum())
+        total_lost = abs(float(losses.sum()))
+        average_win = float(wins.mean()) if wins.size else 0
+        average_loss = float(losses.mean()) if losses.size else 0
+
+        win_rate = winning_trades / total_trades
+        loss_rate = (total_trades - winning_trades) / total_trades
+
+        timed = columns.duration[columns.duration > 0]
+
+        # Hold times
+        is_closed = ~np.isnan(columns.close_epoch)
+        is_opened = ~np.isnan(columns.open_epoch)
+        held = is_closed & is_opened
+        hold_seconds = np.where(held, columns.close_epoch - columns.open_epoch, 0)
+
+        def average_hold_time(mask, count):
+            return timedelta(seconds=float(hold_seconds[mask].sum()) / count if count else 0)
+
+        hold_times = {}
+        for success in HOLD_TIME_TYPES:
+            mask = columns.success == success
+            hold_times[success] = average_hold_time(mask, int(mask.sum()))
+
+        # Symbol performances
+        has_symbol = columns.symbol != ""
+        symbols, symbol_codes = factorize(columns.symbol[has_symbol])
+        symbol_count = len(symbols)
+        symbol_trades = grouped_sum(symbol_codes, symbol_count)
+        symbol_profit = grouped_sum(symbol_codes, symbol_count, profit[has_symbol])
+        symbol_invested = grouped_sum(
+            symbol_codes, symbol_count, columns.quantity[has_symbol]
+        )
+        symbol_breakeven = grouped_sum(
+            symbol_codes, symbol_count, breakeven[has_symbol].astype(float)
+        )
+        symbol_performances = [
+            {
+                "symbol": str(symbols[i]),
+                "total_trades": int(symbol_trades[i]),
+                "total_profit": float(symbol_profit[i]),
+                "total_invested": float(symbol_invested[i]),
+                "breakeven_trades": int(symbol_breakeven[i]),
+            }
+            for i in range(symbol_count)
+        ]
+
+        symbol_profit_values = profit[has_symbol]
+        breakeven_days = int(
+            ((symbol_profit_values >= -0.2) & (symbol_profit_values <= 0.2)).sum()
+        )
+
+        # Day performances, keyed by close day
+        day_performances = {}
+        if days:
+            close_day = np.floor(columns.close_epoch[is_closed] / SECONDS_PER_DAY)
+            close_profit = profit[is_closed]
+            day_numbers, day_codes = factorize(close_day.astype(np.int64))
+            day_count = len(day_numbers)
+            day_trades = grouped_sum(day_codes, day_count)
+            day_profit = grouped_sum(day_codes, day_count, close_profit)
+            day_won = grouped_sum(
+                day_codes, day_count, np.where(close_profit > 0, close_profit, 0)
+            )
+            day_lost = grouped_sum(
+                day_codes, day_count, np.where(close_profit > 0, 0, close_profit)
+            )
+            for i, day in enumerate(day_numbers.tolist()):
+                day_performances[date(1970, 1, 1) + timedelta(days=day)] = {
+                    "total_trades": int(day_trades[i]),
+                    "total_profit": float(day_profit[i]),
+                    "total_won": float(day_won[i]),
+                    "total_loss": float(day_lost[i]),
+                    "total_invested": float(day_profit[i]),
+                }
+        day_statistics = calculate_day_statistics(day_performances)
+
+        open_epoch = columns.open_epoch[is_opened].astype(np.int64)
+
+        # Day of week (1970-01-01 was a Thursday) and session distributions
+        weekdays = (np.floor(open_epoch / SECONDS_PER_DAY).astype(np.int64) + 3) % 7
+        day_counts = grouped_sum(weekdays, 7)
+        hours = (open_epoch % SECONDS_PER_DAY) // 3600
+        session_counts = {
+            session: int(((hours >= start) & (hours <= end)).sum())
+            for session, (start, end) in SESSION_HOURS.items()
+        }
+
+        return {
+            "overall_statistics": {
+                "long": int((columns.trade_type == TRADE_TYPE_CODES[TradeType.buy]).sum()),
+                "short": int((columns.trade_type == TRADE_TYPE_CODES[TradeType.sell]).sum()),
+                "balance": balance,
+                "total_trades": total_trades,
+                "total_profit": float(profit.sum()),
+                "total_invested": float(columns.quantity.sum()),
+                "win_rate": (
+                    (winning_trades / countable_trades * 100)
+                    if countable_trades > 0
+                    else 0
+                ),
+                "best_win": float(wins.max()) if wins.size else 0,
+                "worst_loss": float(losses.min()) if losses.size else 0,
+                "average_win": average_win,
+                "average_loss": average_loss,
+                "profit_factor": total_won / total_lost if total_lost != 0 else 0,
+                "total_won": total_won,
+                "total_lost": total_lost,
+                "average_holding_time_minutes": float(timed.mean()) if timed.size else 0,
+                "open_trades": int((~is_closed).sum()),
+                **day_statistics["overall_statistics"],
+                "breakeven_days": breakeven_days,
+                "total_commission": 0.0,
+                "total_swap": 0.0,
+                "total_fees": 0.0,
+                "trade_expectancy": win_rate * average_win - loss_rate * average_loss,
+                **empty_drawdown(),
+                "average_hold_time_all": average_hold_time(held, total_trades),
+                "average_hold_time_winning": hold_times["win"],
+                "average_hold_time_losing": hold_times["loss"],
+                "average_hold_time_scratch": hold_times["scratch"],
+                "breakeven_trades": int(breakeven.sum()),
+                "countable_trades": countable_trades,
+            },
+            "symbol_performances": symbol_performances,
+            "monthly_summary": day_statistics["monthly_summary"],
+            "day_of_week_analysis": normalize_distribution(
+                dict(zip(DAY_NAMES, day_counts.tolist()))
+            ),
+            "day_performances": day_statistics["day_performances"],
+            "session_analysis": normalize_distribution(session_counts),
+        }
+
+    @staticmethod
+    def calculate_account_totals(trades) -> Dict[int, tuple]:
+        """
+        Returns the trade count and total profit per account id
+        """
+        rows = list(trades.values_list("account_id", "profit"))
+        if not rows:
+            return {}
+
+        account_ids, profits = zip(*rows)
+        account_ids = np.array(account_ids, dtype=np.int64)
+        profits = np.nan_to_num(np.array(profits, dtype=float))
+
+        accounts, codes = factorize(account_ids)
+        counts = grouped_sum(codes, len(accounts))
+        totals = grouped_sum(codes, len(accounts), profits)
+
+        return {
+            int(account): (int(counts[i]), Decimal(float(totals[i])))
+            for i, account in enumerate(accounts)
+        }
@@ -0,0 +1,163 @@
+from datetime import UTC, datetime, timedelta
+from typing import Dict, Iterable
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from ..models import CustomUser, ManualTrade, TradeAccount
+
+# Seconds until the next refresh by how long ago the account last traded,
+# open positions count as trading now
+ACTIVITY_TTLS = (
+    (timedelta(hours=1), 10),
+    (timedelta(days=1), 60),
+    (timedelta(days=7), 5 * 60),
+)
+DORMANT_TTL = 15 * 60
+
+# Symbols that keep trading through the weekend
+ALWAYS_OPEN_SYMBOLS = ("BTC", "ETH", "LTC", "XRP", "SOL", "DOGE", "ADA", "BNB")
+
+# Hour of the forex weekend close on Friday and open on Sunday, in UTC
+MARKET_CLOSE_HOUR = 22
+
+
+# Seconds between writes of the last seen time of a user that stays online
+LAST_SEEN_WRITE_INTERVAL = 60
+
+
+def get_market_reopen(now: datetime):
+    """
+    Returns when the forex market opens again, None when it is open at now
+    """
+    now = now.astimezone(UTC)
+    weekday = now.weekday()
+
+    closed = (
+        weekday == 5
+        or (weekday == 4 and now.hour >= MARKET_CLOSE_HOUR)
+        or (weekday == 6 and now.hour < MARKET_CLOSE_HOUR)
+    )
+    if not closed:
+        return None
+
+    sunday = (now + timedelta(days=6 - weekday)).date()
+    return datetime(
+        sunday.year, sunday.month, sunday.day, MARKET_CLOSE_HOUR, tzinfo=UTC
+    )
+
+
+def trades_all_week(symbols: Iterable[str]) -> bool:
+    return any(
+        symbol and symbol.upper().startswith(ALWAYS_OPEN_SYMBOLS) for symbol in symbols
+    )
+
+
+class RefreshPolicy:
+    """
+    Decides how long a refreshed account stays cached, from how recently it traded,
+    whether its markets are open and whether its user is online.
+
+    Active accounts of online users keep the ACCOUNT_REFRESH_TTL_MIN floor, accounts
+    of offline users are refreshed ACCOUNT_REFRESH_OFFLINE_FACTOR times less often,
+    and over the weekend accounts that only trade forex are not refreshed until the
+    market opens. No account waits longer than ACCOUNT_REFRESH_TTL_MAX.
+    """
+
+    @staticmethod
+    def get_online_window() -> timedelta:
+        return timedelta(seconds=getattr(settings, "ACCOUNT_REFRESH_ONLINE_WINDOW", 5 * 60))
+
+    @staticmethod
+    def mark_user_seen(user) -> bool:
+        """
+        Records that the user is reading their data, returns True when the user
+        was offline until now.
+
+        The time is stored on the user so the refresh worker sees it too, and
+        written at most every LAST_SEEN_WRITE_INTERVAL seconds while the user
+        stays online.
+        """
+        now = timezone.now()
+        window = RefreshPolicy.get_online_window()
+        last_seen_at = user.last_seen_at
+
+        came_online = last_seen_at is None or now - last_seen_at >= window
+        interval = min(timedelta(seconds=LAST_SEEN_WRITE_INTERVAL), window / 2)
+        if came_online or now - last_seen_at >= interval:
+            CustomUser.objects.filter(id=user.id).update(last_seen_at=now)
+            user.last_seen_at = now
+        return came_online
+
+    @staticmethod
+    def is_user_online(user_id, now: datetime = None) -> bool:
+        now = now or timezone.now()
+        return CustomUser.objects.filter(
+            id=user_id, last_seen_at__gt=now - RefreshPolicy.get_online_window()
+        ).exists()
+
+    @staticmethod
+    def get_activity(account: TradeAccount, now: datetime) -> Dict:
+        activity = ManualTrade.objects.filter(account=account, is_top_up=False).aggregate(
+            last_open_time=Max("open_time"),
+            last_close_time=Max("close_time"),
+            open_positions=Count("id", filter=Q(close_time__isnull=True)),
+        )
+
+        # Symbols traded in the last month, to know which market hours apply
+        activity["symbols"] = set(
+            ManualTrade.objects.filter(
+                Q(open_time__gte=now - timedelta(days=30))
+                | Q(close_time__gte=now - timedelta(days=30)),
+                account=account,
+                is_top_up=False,
+            )
+            .order_by()
+            .values_list("symbol", flat=True)
+            .distinct()
+        )
+        return activity
+
+    @staticmethod
+    def get_activity_ttl(activity: Dict, now: datetime) -> float:
+        if activity["open_positions"]:
+            return ACTIVITY_TTLS[0][1]
+
+        last_traded_at = max(
+            (
+                time
+                for time in (activity["last_open_time"], activity["last_close_time"])
+                if time is not None
+            ),
+            default=None,
+        )
+        if last_traded_at is None:
+            return DORMANT_TTL
+
+        for age, ttl in ACTIVITY_TTLS:
+            if now - last_traded_at < age:
+                return ttl
+        return DORMANT_TTL
+
+    @staticmethod
+    def get_ttl(account: TradeAccount, now: datetime = None) -> float:
+        """
+        Returns the seconds until the account should be refreshed again
+        """
+        now = now or timezone.now()
+        floor = getattr(settings, "ACCOUNT_REFRESH_TTL_MIN", 10)
+        ceiling = getattr(settings, "ACCOUNT_REFRESH_TTL_MAX", 60 * 60)
+
+        activity = RefreshPolicy.get_activity(account, now)
+        ttl = RefreshPolicy.get_activity_ttl(activity, now)
+
+        if not RefreshPolicy.is_user_online(account.user_id, now):
+            ttl *= getattr(settings, "ACCOUNT_REFRESH_OFFLINE_FACTOR", 10)
+
+        reopen = get_market_reopen(now)
+        if reopen is not None and not trades_all_week(activity["symbols"]):
+            # Nothing moves until the market opens, deposits can wait as well
+            ttl = max(ttl, (reopen - now).total_seconds())
+
+        return min(max(ttl, floor), ceiling)
@@ -0,0 +1,117 @@
+import heapq
+import logging
+import time
+from collections import defaultdict
+from typing import List, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from ..models import TradeAccount
+
+logger = logging.getLogger(__name__)
+
+
+class AccountRefreshScheduler:
+    """
+    Refreshes the enabled accounts in the order their cache expires, using a
+    due-time queue over TradeAccount.cached_until. Due accounts of the same user
+    are fetched concurrently by AccountService.refresh_accounts.
+
+    Accounts are reloaded from the database every reload_interval seconds to
+    pick up new, removed and disabled accounts. Failed refreshes are retried
+    after retry_delay seconds.
+    """
+
+    def __init__(self, reload_interval: float = None, retry_delay: float = None):
+        self.reload_interval = (
+            reload_interval
+            if reload_interval is not None
+            else getattr(settings, "ACCOUNT_REFRESH_RELOAD_INTERVAL", 60)
+        )
+        self.retry_delay = (
+            retry_delay
+            if retry_delay is not None
+            else getattr(settings, "ACCOUNT_REFRESH_RETRY_DELAY", 30)
+        )
+
+        self.queue: List[Tuple[float, int]] = []
+        self.loaded_at = None
+        self.refreshed = 0
+        self.failed = 0
+
+    def load(self, now: float = None):
+        """
+        Rebuilds the queue from the accounts in the database
+        """
+        now = now if now is not None else time.time()
+        self.queue = [
+            (cached_until.timestamp() if cached_until else now, account_id)
+            for account_id, cached_until in TradeAccount.objects.filter(
+                disabled=False
+            ).values_list("id", "cached_until")
+        ]
+        heapq.heapify(self.queue)
+        self.loaded_at = now
+
+    def schedule(self, account_id: int, due: float):
+        heapq.heappush(self.queue, (due, account_id))
+
+    def next_due(self) -> float:
+        return self.queue[0][0] if self.queue else None
+
+    def run_pending(self, now: float = None) -> int:
+        """
+        Refreshes every account that is due, returns how many were refreshed
+        """
+        from .account_service import AccountService
+
+        now = now if now is not None else time.time()
+        if self.loaded_at is None or now - self.loaded_at >= self.reload_interval:
+            self.load(now)
+
+        due = []
+        while self.queue and self.queue[0][0] <= now:
+            due.append(heapq.heappop(self.queue)[1])
+
+        accounts_by_user = defaultdict(list)
+        for account in TradeAccount.objects.filter(id__in=due, disabled=False):
+            # Refreshed elsewhere in the meantime
+            if account.cached_until and account.cached_until.timestamp() > now:
+                self.schedule(account.id, account.cached_until.timestamp())
+                continue
+            accounts_by_user[account.user_id].append(account)
+
+        refreshed = 0
+        for accounts in accounts_by_user.values():
+            errors = AccountService.refresh_accounts(accounts)
+
+            for account in accounts:
+                if account.id in errors:
+                    logger.error(
+                        f"Failed to refresh account {account.id}: {errors[account.id]}"
+                    )
+                    self.failed += 1
+                    self.schedule(account.id, now + self.retry_delay)
+                else:
+                    refreshed += 1
+                    self.refreshed += 1
+                    self.schedule(account.id, account.cached_until.timestamp())
+
+        return refreshed
+
+    def run(self, max_sleep: float = 1.0, should_stop=lambda: False):
+        """
+        Runs until should_stop returns True, sleeping until the next account is due
+        """
+        while not should_stop():
+            close_old_connections()
+            self.run_pending()
+
+            next_due = self.next_due()
+            delay = max_sleep if next_due is None else next_due - time.time()
+            time.sleep(min(max(delay, 0), max_sleep))
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return getattr(settings, "ACCOUNT_REFRESH_MODE", "inline") == "background"
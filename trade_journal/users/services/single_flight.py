@@ -0,0 +1,66 @@
+import threading
+from typing import Dict, Hashable, Optional, Tuple
+
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Optional[Exception] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Lets one caller per key do the work while concurrent callers for the same key
+    wait for it and share its outcome.
+
+    claim() returns the flight of the key and whether the caller leads it. The
+    leader calls finish() when done, the others wait() for it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flights: Dict[Hashable, Flight] = {}
+        self.led = 0
+        self.joined = 0
+
+    def claim(self, key: Hashable) -> Tuple[Flight, bool]:
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self.joined += 1
+                return flight, False
+
+            flight = self.flights[key] = Flight()
+            self.led += 1
+            return flight, True
+
+    def finish(self, key: Hashable, flight: Flight, error: Exception = None):
+        with self.lock:
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+
+        flight.error = error
+        flight.done.set()
+
+    @staticmethod
+    def wait(flight: Flight, timeout: float = None) -> Optional[Exception]:
+        """
+        Waits for the leader to finish, returns its error
+        """
+        if not flight.done.wait(timeout):
+            return TimeoutError("Timed out waiting for the refresh in progress")
+        return flight.error
+
+    def get_metrics(self) -> Dict:
+        with self.lock:
+            return {
+                "in_flight": len(self.flights),
+                "led": self.led,
+                "joined": self.joined,
+            }
+
+
+# Refreshes of the accounts in this process, keyed by account id
+account_refreshes = SingleFlight()
@@ -0,0 +1,109 @@
+import logging
+from typing import Dict, List
+
+from django.db import transaction
+
+from ..models import AccountStatisticsSnapshot, ManualTrade, TradeAccount
+from .statistics_engine import STATISTICS_FIELDS, TradeStatisticsAccumulator
+from .trade_changes import TradeChanges
+
+logger = logging.getLogger(__name__)
+
+
+class StatisticsSnapshotService:
+
+    @staticmethod
+    def rebuild(account: TradeAccount) -> AccountStatisticsSnapshot:
+        """
+        Recomputes the snapshot of an account from all of its trades
+        """
+        trades = (
+            ManualTrade.objects.filter(account=account, is_top_up=False)
+            .order_by("-close_time")
+            .values_list(*STATISTICS_FIELDS, named=True)
+        )
+        accumulator = TradeStatisticsAccumulator().add_all(trades)
+
+        snapshot, _ = AccountStatisticsSnapshot.objects.update_or_create(
+            account=account,
+            defaults={
+                "state": accumulator.to_state(),
+                "trade_count": accumulator.total_trades,
+                "is_stale": False,
+            },
+        )
+        return snapshot
+
+    @staticmethod
+    def apply_changes(changes: TradeChanges):
+        """
+        Updates the snapshot of an account with the trades a sync created or modified
+        """
+        # Concurrent syncs of the account wait for the row, so none of their
+        # changes are merged into a state another one is about to overwrite
+        with transaction.atomic():
+            snapshot = (
+                AccountStatisticsSnapshot.objects.select_for_update()
+                .filter(account=changes.account)
+                .first()
+            )
+            if snapshot is None:
+                # Built from the trades on first read
+                return
+
+            if snapshot.is_stale:
+                return
+
+            accumulator = TradeStatisticsAccumulator.from_state(snapshot.state)
+            changed = False
+
+            for before, after in changes.changed():
+                if before and not before.is_top_up:
+                    accumulator.remove(before)
+                    changed = True
+                if after and not after.is_top_up:
+                    accumulator.add(after)
+                    changed = True
+
+            if not changed:
+                return
+
+            snapshot.state = accumulator.to_state()
+            snapshot.trade_count = accumulator.total_trades
+            snapshot.is_stale = accumulator.stale
+            snapshot.save(update_fields=["state", "trade_count", "is_stale", "updated_at"])
+
+    @staticmethod
+    def get_accumulators(accounts: List[TradeAccount]) -> Dict[int, TradeStatisticsAccumulator]:
+        """
+        Loads the snapshots of the accounts, building missing or stale ones
+        """
+        snapshots = {
+            snapshot.account_id: snapshot
+            for snapshot in AccountStatisticsSnapshot.objects.filter(account__in=accounts)
+        }
+
+        accumulators = {}
+        for account in accounts:
+            snapshot = snapshots.get(account.id)
+            if snapshot is None or snapshot.is_stale:
+                logger.info(f"Rebuilding statistics snapshot for account {account.id}")
+                snapshot = StatisticsSnapshotService.rebuild(account)
+            accumulators[account.id] = TradeStatisticsAccumulator.from_state(
+                snapshot.state
+            )
+
+        return accumulators
+
+    @staticmethod
+    def get_statistics(accounts: List[TradeAccount], balance=0) -> Dict:
+        """
+        Merges the snapshots of the accounts into the statistics payload
+        """
+        accumulator = TradeStatisticsAccumulator()
+        for account_accumulator in StatisticsSnapshotService.get_accumulators(
+            accounts
+        ).values():
+            accumulator.merge(account_accumulator)
+
+        return accumulator.result(balance=balance)
@@ -0,0 +1,142 @@
+import hashlib
+import time
+from typing import Callable, Dict
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# TradeAccount fields written on every refresh that do not change any result
+CACHE_ONLY_ACCOUNT_FIELDS = frozenset(
+    {
+        "cached_at",
+        "cached_until",
+        "updated_at",
+        "sync_cursor_time_msc",
+        "sync_cursor_ticket",
+        "last_full_sync_at",
+        "balance_reconciled_at",
+    }
+)
+
+COUNTER_NAMES = ("hits", "misses")
+
+CACHED_RESULTS = ("statistics", "balance_chart", "account_performance")
+
+
+def get_version_key(user_id) -> str:
+    return f"statistics_cache:version:{user_id}"
+
+
+def get_counter_key(counter: str, name: str) -> str:
+    return f"statistics_cache:{counter}:{name}"
+
+
+def is_shared_cache() -> bool:
+    """
+    Whether every process sees the same cache. The refresh worker and background
+    refreshes bump the versions, web workers would not see that in a cache kept
+    in the memory of each process.
+    """
+    return not isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+class StatisticsCache:
+    """
+    Caches the statistics, balance chart and account performance results of a user.
+
+    Entries are keyed on the user, the call arguments and a per user data version
+    that is bumped whenever a trade or account of the user is written, so stale
+    entries are never read and simply expire. Results are only cached in a cache
+    shared by all processes, unless STATISTICS_CACHE_ALLOW_LOCAL is set.
+    """
+
+    @staticmethod
+    def is_enabled() -> bool:
+        if not getattr(settings, "STATISTICS_CACHE_TIMEOUT", 5 * 60):
+            return False
+        return StatisticsCache.has_shared_versions()
+
+    @staticmethod
+    def has_shared_versions() -> bool:
+        """
+        Whether the data versions seen by this process include the bumps of the
+        other processes, which entries keyed on them rely on
+        """
+        return is_shared_cache() or getattr(settings, "STATISTICS_CACHE_ALLOW_LOCAL", False)
+
+    @staticmethod
+    def get_version(user_id) -> int:
+        key = get_version_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            # Start from the clock so a lost version never reuses an old one
+            cache.add(key, time.time_ns(), None)
+            version = cache.get(key)
+        return version
+
+    @staticmethod
+    def bump_version(user_id):
+        if user_id is None:
+            return
+
+        key = get_version_key(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+    @staticmethod
+    def get_key(name: str, user_id, arguments: tuple) -> str:
+        digest = hashlib.md5(repr(arguments).encode()).hexdigest()
+        version = StatisticsCache.get_version(user_id)
+        return f"statistics_cache:{name}:{user_id}:{version}:{digest}"
+
+    @staticmethod
+    def get_or_compute(name: str, user, arguments: tuple, compute: Callable):
+        """
+        Returns the cached result for the arguments, or computes and stores it
+        """
+        if not StatisticsCache.is_enabled():
+            return compute()
+        timeout = getattr(settings, "STATISTICS_CACHE_TIMEOUT", 5 * 60)
+
+        key = StatisticsCache.get_key(name, user.id, arguments)
+        result = cache.get(key)
+
+        if result is not None:
+            StatisticsCache.count("hits", name)
+            return result
+
+        StatisticsCache.count("misses", name)
+        result = compute()
+        cache.set(key, result, timeout)
+        return result
+
+    @staticmethod
+    def count(counter: str, name: str):
+        key = get_counter_key(counter, name)
+        if not cache.add(key, 1, None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, None)
+
+    @staticmethod
+    def get_counters(names=CACHED_RESULTS) -> Dict[str, Dict[str, int]]:
+        """
+        Returns the hit and miss counts per cached result
+        """
+        keys = {
+            get_counter_key(counter, name): (name, counter)
+            for name in names
+            for counter in COUNTER_NAMES
+        }
+        values = cache.get_many(keys)
+
+        counters = {name: dict.fromkeys(COUNTER_NAMES, 0) for name in names}
+        for key, value in values.items():
+            name, counter = keys[key]
+            counters[name][counter] = value
+        return counters
@@ -0,0 +1,559 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable
+
+from django.conf import settings
+
+from ..models import TradeType
+from .drawdown import empty_drawdown
+
+# Columns needed to compute the statistics payload, loaded with values_list
+STATISTICS_FIELDS = (
+    "profit",
+    "gain",
+    "quantity",
+    "trade_type",
+    "symbol",
+    "open_time",
+    "close_time",
+    "duration_in_minutes",
+    "success",
+)
+
+DAY_NAMES = (
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+)
+
+# Inclusive open-hour ranges of the trading sessions
+SESSION_HOURS = {
+    "london": (7, 13),
+    "new-york": (13, 22),
+    "asia": (0, 6),
+    "pacific": (23, 0),
+}
+
+# Sessions an open hour falls into, precomputed so each trade is a single lookup
+SESSIONS_BY_HOUR = tuple(
+    tuple(
+        session
+        for session, (start, end) in SESSION_HOURS.items()
+        if start <= hour <= end
+    )
+    for hour in range(24)
+)
+
+HOLD_TIME_TYPES = ("win", "loss", "scratch")
+
+
+def get_min_gain_threshold() -> float:
+    return getattr(settings, "TRADE_MIN_GAIN_THRESHOLD", 0.002)  # Default to 0.2%
+
+
+def normalize_distribution(counts: Dict[str, int]) -> Dict:
+    """
+    Normalizes counts to a 0-1 scale where the most frequent key is 1.0
+    """
+    max_count = max(counts.values()) if counts else 0
+
+    return {
+        "distribution": {
+            key: count / max_count if max_count > 0 else 0
+            for key, count in counts.items()
+        },
+        "raw_counts": counts,
+        "total_trades": sum(counts.values()),
+    }
+
+
+def empty_statistics(balance=0) -> Dict:
+    return {
+        "overall_statistics": {
+            "balance": balance,
+            "total_trades": 0,
+            "total_profit": 0,
+            "total_invested": 0,
+            "win_rate": 0,
+            "long": 0,
+            "short": 0,
+            "best_win": 0,
+            "worst_loss": 0,
+            "average_win": 0,
+            "average_loss": 0,
+            "profit_factor": 0,
+            "total_won": 0,
+            "total_lost": 0,
+            "average_holding_time_minutes": 0,
+            "open_trades": 0,
+            "total_trading_days": 0,
+            "winning_days": 0,
+            "losing_days": 0,
+            "breakeven_days": 0,
+            "logged_days": 0,
+            "max_consecutive_winning_days": 0,
+            "max_consecutive_losing_days": 0,
+            "average_daily_pnl": 0.0,
+            "largest_profitable_day": 0.0,
+            "largest_losing_day": 0.0,
+            "trade_expectancy": 0,
+            **empty_drawdown(),
+            "average_hold_time_all": timedelta(0),
+            "average_hold_time_winning": timedelta(0),
+            "average_hold_time_losing": timedelta(0),
+            "average_hold_time_scratch": timedelta(0),
+            "breakeven_trades": 0,
+            "countable_trades": 0,
+        },
+        "day_performances": {},
+        "symbol_performances": [],
+        "monthly_summary": [],
+    }
+
+
+def calculate_deltas(current: Dict, previous: Dict) -> Dict:
+    """
+    Returns current minus previous for the numeric and duration values of two
+    overall statistics
+    """
+    deltas = {}
+    for key, value in current.items():
+        other = previous.get(key)
+        if isinstance(value, bool) or other is None:
+            continue
+        if isinstance(value, (int, float, Decimal, timedelta)):
+            try:
+                deltas[key] = value - other
+            except TypeError:
+                deltas[key] = float(value) - float(other)
+    return deltas
+
+
+def calculate_streaks(daily_pnl: Dict) -> tuple:
+    """
+    Returns the longest winning and losing streaks over consecutive trading days
+    """
+    current_streak = 0
+    max_winning_streak = 0
+    max_losing_streak = 0
+
+    for day in sorted(daily_pnl):
+        pnl = daily_pnl[day]
+        if pnl > 0:
+            current_streak = current_streak + 1 if current_streak >= 0 else 1
+            max_winning_streak = max(max_winning_streak, current_streak)
+        elif pnl < 0:
+            current_streak = current_streak - 1 if current_streak <= 0 else -1
+            max_losing_streak = max(max_losing_streak, abs(current_streak))
+        else:
+            current_streak = 0
+
+    return max_winning_streak, max_losing_streak
+
+
+def calculate_day_statistics(day_performances: Dict[date, Dict]) -> Dict:
+    """
+    Builds the day based parts of the statistics payload from the closed trades
+    per close day, which is also how the DailyAccountPnl rollup groups them.
+    Months are those of the days, in the order the days are given.
+    """
+    daily_pnl = {day: values["total_profit"] for day, values in day_performances.items()}
+    total_trading_days = len(daily_pnl)
+    max_winning_streak, max_losing_streak = calculate_streaks(daily_pnl)
+
+    monthly_summary = {}
+    for day, values in day_performances.items():
+        month_key = day.strftime("%Y-%m")
+        month = monthly_summary.get(month_key)
+        if month is None:
+            month = monthly_summary[month_key] = {
+                "month": month_key,
+                "total_trades": 0,
+                "total_profit": 0,
+                "total_invested": 0,
+            }
+        month["total_trades"] += values["total_trades"]
+        month["total_profit"] += values["total_profit"]
+        month["total_invested"] += values["total_profit"]
+
+    return {
+        "overall_statistics": {
+            "total_trading_days": total_trading_days,
+            "winning_days": sum(1 for pnl in daily_pnl.values() if pnl > 0),
+            "losing_days": sum(1 for pnl in daily_pnl.values() if pnl < 0),
+            "logged_days": total_trading_days,
+            "max_consecutive_winning_days": max_winning_streak,
+            "max_consecutive_losing_days": max_losing_streak,
+            "average_daily_pnl": (
+                sum(daily_pnl.values()) / total_trading_days
+                if total_trading_days > 0
+                else 0.0
+            ),
+            "largest_profitable_day": max(daily_pnl.values(), default=0.0),
+            "largest_losing_day": min(daily_pnl.values(), default=0.0),
+        },
+        "day_performances": {
+            day.strftime("%Y-%m-%d"): {"day": day.strftime("%Y-%m-%d"), **values}
+            for day, values in day_performances.items()
+        },
+        "monthly_summary": list(monthly_summary.values()),
+    }
+
+
+def add_bucket(buckets: Dict, key, values: Dict):
+    bucket = buckets.get(key)
+    if bucket is None:
+        buckets[key] = dict(values)
+        return
+    for field, value in values.items():
+        bucket[field] += value
+
+
+def subtract_bucket(buckets: Dict, key, values: Dict):
+    bucket = buckets.get(key)
+    if bucket is None:
+        return
+    for field, value in values.items():
+        bucket[field] -= value
+    if bucket["total_trades"] <= 0:
+        del buckets[key]
+
+
+class TradeStatisticsAccumulator:
+    """
+    Builds the statistics payload in a single pass over trade rows.
+
+    Rows can be ManualTrade instances or named rows from
+    `values_list(*STATISTICS_FIELDS, named=True)`, they are only read by attribute.
+    Accumulators can be merged, stored with `to_state` and have rows removed again;
+    removing a row that held an extreme value (best win, worst loss) marks the
+    accumulator as stale since those can only be rebuilt from the trades.
+
+    Day based values are grouped by the day a trade was closed. With days=False
+    they are left out, for callers that read them from the daily rollup.
+
+    Drawdown depends on the order of the whole equity curve including deposits,
+    it is left empty here and filled in by the EquityCurveService.
+    """
+
+    def __init__(self, days: bool = True):
+        self.min_gain_threshold = get_min_gain_threshold()
+        self.days = days
+        self.stale = False
+
+        self.total_trades = 0
+        self.open_trades = 0
+        self.total_profit = 0
+        self.total_invested = 0
+        self.long = 0
+        self.short = 0
+
+        self.breakeven_trades = 0
+        self.countable_trades = 0
+        self.winning_trades = 0
+        self.losing_trades = 0
+        self.total_won = 0
+        self.total_lost = 0
+        self.best_win = None
+        self.worst_loss = None
+
+        self.timed_trades = 0
+        self.timed_minutes = 0
+
+        self.hold_seconds = 0.0
+        self.hold_seconds_by_type = {key: 0.0 for key in HOLD_TIME_TYPES}
+        self.hold_count_by_type = {key: 0 for key in HOLD_TIME_TYPES}
+
+        self.symbol_stats = {}
+        self.breakeven_days = 0
+
+        # Close day -> totals of the trades closed on it
+        self.day_performances = {}
+
+        self.day_counts = [0] * 7
+        self.session_counts = {session: 0 for session in SESSION_HOURS}
+
+    def add_all(self, rows: Iterable):
+        for row in rows:
+            self.add(row)
+        return self
+
+    def add(self, row):
+        profit = self._apply(row, 1)
+
+        if self.best_win is None or profit > self.best_win:
+            if self._is_countable(row) and profit > 0:
+                self.best_win = profit
+        if self.worst_loss is None or profit < self.worst_loss:
+            if self._is_countable(row) and profit < 0:
+                self.worst_loss = profit
+
+    def remove(self, row):
+        profit = self._apply(row, -1)
+
+        if profit in (self.best_win, self.worst_loss):
+            self.stale = True
+
+    def _is_countable(self, row) -> bool:
+        return (
+            row.gain is not None
+            and abs(float(row.gain)) >= self.min_gain_threshold
+        )
+
+    def _apply(self, row, sign: int):
+        profit = row.profit or 0.0
+        signed_profit = sign * profit
+        quantity = sign * (row.quantity or 0)
+        open_time = row.open_time
+        close_time = row.close_time
+
+        self.total_trades += sign
+        self.total_profit += signed_profit
+        self.total_invested += quantity
+
+        if close_time is None:
+            self.open_trades += sign
+
+        if row.trade_type == TradeType.buy:
+            self.long += sign
+        elif row.trade_type == TradeType.sell:
+            self.short += sign
+
+        # Breakeven trades are left out of the win/loss statistics
+        breakeven = False
+        if row.gain is not None:
+            if abs(float(row.gain)) < self.min_gain_threshold:
+                breakeven = True
+                self.breakeven_trades += sign
+            else:
+                self.countable_trades += sign
+                if profit > 0:
+                    self.winning_trades += sign
+                    self.total_won += signed_profit
+                elif profit < 0:
+                    self.losing_trades += sign
+                    self.total_lost += signed_profit
+
+        if row.duration_in_minutes and row.duration_in_minutes > 0:
+            self.timed_trades += sign
+            self.timed_minutes += sign * row.duration_in_minutes
+
+        # Hold times
+        success = row.success
+        if success in self.hold_count_by_type:
+            self.hold_count_by_type[success] += sign
+        if open_time and close_time:
+            seconds = sign * (close_time - open_time).total_seconds()
+            self.hold_seconds += seconds
+            if success in self.hold_seconds_by_type:
+                self.hold_seconds_by_type[success] += seconds
+
+        update_bucket = add_bucket if sign > 0 else subtract_bucket
+
+        # Symbol performances
+        symbol = row.symbol
+        if symbol:
+            update_bucket(
+                self.symbol_stats,
+                symbol,
+                {
+                    "total_trades": 1,
+                    "total_profit": profit,
+                    "total_invested": row.quantity or 0,
+                    "breakeven_trades": 1 if breakeven else 0,
+                },
+            )
+
+            if -0.2 <= profit <= 0.2:
+                self.breakeven_days += sign
+
+        # Day performance
+        if close_time and self.days:
+            update_bucket(
+                self.day_performances,
+                close_time.date(),
+                {
+                    "total_trades": 1,
+                    "total_profit": profit,
+                    "total_won": profit if profit > 0 else 0,
+                    "total_loss": profit if profit <= 0 else 0,
+                    "total_invested": profit,
+                },
+            )
+
+        if open_time:
+            # Day of week and session distributions
+            self.day_counts[open_time.weekday()] += sign
+            for session in SESSIONS_BY_HOUR[open_time.hour]:
+                self.session_counts[session] += sign
+
+        return profit
+
+    def merge(self, other: "TradeStatisticsAccumulator"):
+        """
+        Adds the trades of another accumulator to this one
+        """
+        self.stale = self.stale or other.stale
+
+        for field in (
+            "total_trades",
+            "open_trades",
+            "total_profit",
+            "total_invested",
+            "long",
+            "short",
+            "breakeven_trades",
+            "countable_trades",
+            "winning_trades",
+            "losing_trades",
+            "total_won",
+            "total_lost",
+            "timed_trades",
+            "timed_minutes",
+            "hold_seconds",
+            "breakeven_days",
+        ):
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+
+        for success in HOLD_TIME_TYPES:
+            self.hold_seconds_by_type[success] += other.hold_seconds_by_type[success]
+            self.hold_count_by_type[success] += other.hold_count_by_type[success]
+
+        if other.best_win is not None:
+            self.best_win = max(self.best_win or other.best_win, other.best_win)
+        if other.worst_loss is not None:
+            self.worst_loss = min(self.worst_loss or other.worst_loss, other.worst_loss)
+
+        for buckets, other_buckets in (
+            (self.symbol_stats, other.symbol_stats),
+            (self.day_performances, other.day_performances),
+        ):
+            for key, values in other_buckets.items():
+                add_bucket(buckets, key, values)
+
+        self.day_counts = [a + b for a, b in zip(self.day_counts, other.day_counts)]
+        for session, count in other.session_counts.items():
+            self.session_counts[session] += count
+
+        return self
+
+    def to_state(self) -> Dict:
+        """
+        Returns the accumulated values as JSON serializable data
+        """
+        state = {
+            key: value
+            for key, value in self.__dict__.items()
+            if key not in ("min_gain_threshold", "days", "day_performances")
+        }
+        state["day_performances"] = {
+            day.isoformat(): values for day, values in self.day_performances.items()
+        }
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "TradeStatisticsAccumulator":
+        accumulator = cls()
+        for key, value in state.items():
+            # Snapshots can hold fields that are no longer accumulated
+            if key != "day_performances" and hasattr(accumulator, key):
+                setattr(accumulator, key, value)
+
+        accumulator.day_performances = {
+            date.fromisoformat(day): values
+            for day, values in state.get("day_performances", {}).items()
+        }
+        return accumulator
+
+    def get_symbol_performances(self) -> list:
+        return [
+            {"symbol": symbol, **values} for symbol, values in self.symbol_stats.items()
+        ]
+
+    def get_day_of_week_analysis(self) -> Dict:
+        return normalize_distribution(dict(zip(DAY_NAMES, self.day_counts)))
+
+    def get_session_analysis(self) -> Dict:
+        return normalize_distribution(dict(self.session_counts))
+
+    def result(self, balance=0) -> Dict:
+        if not self.total_trades:
+            return empty_statistics(balance)
+
+        total_trades = self.total_trades
+        countable_trades = self.countable_trades
+        winning_trades = self.winning_trades
+
+        average_win = self.total_won / winning_trades if winning_trades else 0
+        average_loss = (
+            self.total_lost / self.losing_trades if self.losing_trades else 0
+        )
+        total_lost = abs(self.total_lost)
+        profit_factor = self.total_won / total_lost if total_lost != 0 else 0
+
+        win_rate = winning_trades / total_trades
+        loss_rate = (total_trades - winning_trades) / total_trades
+        trade_expectancy = win_rate * average_win - loss_rate * average_loss
+
+        day_statistics = calculate_day_statistics(self.day_performances)
+
+        def average_hold_time(seconds, count):
+            return timedelta(seconds=seconds / count if count else 0)
+
+        return {
+            "overall_statistics": {
+                "long": self.long,
+                "short": self.short,
+                "balance": balance,
+                "total_trades": total_trades,
+                "total_profit": self.total_profit,
+                "total_invested": self.total_invested,
+                "win_rate": (
+                    (winning_trades / countable_trades * 100)
+                    if countable_trades > 0
+                    else 0
+                ),
+                "best_win": self.best_win or 0,
+                "worst_loss": self.worst_loss or 0,
+                "average_win": average_win,
+                "average_loss": average_loss,
+                "profit_factor": profit_factor,
+                "total_won": self.total_won,
+                "total_lost": total_lost,
+                "average_holding_time_minutes": (
+                    self.timed_minutes / self.timed_trades if self.timed_trades else 0
+                ),
+                "open_trades": self.open_trades,
+                **day_statistics["overall_statistics"],
+                "breakeven_days": self.breakeven_days,
+                "total_commission": 0.0,
+                "total_swap": 0.0,
+                "total_fees": 0.0,
+                "trade_expectancy": trade_expectancy,
+                **empty_drawdown(),
+                "average_hold_time_all": average_hold_time(
+                    self.hold_seconds, total_trades
+                ),
+                "average_hold_time_winning": average_hold_time(
+                    self.hold_seconds_by_type["win"], self.hold_count_by_type["win"]
+                ),
+                "average_hold_time_losing": average_hold_time(
+                    self.hold_seconds_by_type["loss"], self.hold_count_by_type["loss"]
+                ),
+                "average_hold_time_scratch": average_hold_time(
+                    self.hold_seconds_by_type["scratch"],
+                    self.hold_count_by_type["scratch"],
+                ),
+                "breakeven_trades": self.breakeven_trades,
+                "countable_trades": countable_trades,
+            },
+            "symbol_performances": self.get_symbol_performances(),
+            "monthly_summary": day_statistics["monthly_summary"],
+            "day_of_week_analysis": self.get_day_of_week_analysis(),
+            "day_performances": day_statistics["day_performances"],
+            "session_analysis": self.get_session_analysis(),
+        }
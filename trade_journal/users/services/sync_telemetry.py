@@ -0,0 +1,276 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db.models import Avg, Count, F, Max, Q, Sum
+from django.utils import timezone
+
+from ..models import AccountSyncLog, Platform, TradeAccount
+from .statistics_cache import StatisticsCache, is_shared_cache
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("fetch", "parse", "upsert")
+
+# Upper bounds in seconds of the histogram buckets, the last one takes the rest
+HISTOGRAM_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+HISTOGRAM_FIELDS = ("fetch_seconds", "total_seconds")
+
+_local = threading.local()
+
+
+def get_payload_size(trades) -> int:
+    # MetaTrader fetches come with whether they were full syncs
+    if isinstance(trades, tuple):
+        trades = trades[0]
+    return len(trades) if trades else 0
+
+
+def get_current_sync_record() -> Optional["SyncRecord"]:
+    """
+    Returns the record of the sync this thread is writing, if any
+    """
+    return getattr(_local, "record", None)
+
+
+@contextmanager
+def measure_sync(phase: str):
+    """
+    Adds the time spent in the block to a phase of the current sync, does
+    nothing outside of a recorded sync
+    """
+    record = get_current_sync_record()
+    if record is None:
+        yield
+        return
+
+    with record.measure(phase):
+        yield
+
+
+class SyncRecord:
+    """
+    Collects the timings and row counts of one refresh of an account.
+
+    fetch() can run in a worker thread. Entering the record makes it the current
+    record of the thread that writes the trades, leaving it stores the log entry
+    along with the error the refresh failed with.
+    """
+
+    def __init__(self, account: TradeAccount):
+        self.account = account
+        self.started_at = timezone.now()
+        self.started = time.perf_counter()
+        self.lag_seconds = (
+            (self.started_at - account.cached_at).total_seconds()
+            if account.cached_at
+            else None
+        )
+
+        self.seconds = {phase: 0.0 for phase in PHASES}
+        self.payload_size = 0
+        self.rows_inserted = 0
+        self.rows_updated = 0
+        self.rows_unchanged = 0
+
+    @contextmanager
+    def measure(self, phase: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[phase] += time.perf_counter() - started
+
+    def fetch(self, fetch_trades):
+        with self.measure("fetch"):
+            trades = fetch_trades(self.account)
+        self.payload_size = get_payload_size(trades)
+        return trades
+
+    def add_rows(self, inserted: int, updated: int, unchanged: int):
+        self.rows_inserted += inserted
+        self.rows_updated += updated
+        self.rows_unchanged += unchanged
+
+    def __enter__(self):
+        _local.record = self
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        _local.record = None
+        SyncTelemetry.save(self, exc)
+        return False
+
+
+class SyncTelemetry:
+
+    @staticmethod
+    def get_log_size() -> int:
+        return getattr(settings, "ACCOUNT_SYNC_LOG_SIZE", 50)
+
+    @staticmethod
+    def save(record: SyncRecord, error: Exception = None):
+        """
+        Stores the log entry of a sync and drops the oldest entries of the
+        account beyond ACCOUNT_SYNC_LOG_SIZE. Failures are only logged, they
+        never fail the refresh.
+        """
+        size = SyncTelemetry.get_log_size()
+        if size <= 0:
+            return
+
+        try:
+            AccountSyncLog.objects.create(
+                account_id=record.account.id,
+                platform=record.account.platform,
+                started_at=record.started_at,
+                fetch_seconds=record.seconds["fetch"],
+                parse_seconds=record.seconds["parse"],
+                upsert_seconds=record.seconds["upsert"],
+                total_seconds=time.perf_counter() - record.started,
+                payload_size=record.payload_size,
+                rows_inserted=record.rows_inserted,
+                rows_updated=record.rows_updated,
+                rows_unchanged=record.rows_unchanged,
+                lag_seconds=record.lag_seconds,
+                error=str(error)[:255] if error is not None else "",
+            )
+
+            # Ring buffer, the newest entry past the size marks where to cut
+            cutoff = (
+                AccountSyncLog.objects.filter(account_id=record.account.id)
+                .order_by("-id")
+                .values_list("id", flat=True)[size:size + 1]
+                .first()
+            )
+            if cutoff is not None:
+                AccountSyncLog.objects.filter(
+                    account_id=record.account.id, id__lte=cutoff
+                ).delete()
+        except Exception as e:
+            logger.error(f"Failed to store the sync log of account {record.account.id}: {e}")
+
+    @staticmethod
+    def get_histograms(logs) -> Dict:
+        """
+        Cumulative counts of the syncs that took at most each bucket's seconds,
+        in one aggregate query
+        """
+        aggregates = {}
+        for field in HISTOGRAM_FIELDS:
+            for bucket in HISTOGRAM_BUCKETS:
+                aggregates[f"{field}:{bucket}"] = Count(
+                    "id", filter=Q(**{f"{field}__lte": bucket})
+                )
+        counts = logs.aggregate(total=Count("id"), **aggregates)
+
+        return {
+            field: {
+                **{
+                    str(bucket): counts[f"{field}:{bucket}"]
+                    for bucket in HISTOGRAM_BUCKETS
+                },
+                "+Inf": counts["total"],
+            }
+            for field in HISTOGRAM_FIELDS
+        }
+
+    @staticmethod
+    def get_platforms(logs) -> Dict:
+        platforms = {}
+        for row in logs.values("platform").annotate(
+            syncs=Count("id"),
+            errors=Count("id", filter=~Q(error="")),
+            average_fetch_seconds=Avg("fetch_seconds"),
+            average_parse_seconds=Avg("parse_seconds"),
+            average_upsert_seconds=Avg("upsert_seconds"),
+            average_total_seconds=Avg("total_seconds"),
+            max_total_seconds=Max("total_seconds"),
+            average_payload_size=Avg("payload_size"),
+            rows_inserted=Sum("rows_inserted"),
+            rows_updated=Sum("rows_updated"),
+            rows_unchanged=Sum("rows_unchanged"),
+            average_lag_seconds=Avg("lag_seconds"),
+        ).order_by("platform"):
+            platform = row.pop("platform")
+            row["histograms"] = SyncTelemetry.get_histograms(
+                logs.filter(platform=platform)
+            )
+            platforms[platform] = row
+        return platforms
+
+    @staticmethod
+    def get_process_metrics() -> Dict:
+        """
+        Counters of the connection pools and refresh coalescing of this process
+        """
+        from .c_trader_sessions import get_c_trader_sessions
+        from .single_flight import account_refreshes
+        from .terminal_client import get_terminal_client
+
+        return {
+            "terminal_client": get_terminal_client().get_metrics(),
+            "c_trader_sessions": get_c_trader_sessions().get_metrics(),
+            "account_refreshes": account_refreshes.get_metrics(),
+        }
+
+    @staticmethod
+    def get_statistics_cache_metrics() -> Dict:
+        """
+        Whether results are cached and the hit and miss counts per cached result,
+        which are kept in the shared cache
+        """
+        return {
+            "enabled": StatisticsCache.is_enabled(),
+            "shared": is_shared_cache(),
+            "counters": StatisticsCache.get_counters(),
+        }
+
+    @staticmethod
+    def get_report(hours: float = 24, limit: int = 10) -> Dict:
+        """
+        Aggregates the sync logs of the last hours per platform, and lists the
+        slowest accounts, the accounts whose syncs change the most rows and the
+        enabled accounts that were refreshed the longest time ago, along with
+        the statistics cache counters
+        """
+        now = timezone.now()
+        logs = AccountSyncLog.objects.filter(started_at__gte=now - timedelta(hours=hours))
+
+        accounts = logs.values("account_id", "platform").annotate(
+            syncs=Count("id"),
+            errors=Count("id", filter=~Q(error="")),
+            average_total_seconds=Avg("total_seconds"),
+            max_total_seconds=Max("total_seconds"),
+            rows_changed=Sum(F("rows_inserted") + F("rows_updated")),
+        )
+
+        stale_accounts = [
+            {
+                "account_id": account.id,
+                "platform": account.platform,
+                "cached_at": account.cached_at,
+                "lag_seconds": (
+                    (now - account.cached_at).total_seconds()
+                    if account.cached_at
+                    else None
+                ),
+            }
+            for account in TradeAccount.objects.filter(disabled=False)
+            .exclude(platform=Platform.manual)
+            .order_by(F("cached_at").asc(nulls_first=True))[:limit]
+        ]
+
+        return {
+            "since": now - timedelta(hours=hours),
+            "platforms": SyncTelemetry.get_platforms(logs),
+            "slowest_accounts": list(accounts.order_by("-average_total_seconds")[:limit]),
+            "hot_accounts": list(accounts.order_by("-rows_changed")[:limit]),
+            "stale_accounts": stale_accounts,
+            "process": SyncTelemetry.get_process_metrics(),
+            "statistics_cache": SyncTelemetry.get_statistics_cache_metrics(),
+        }
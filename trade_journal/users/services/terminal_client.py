@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+from typing import Dict
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Gateway errors of the terminal server, the request never reached a terminal
+RETRY_STATUSES = (502, 503, 504)
+
+
+class TerminalClient:
+    """
+    Connection pooled HTTP client for the terminal server, so refreshes reuse
+    keep-alive connections instead of paying a TCP and TLS handshake per call.
+
+    Every request has a connect and a read timeout, and connection errors and
+    gateway errors are retried a bounded number of times with exponential backoff.
+    Use get_terminal_client() to get the client of the current process.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = None,
+        connect_timeout: float = None,
+        read_timeout: float = None,
+        max_retries: int = None,
+        retry_backoff: float = None,
+    ):
+        self.pool_size = (
+            pool_size
+            if pool_size is not None
+            else getattr(settings, "TERMINAL_POOL_SIZE", 10)
+        )
+        self.connect_timeout = (
+            connect_timeout
+            if connect_timeout is not None
+            else getattr(settings, "TERMINAL_CONNECT_TIMEOUT", 5)
+        )
+        self.read_timeout = (
+            read_timeout
+            if read_timeout is not None
+            else getattr(settings, "TERMINAL_READ_TIMEOUT", 30)
+        )
+        self.max_retries = (
+            max_retries
+            if max_retries is not None
+            else getattr(settings, "TERMINAL_MAX_RETRIES", 2)
+        )
+        self.retry_backoff = (
+            retry_backoff
+            if retry_backoff is not None
+            else getattr(settings, "TERMINAL_RETRY_BACKOFF", 0.5)
+        )
+
+        # Both terminal endpoints are safe to repeat, so POST is retried as well
+        self.adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=Retry(
+                total=self.max_retries,
+                backoff_factor=self.retry_backoff,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=None,
+                raise_on_status=False,
+            ),
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.request_seconds = 0.0
+
+    def post(self, path: str, payload: Dict) -> requests.Response:
+        """
+        Posts the payload to a path of TERMINAL_SERVER_URL.
+        Raises requests.RequestException when the server could not be reached.
+        """
+        started = time.monotonic()
+        try:
+            response = self.session.post(
+                settings.TERMINAL_SERVER_URL + path,
+                json=payload,
+                timeout=(self.connect_timeout, self.read_timeout),
+            )
+        except requests.RequestException:
+            self.record(started, failed=True)
+            raise
+
+        self.record(started, failed=response.status_code >= 500)
+        return response
+
+    def record(self, started: float, failed: bool):
+        with self.lock:
+            self.requests += 1
+            self.failures += int(failed)
+            self.request_seconds += time.monotonic() - started
+
+    def get_metrics(self) -> Dict:
+        """
+        Returns the request counters and the state of the connection pools.
+        attempts includes the retries, so attempts - requests is the number of retries.
+        """
+        pool_manager = self.adapter.poolmanager
+        pools = [pool_manager.pools[key] for key in pool_manager.pools.keys()]
+
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "failures": self.failures,
+                "average_request_seconds": round(
+                    self.request_seconds / self.requests if self.requests else 0, 4
+                ),
+                "attempts": sum(pool.num_requests for pool in pools),
+                "connections_opened": sum(pool.num_connections for pool in pools),
+                # Unused slots of a pool hold None until a connection is returned
+                "idle_connections": sum(
+                    connection is not None
+                    for pool in pools
+                    if pool.pool
+                    for connection in list(pool.pool.queue)
+                ),
+                "pool_size": self.pool_size,
+            }
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_terminal_client() -> TerminalClient:
+    """
+    Returns the client of the current process. A forked worker creates its own
+    client, pooled sockets are never shared between processes.
+    """
+    global _client, _client_pid
+
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = TerminalClient()
+                _client_pid = pid
+    return _client
+
+
+def reset_terminal_client():
+    """
+    Closes the client of the current process, the next call creates a new one
+    """
+    global _client, _client_pid
+
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
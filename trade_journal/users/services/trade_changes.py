@@ -0,0 +1,63 @@
+from typing import Dict, Iterable
+
+from ..models import ManualTrade, TradeAccount
+from .statistics_engine import STATISTICS_FIELDS
+
+TRACKED_FIELDS = ("exchange_id", "is_top_up", "volume") + STATISTICS_FIELDS
+
+# Keep the IN clause below the SQLite variable limit
+LOOKUP_CHUNK_SIZE = 500
+
+
+class TradeChanges:
+    """
+    Captures the rows of the trades a sync is about to write, so the
+    aggregates derived from them can be updated with only the difference
+    """
+
+    def __init__(self, account: TradeAccount, exchange_ids: Iterable[str]):
+        self.account = account
+        self.exchange_ids = list({str(exchange_id) for exchange_id in exchange_ids})
+        self.before = self._load()
+        self.after = None
+
+    def _load(self) -> Dict[str, tuple]:
+        rows = {}
+        for i in range(0, len(self.exchange_ids), LOOKUP_CHUNK_SIZE):
+            chunk = self.exchange_ids[i : i + LOOKUP_CHUNK_SIZE]
+            for row in ManualTrade.objects.filter(
+                account=self.account, exchange_id__in=chunk
+            ).values_list(*TRACKED_FIELDS, named=True):
+                rows[row.exchange_id] = row
+        return rows
+
+    def collect(self) -> "TradeChanges":
+        """
+        Loads the rows again once the sync has written them
+        """
+        self.after = self._load()
+        return self
+
+    def changed(self):
+        """
+        Yields (before, after) row pairs of trades that were created or modified,
+        either side is None when the trade did not exist
+        """
+        for exchange_id in self.exchange_ids:
+            before = self.before.get(exchange_id)
+            after = self.after.get(exchange_id)
+            if before != after:
+                yield before, after
+
+    def has_changes(self) -> bool:
+        return any(True for _ in self.changed())
+
+    def get_profit_delta(self) -> float:
+        """
+        Returns how much the written trades moved the sum of the account's profits
+        """
+        delta = 0.0
+        for before, after in self.changed():
+            delta += (after.profit or 0.0) if after else 0.0
+            delta -= (before.profit or 0.0) if before else 0.0
+        return delta
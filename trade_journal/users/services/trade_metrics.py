@@ -0,0 +1,171 @@
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..models import ManualTrade, TradeAccount, TradeType
+from .statistics_engine import get_min_gain_threshold
+
+# Stored values a closed position needs when its entry came with an earlier sync
+OPEN_SIDE_FIELDS = ("trade_type", "symbol", "open_price", "open_time", "stop_loss")
+TRADE_INPUT_FIELDS = (
+    *OPEN_SIDE_FIELDS,
+    "close_price",
+    "close_time",
+    "profit",
+    "is_top_up",
+)
+DERIVED_FIELDS = (
+    "duration_in_minutes",
+    "gain",
+    "success",
+    "pips",
+    "risk_in_pips",
+    "r_multiple",
+)
+
+CURRENCIES = {
+    "AUD", "CAD", "CHF", "CNH", "CZK", "DKK", "EUR", "GBP", "HKD", "HUF", "JPY",
+    "MXN", "NOK", "NZD", "PLN", "SEK", "SGD", "TRY", "USD", "ZAR",
+}
+METAL_PIP_SIZES = {"XAU": 0.1, "XAG": 0.01}
+FOREX_SYMBOL = re.compile(r"^([A-Z]{3})([A-Z]{3})")
+
+
+def get_pip_size(symbol: str) -> Optional[float]:
+    """
+    Pip size of forex pairs and metals, None for symbols without a common pip
+    like indices and crypto. Broker suffixes such as EURUSD.m are ignored.
+    """
+    match = FOREX_SYMBOL.match((symbol or "").upper())
+    if not match:
+        return None
+
+    base, quote = match.groups()
+    if base in METAL_PIP_SIZES and quote in CURRENCIES:
+        return METAL_PIP_SIZES[base]
+    if base in CURRENCIES and quote in CURRENCIES:
+        return 0.01 if quote == "JPY" else 0.0001
+    return None
+
+
+def to_float(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+def is_same_value(stored, derived) -> bool:
+    if stored is None or derived is None:
+        return stored is derived
+    if isinstance(derived, str):
+        return stored == derived
+    return abs(float(stored) - float(derived)) < 1e-6
+
+
+def derive_trade_fields(values: Dict) -> Dict:
+    """
+    Returns the fields analytics read that follow from the other values of a
+    trade: duration, gain as a fraction of the open price, success (win, loss
+    or scratch below the minimum gain), and pips, risk in pips and R-multiple
+    when the symbol has a pip size and the trade a stop loss.
+
+    Fields whose inputs are missing are left out, open positions and deposits
+    only get what is known about them.
+    """
+    derived = {}
+    open_time = values.get("open_time")
+    close_time = values.get("close_time")
+
+    if open_time and close_time:
+        derived["duration_in_minutes"] = (close_time - open_time).total_seconds() / 60
+
+    if values.get("is_top_up") or close_time is None:
+        return derived
+
+    direction = {TradeType.buy: 1, TradeType.sell: -1}.get(values.get("trade_type"))
+    open_price = to_float(values.get("open_price"))
+    close_price = to_float(values.get("close_price"))
+    if direction is None or not open_price or close_price is None:
+        return derived
+
+    move = direction * (close_price - open_price)
+    gain = round(move / open_price, 4)
+    profit = values.get("profit") or 0
+
+    derived["gain"] = gain
+    if abs(gain) < get_min_gain_threshold() or profit == 0:
+        derived["success"] = "scratch"
+    else:
+        derived["success"] = "win" if profit > 0 else "loss"
+
+    pip_size = get_pip_size(values.get("symbol"))
+    if pip_size:
+        derived["pips"] = round(move / pip_size, 1)
+
+    stop_loss = to_float(values.get("stop_loss"))
+    if stop_loss:
+        risk = abs(open_price - stop_loss)
+        if risk:
+            derived["r_multiple"] = round(move / risk, 2)
+            if pip_size:
+                derived["risk_in_pips"] = round(risk / pip_size, 1)
+
+    return derived
+
+
+class TradeMetricsService:
+
+    @staticmethod
+    def add_derived_fields(account: TradeAccount, rows: List[Tuple[str, Dict]]) -> List:
+        """
+        Adds the derived fields to (exchange_id, values) rows before they are
+        written. Rows that close a position opened in an earlier sync are
+        completed with its stored open side, loaded in one query.
+        """
+        incomplete = [
+            exchange_id
+            for exchange_id, values in rows
+            if values.get("close_time") and values.get("open_price") is None
+        ]
+        stored = {}
+        if incomplete:
+            stored = {
+                trade["exchange_id"]: trade
+                for trade in ManualTrade.objects.filter(
+                    account=account, exchange_id__in=incomplete
+                ).values("exchange_id", *OPEN_SIDE_FIELDS)
+            }
+
+        derived_rows = []
+        for exchange_id, values in rows:
+            inputs = {
+                **{
+                    field: value
+                    for field, value in stored.get(exchange_id, {}).items()
+                    if value is not None
+                },
+                **values,
+            }
+            derived_rows.append(
+                (exchange_id, {**values, **derive_trade_fields(inputs)})
+            )
+        return derived_rows
+
+    @staticmethod
+    def get_updates(trades: Iterable[ManualTrade]) -> List[ManualTrade]:
+        """
+        Returns the trades whose stored derived fields differ from what their
+        other values give, with the derived fields set
+        """
+        changed = []
+        for trade in trades:
+            derived = derive_trade_fields(
+                {field: getattr(trade, field) for field in TRADE_INPUT_FIELDS}
+            )
+
+            if any(
+                not is_same_value(getattr(trade, field), value)
+                for field, value in derived.items()
+            ):
+                for field, value in derived.items():
+                    setattr(trade, field, value)
+                changed.append(trade)
+        return changed
+
@@ -1,12 +1,35 @@
+import logging
 from collections import defaultdict
 from datetime import datetime
 from datetime import timedelta
+from importlib.util import find_spec
 from typing import List, Dict
 from requests import get
 from django.utils import timezone
 from decimal import Decimal
-from ..models import ManualTrade, CustomUser, TradeAccount, TradeType, ExchangeRate
+from django.db.models import QuerySet
+from ..models import ManualTrade, CustomUser, TradeAccount, ExchangeRate
 from django.conf import settings
+from .balance_chart import BalanceCurve, build_balance_chart, check_resolution
+from .daily_pnl_service import DailyPnlService
+from .database_statistics import DatabaseStatisticsBackend
+from .equity_curve_service import EquityCurveService
+from .statistics_cache import StatisticsCache
+from .statistics_engine import (
+    DAY_NAMES,
+    SESSION_HOURS,
+    SESSIONS_BY_HOUR,
+    STATISTICS_FIELDS,
+    TradeStatisticsAccumulator,
+    calculate_deltas,
+    normalize_distribution,
+)
+
+# "snapshot" reads the persisted per-account aggregates when no date range is given,
+# "database" groups the trades in SQL and only loads the aggregates
+STATISTICS_BACKENDS = ("python", "numpy", "snapshot", "database")
+
+logger = logging.getLogger(__name__)
 
 
 class TradeService:
@@ -57,13 +80,16 @@ class TradeService:
         from_date: datetime = None,
         to_date: datetime = None,
         include_deposits=False,
+        refresh: bool = True,
     ) -> List[ManualTrade]:
         """
-        Fetches all trades from different sources and normalizes them
+        Fetches all trades from different sources and normalizes them. The
+        accounts of the user are refreshed first unless the caller already did
         """
-        from . import AccountService
+        if refresh:
+            from . import AccountService
 
-        AccountService.check_refresh(user)
+            AccountService.check_refresh(user)
 
         trades = ManualTrade.objects.filter(account__user=user)
 
@@ -83,17 +109,45 @@ class TradeService:
 
     @staticmethod
     def get_account_balance_chart(
-        user, from_date: timezone.datetime = None, to_date: timezone.datetime = None
+        user,
+        from_date: timezone.datetime = None,
+        to_date: timezone.datetime = None,
+        resolution: str = "raw",
+        max_points: int = None,
     ) -> Dict:
         """
-        Gets a balance chart for the given user
+        Gets the balance chart of the user, cached until their trades or accounts change
         """
+        from . import AccountService
 
-        trades = TradeService.get_all_trades(user, include_deposits=True)
+        AccountService.check_refresh(user)
 
-        trades = [trade for trade in trades if trade.open_time]
+        return StatisticsCache.get_or_compute(
+            "balance_chart",
+            user,
+            (from_date, to_date, resolution, max_points),
+            lambda: TradeService.compute_account_balance_chart(
+                user, from_date, to_date, resolution, max_points
+            ),
+        )
 
-        if not trades:
+    @staticmethod
+    def compute_account_balance_chart(
+        user,
+        from_date: timezone.datetime = None,
+        to_date: timezone.datetime = None,
+        resolution: str = "raw",
+        max_points: int = None,
+    ) -> Dict:
+        """
+        Computes a balance chart for the given user, with one point per trade or the
+        closing balance per hour, day or week, optionally downsampled to max_points
+        """
+        check_resolution(resolution)
+
+        dates, curve = TradeService.load_balance_curve(user)
+
+        if not dates:
             return {}
 
         if from_date and to_date:
@@ -102,58 +156,109 @@ class TradeService:
             from_date = make_aware(from_date)
             to_date = make_aware(to_date)
         else:
-            last_trade = trades[-1]
-            if last_trade:
-                from_date = (
-                    last_trade.close_time or last_trade.open_time
-                ) - timezone.timedelta(days=1)
-            else:
-                from_date = timezone.now() - timezone.timedelta(days=30)
+            last_date, _ = dates[-1]
+            from_date = last_date - timezone.timedelta(days=1)
             to_date = timezone.now()
 
-        if not trades:
-            return {}
-
-        balance_chart = {}
-
-        def add_for_date(date, disallow_zero=False):
-            if not date:
-                return
-
-                # Calculate the trades up until the given date
-            # If the trade has no close time, it is considered to be open and the open_time is used
-            trades_up_to_point = [
-                trade
-                for trade in trades
-                if (trade.close_time or trade.open_time) <= date
-            ]
+        return build_balance_chart(
+            curve,
+            (date for date, _ in dates),
+            from_date,
+            to_date,
+            resolution=resolution,
+            max_points=max_points,
+        )
 
-            # Calculate cumulative profit/loss
-            cumulative_profit = sum(trade.profit for trade in trades_up_to_point)
+    @staticmethod
+    def load_balance_curve(user) -> tuple:
+        """
+        Returns the (time, amount) points of all trades of the user, newest first,
+        and the balance curve over them. The accounts are refreshed by the caller
+        """
+        # Newest first, the order the chart has always been returned in
+        dates = [
+            (time, amount)
+            for time, amount, _ in reversed(
+                EquityCurveService.get_points(TradeService.get_all_accounts(user))
+            )
+        ]
 
-            if cumulative_profit == 0 and disallow_zero:
-                return
+        return dates, BalanceCurve(dates)
 
-            balance_chart[date.strftime("%Y-%m-%d %H:%M:%S")] = cumulative_profit
+    @staticmethod
+    def get_account_balance_comparison(
+        user,
+        from_date: timezone.datetime,
+        to_date: timezone.datetime,
+        resolution: str = "raw",
+        max_points: int = None,
+    ) -> Dict:
+        """
+        Gets the balance charts of the period and of the period before it, cached
+        like get_account_balance_chart
+        """
+        from . import AccountService
 
-        add_for_date(from_date, disallow_zero=True)
+        AccountService.check_refresh(user)
 
-        for trade in trades:
-            add_for_date(trade.close_time or trade.open_time)
+        return StatisticsCache.get_or_compute(
+            "balance_chart",
+            user,
+            ("compare", from_date, to_date, resolution, max_points),
+            lambda: TradeService.compute_account_balance_comparison(
+                user, from_date, to_date, resolution, max_points
+            ),
+        )
 
-        add_for_date(to_date)
+    @staticmethod
+    def compute_account_balance_comparison(
+        user,
+        from_date: timezone.datetime,
+        to_date: timezone.datetime,
+        resolution: str = "raw",
+        max_points: int = None,
+    ) -> Dict:
+        """
+        Computes the balance charts of the period and of the period before it from
+        a single load of the balance curve, with the balance change of both
+        """
+        from django.utils.timezone import make_aware
 
-        inter_chart = balance_chart.copy()
+        check_resolution(resolution)
 
-        balance_chart = {}
+        dates, curve = TradeService.load_balance_curve(user)
+        previous_from_date, previous_to_date = TradeService.get_previous_period(
+            from_date, to_date
+        )
 
-        for key, value in inter_chart.items():
-            if key >= from_date.strftime(
-                "%Y-%m-%d %H:%M:%S"
-            ) and key <= to_date.strftime("%Y-%m-%d %H:%M:%S"):
-                balance_chart[key] = value
+        periods = {}
+        for name, start, end in (
+            ("current", from_date, to_date),
+            ("previous", previous_from_date, previous_to_date),
+        ):
+            start, end = make_aware(start), make_aware(end)
+            periods[name] = {
+                "chart": build_balance_chart(
+                    curve,
+                    (date for date, _ in dates),
+                    start,
+                    end,
+                    resolution=resolution,
+                    max_points=max_points,
+                ),
+                "change": curve.balance_at(end) - curve.balance_at(start),
+            }
 
-        return balance_chart
+        return {
+            "account_balance_chart": periods["current"]["chart"],
+            "previous_account_balance_chart": periods["previous"]["chart"],
+            "deltas": {
+                "balance_change": periods["current"]["change"],
+                "previous_balance_change": periods["previous"]["change"],
+                "change_delta": periods["current"]["change"]
+                - periods["previous"]["change"],
+            },
+        }
 
     @staticmethod
     def get_all_accounts(user, disabled=None) -> List[TradeAccount]:
@@ -166,38 +271,102 @@ class TradeService:
         return accounts
 
     @staticmethod
-    def get_account_performance(user, disabled=None) -> Dict:
-        exchange_rate = Decimal(TradeService.get_exchange(user))
+    def get_statistics_backend(backend: str = None) -> str:
         """
-        Gets performance metrics for all accounts
+        Resolves the statistics backend, falling back to the TRADE_STATISTICS_BACKEND setting.
+        Without numpy installed, asking for the numpy backend is an error and a
+        configured numpy backend falls back to the python one.
         """
+        requested = backend
+        backend = backend or getattr(settings, "TRADE_STATISTICS_BACKEND", "python")
+
+        if backend not in STATISTICS_BACKENDS:
+            raise ValueError(
+                f"Unknown statistics backend '{backend}', expected one of: {', '.join(STATISTICS_BACKENDS)}"
+            )
+
+        if backend == "numpy" and find_spec("numpy") is None:
+            if requested:
+                raise ValueError(
+                    "The numpy statistics backend is not available, numpy is not installed"
+                )
+            logger.warning(
+                "TRADE_STATISTICS_BACKEND is numpy but numpy is not installed, "
+                "using the python backend"
+            )
+            return "python"
+
+        return backend
+
+    @staticmethod
+    def get_account_performance(user, disabled=None, backend: str = None) -> Dict:
+        """
+        Gets the account performance of the user, cached until their trades or accounts change
+        """
+        from . import AccountService
+
+        backend = TradeService.get_statistics_backend(backend)
+        AccountService.check_refresh(user)
+
+        return StatisticsCache.get_or_compute(
+            "account_performance",
+            user,
+            (disabled, backend),
+            lambda: TradeService.compute_account_performance(user, disabled, backend),
+        )
+
+    @staticmethod
+    def compute_account_performance(user, disabled=None, backend: str = None) -> Dict:
+        """
+        Computes performance metrics for all accounts
+        """
+        backend = TradeService.get_statistics_backend(backend)
+        exchange_rate = Decimal(TradeService.get_exchange(user))
+
+        # Trade count and profit per account
+        if backend == "snapshot":
+            from .snapshot_service import StatisticsSnapshotService
+
+            account_totals = {
+                account_id: (accumulator.total_trades, Decimal(accumulator.total_profit))
+                for account_id, accumulator in StatisticsSnapshotService.get_accumulators(
+                    TradeService.get_all_accounts(user)
+                ).items()
+            }
+        elif backend == "numpy":
+            from .numpy_statistics import NumpyStatisticsBackend
+
+            trades = TradeService.get_all_trades(user, refresh=False)
+            account_totals = NumpyStatisticsBackend.calculate_account_totals(trades)
+        elif backend == "database":
+            trades = TradeService.get_all_trades(user, refresh=False)
+            account_totals = DatabaseStatisticsBackend.calculate_account_totals(trades)
+        else:
+            trades = TradeService.get_all_trades(user, refresh=False)
+            account_totals = defaultdict(lambda: (0, Decimal(0)))
+            for account_id, profit in trades.values_list("account_id", "profit"):
+                count, total = account_totals[account_id]
+                account_totals[account_id] = (count + 1, total + Decimal(profit or 0))
+
         performance = {
-            "total_profit": Decimal(0),
-            "total_trades": 0,
+            "total_profit": sum(total for _, total in account_totals.values())
+            * exchange_rate,
+            "total_trades": sum(count for count, _ in account_totals.values()),
             "accounts_performance": [],
         }
 
-        # Get all trades
-        trades = TradeService.get_all_trades(user)
-
-        # Calculate overall metrics
-        for trade in trades:
-            performance["total_profit"] += Decimal(trade.profit) * exchange_rate
-            performance["total_trades"] += 1
-
         # Get account-specific performance
         accounts = TradeService.get_all_accounts(user, disabled=disabled)
 
         for account in accounts:
-            account_trades = [t for t in trades if t.account.id == account.id]
+            total_trades, total_profit = account_totals.get(account.id, (0, Decimal(0)))
 
             account_performance = {
                 "account_id": account.id,
                 "account_name": account.account_name,
                 "current_balance": Decimal(account.balance) * exchange_rate,
-                "total_trades": len(account_trades),
-                "total_profit": sum(Decimal(t.profit) for t in account_trades)
-                * exchange_rate,
+                "total_trades": total_trades,
+                "total_profit": total_profit * exchange_rate,
                 "last_updated": account.updated_at,
             }
 
@@ -206,48 +375,19 @@ class TradeService:
         return performance
 
     @staticmethod
-    def calculate_session_distribution(trades: List[Dict]) -> Dict[str, float]:
+    def calculate_session_distribution(trades: List[ManualTrade]) -> Dict[str, float]:
         """
         Calculates the distribution of trades across sessions,
         normalized to a 0-1 scale where the most frequent session is 1.0
         """
-        # Initialize counters for each session
-        session_counts = {"london": 0, "new-york": 0, "asia": 0, "pacific": 0}
+        session_counts = {session: 0 for session in SESSION_HOURS}
 
-        london = 7, 13
-        new_york = 13, 22
-        pacific = 23, 0
-        asia = 0, 6
-
-        # Count trades for each session
         for trade in trades:
-            trade_date = trade.open_time
-
-            if trade_date:
-
-                if trade_date.hour >= london[0] and trade_date.hour <= london[1]:
-                    session_counts["london"] += 1
-                if trade_date.hour >= new_york[0] and trade_date.hour <= new_york[1]:
-                    session_counts["new-york"] += 1
-                if trade_date.hour >= pacific[0] and trade_date.hour <= pacific[1]:
-                    session_counts["pacific"] += 1
-                if trade_date.hour >= asia[0] and trade_date.hour <= asia[1]:
-                    session_counts["asia"] += 1
-
-        # Find the maximum count to normalize
-        max_count = max(session_counts.values()) if session_counts.values() else 1
-
-        # Normalize to 0-1 scale
-        session_distribution = {
-            session: count / max_count if max_count > 0 else 0
-            for session, count in session_counts.items()
-        }
+            if trade.open_time:
+                for session in SESSIONS_BY_HOUR[trade.open_time.hour]:
+                    session_counts[session] += 1
 
-        return {
-            "distribution": session_distribution,
-            "raw_counts": session_counts,
-            "total_trades": sum(session_counts.values()),
-        }
+        return normalize_distribution(session_counts)
 
     @staticmethod
     def calculate_day_of_week_distribution(
@@ -257,362 +397,233 @@ class TradeService:
         Calculates the distribution of trades across days of the week,
         normalized to a 0-1 scale where the most frequent day is 1.0
         """
-        # Initialize counters for each day
-        day_counts = {
-            "Monday": 0,
-            "Tuesday": 0,
-            "Wednesday": 0,
-            "Thursday": 0,
-            "Friday": 0,
-            "Saturday": 0,
-            "Sunday": 0,
-        }
+        day_counts = [0] * 7
 
-        # Count trades for each day
         for trade in trades:
-            trade_date = trade.open_time
+            if trade.open_time:
+                day_counts[trade.open_time.weekday()] += 1
 
-            if trade_date:
-                day_name = trade_date.strftime("%A")
-                day_counts[day_name] += 1
-
-        # Find the maximum count to normalize
-        max_count = max(day_counts.values()) if day_counts.values() else 1
-
-        # Normalize to 0-1 scale
-        day_distribution = {
-            day: count / max_count if max_count > 0 else 0
-            for day, count in day_counts.items()
-        }
-
-        return {
-            "distribution": day_distribution,
-            "raw_counts": day_counts,
-            "total_trades": sum(day_counts.values()),
-        }
+        return normalize_distribution(dict(zip(DAY_NAMES, day_counts)))
 
     @staticmethod
     def calculate_statistics(
-        trades: List[ManualTrade], accounts: List[TradeAccount]
+        trades: List[ManualTrade],
+        accounts: List[TradeAccount] = None,
+        backend: str = None,
+        days: bool = True,
     ) -> Dict:
         """
-        Calculates comprehensive statistics for given trades, handling breakeven trades separately
+        Calculates comprehensive statistics for given trades, handling breakeven trades separately.
+
+        Querysets are read with a single values_list query and every row is visited once,
+        or loaded into NumPy columns when the numpy backend is selected. The database
+        backend aggregates querysets in SQL. Explicit trades are always scanned, the
+        snapshot backend is handled by get_statistics. With days=False the day based
+        values are left empty, for callers that read them from the daily rollup.
         """
+        backend = TradeService.get_statistics_backend(backend)
+        balance = sum(account.balance for account in accounts or [])
 
-        @staticmethod
-        def calculate_average_hold_time(trades):
-            total_duration = sum(
-                (trade.close_time - trade.open_time).total_seconds()
-                for trade in trades
-                if trade.close_time and trade.open_time
+        if backend == "numpy":
+            from .numpy_statistics import NumpyStatisticsBackend
+
+            return NumpyStatisticsBackend.calculate_statistics(
+                trades, balance=balance, days=days
             )
-            average_duration = total_duration / len(trades) if trades else 0
-            return timedelta(seconds=average_duration)
-
-        @staticmethod
-        def calculate_average_hold_time_by_type(trades, trade_type):
-            filtered_trades = [trade for trade in trades if trade.success == trade_type]
-            return calculate_average_hold_time(filtered_trades)
-
-        if not trades:
-            return {
-                "overall_statistics": {
-                    "balance": 0,
-                    "total_trades": 0,
-                    "total_profit": 0,
-                    "total_invested": 0,
-                    "win_rate": 0,
-                    "long": 0,
-                    "short": 0,
-                    "best_win": 0,
-                    "worst_loss": 0,
-                    "average_win": 0,
-                    "average_loss": 0,
-                    "profit_factor": 0,
-                    "total_won": 0,
-                    "total_lost": 0,
-                    "average_holding_time_minutes": 0,
-                    "open_trades": 0,
-                    "total_trading_days": 0,
-                    "winning_days": 0,
-                    "losing_days": 0,
-                    "breakeven_days": 0,
-                    "logged_days": 0,
-                    "max_consecutive_winning_days": 0,
-                    "max_consecutive_losing_days": 0,
-                    "average_daily_pnl": 0.0,
-                    "largest_profitable_day": 0.0,
-                    "largest_losing_day": 0.0,
-                    "trade_expectancy": 0,
-                    "max_drawdown": 0,
-                    "max_drawdown_percent": 0,
-                    "average_drawdown": 0,
-                    "average_drawdown_percent": 0,
-                    "average_hold_time_all": timedelta(0),
-                    "average_hold_time_winning": timedelta(0),
-                    "average_hold_time_losing": timedelta(0),
-                    "average_hold_time_scratch": timedelta(0),
-                    "breakeven_trades": 0,
-                    "countable_trades": 0,
-                },
-                "day_performances": {},
-                "symbol_performances": [],
-                "monthly_summary": [],
-            }
 
-        # Overall statistics
-        open_trades = trades.filter(close_time__isnull=True).count()
-        daily_pnl = defaultdict(float)
-        current_streak = 0
-        max_winning_streak = 0
-        max_losing_streak = 0
-        last_day = None
-        total_commission = 0.0
-        total_swap = 0.0
-        total_fees = 0.0
-        breakeven_days = 0
-
-        # Balance
-        balance = sum(account.balance for account in accounts)
-        total_trades = len(trades)
+        if backend == "database" and isinstance(trades, QuerySet):
+            return DatabaseStatisticsBackend.calculate_statistics(
+                trades, balance=balance, days=days
+            )
 
-        # Filter out breakeven trades for win/loss calculations
-        countable_trades = [t for t in trades if t.should_count_for_statistics()]
-        breakeven_trades = [t for t in trades if t.is_breakeven()]
+        if isinstance(trades, QuerySet):
+            trades = trades.values_list(*STATISTICS_FIELDS, named=True)
 
-        total_profit = sum(trade.profit for trade in trades)
-        total_invested = sum(trade.quantity for trade in trades)
+        return (
+            TradeStatisticsAccumulator(days=days).add_all(trades).result(balance=balance)
+        )
 
-        # Only count non-breakeven trades for win/loss stats
-        winning_trades = len([t for t in countable_trades if t.profit > 0])
-        countable_trades_count = len(countable_trades)
+    @staticmethod
+    def get_statistics(
+        user,
+        from_date: datetime = None,
+        to_date: datetime = None,
+        disabled=None,
+        backend: str = None,
+    ) -> Dict:
+        """
+        Gets the statistics of the user, cached until their trades or accounts change
+        """
+        from . import AccountService
 
-        long = len([t for t in trades if t.trade_type == TradeType.buy])
-        short = len([t for t in trades if t.trade_type == TradeType.sell])
+        backend = TradeService.get_statistics_backend(backend)
+        AccountService.check_refresh(user)
 
-        # Calculate win/loss metrics only from countable trades
-        total_won = sum(trade.profit for trade in countable_trades if trade.profit > 0)
-        total_lost = abs(
-            sum(trade.profit for trade in countable_trades if trade.profit < 0)
+        return StatisticsCache.get_or_compute(
+            "statistics",
+            user,
+            (from_date, to_date, disabled, backend),
+            lambda: TradeService.compute_statistics(
+                user, from_date, to_date, disabled, backend
+            ),
         )
 
-        all_wins = [t.profit for t in countable_trades if t.profit > 0]
-        best_win = max(all_wins) if all_wins else 0
-        average_win = sum(all_wins) / len(all_wins) if all_wins else 0
+    @staticmethod
+    def compute_statistics(
+        user,
+        from_date: datetime = None,
+        to_date: datetime = None,
+        disabled=None,
+        backend: str = None,
+    ) -> Dict:
+        """
+        Computes the statistics of all trades of the user, optionally within a date range
+        """
+        backend = TradeService.get_statistics_backend(backend)
+        accounts = TradeService.get_all_accounts(user, disabled=disabled)
 
-        all_losses = [t.profit for t in countable_trades if t.profit < 0]
-        worst_loss = min(all_losses) if all_losses else 0
-        average_loss = sum(all_losses) / len(all_losses) if all_losses else 0
+        if backend == "snapshot" and not (from_date and to_date):
+            from .snapshot_service import StatisticsSnapshotService
 
-        profit_factor = total_won / total_lost if total_lost != 0 else 0
+            statistics = StatisticsSnapshotService.get_statistics(
+                TradeService.get_all_accounts(user),
+                balance=sum(account.balance for account in accounts),
+            )
+        else:
+            trades = TradeService.get_all_trades(
+                user, from_date=from_date, to_date=to_date, refresh=False
+            )
+            # The day based values come from the rollup when it is enabled
+            statistics = TradeService.calculate_statistics(
+                trades, accounts, backend=backend, days=not DailyPnlService.is_enabled()
+            )
 
-        timed_trades = [
-            t.duration_in_minutes for t in trades if t.duration_in_minutes > 0
-        ]
-        average_holding_time_minutes = (
-            sum(timed_trades) / len(timed_trades) if timed_trades else 0
-        )
+        return TradeService.complete_statistics(statistics, user, from_date, to_date)
 
-        daily_profits = defaultdict(float)
+    @staticmethod
+    def complete_statistics(
+        statistics: Dict, user, from_date: datetime = None, to_date: datetime = None
+    ) -> Dict:
+        """
+        Fills in the day based values from the daily rollup and the drawdown from the equity curve
+        """
+        if from_date and to_date and not timezone.is_aware(from_date):
+            from django.utils.timezone import make_aware
 
-        # Symbol performances
-        symbol_stats = {}
-        for trade in trades:
-            symbol = trade.symbol
-            if not symbol:
-                continue
-
-            if symbol not in symbol_stats:
-                symbol_stats[symbol] = {
-                    "symbol": symbol,
-                    "total_trades": 0,
-                    "total_profit": 0,
-                    "total_invested": 0,
-                    "breakeven_trades": 0,
-                }
+            from_date = make_aware(from_date)
+            to_date = make_aware(to_date)
 
-            symbol_stats[symbol]["total_trades"] += 1
-            symbol_stats[symbol]["total_profit"] += trade.profit
-            symbol_stats[symbol]["total_invested"] += trade.quantity
-            if trade.is_breakeven():
-                symbol_stats[symbol]["breakeven_trades"] += 1
-
-            #     add
-            trade_day = trade.open_time.date()
-            if trade.close_time:
-                daily_pnl[trade_day] += trade.profit
-
-            if last_day and trade_day != last_day:
-                if daily_pnl[last_day] > 0:
-                    current_streak = current_streak + 1 if current_streak >= 0 else 1
-                    max_winning_streak = max(max_winning_streak, current_streak)
-                elif daily_pnl[last_day] < 0:
-                    current_streak = current_streak - 1 if current_streak <= 0 else -1
-                    max_losing_streak = max(max_losing_streak, abs(current_streak))
-                else:
-                    current_streak = 0
-                last_day = trade_day
-
-            trade_day = trade.open_time.date()
-            daily_profits[trade_day] += trade.profit
-            # Calculate commissions, swaps, and fees
-
-            # Calculate breakeven trades
-            if -0.2 <= trade.profit <= 0.2:
-                breakeven_days += 1
-
-        # Day performance
-        day_performances = {}
-        for trade in trades:
-            trade_date = trade.close_time
-            if not trade_date:
-                continue
-
-            day_key = trade_date.strftime("%Y-%m-%d")
-
-            if day_key not in day_performances:
-                day_performances[day_key] = {
-                    "day": day_key,
-                    "total_trades": 0,
-                    "total_profit": 0,
-                    "total_won": 0,
-                    "total_loss": 0,
-                    "total_invested": 0,
-                }
+        accounts = TradeService.get_all_accounts(user)
 
-            day_performances[day_key]["total_trades"] += 1
-            day_performances[day_key]["total_profit"] += trade.profit
-            if trade.profit > 0:
-                day_performances[day_key]["total_won"] += trade.profit
-            else:
-                day_performances[day_key]["total_loss"] += trade.profit
+        if DailyPnlService.is_enabled():
+            days = DailyPnlService.get_days(accounts, from_date, to_date)
+            DailyPnlService.apply_to_statistics(statistics, days)
 
-            day_performances[day_key]["total_invested"] += trade.profit
+        EquityCurveService.apply_to_statistics(statistics, accounts, from_date, to_date)
 
-        # Monthly summary
-        monthly_stats = {}
-        for trade in trades:
-            trade_date = trade.open_time
-            if not trade_date:
-                continue
-
-            month_key = trade_date.strftime("%Y-%m")
-
-            if month_key not in monthly_stats:
-                monthly_stats[month_key] = {
-                    "month": month_key,
-                    "total_trades": 0,
-                    "total_profit": 0,
-                    "total_invested": 0,
-                }
+        return statistics
+
+    @staticmethod
+    def get_previous_period(from_date: datetime, to_date: datetime) -> tuple:
+        """
+        Returns the period of the same length before the given one
+        """
+        return from_date - (to_date - from_date), from_date - timedelta(days=1)
 
-            monthly_stats[month_key]["total_trades"] += 1
-            monthly_stats[month_key]["total_profit"] += trade.profit
-            monthly_stats[month_key]["total_invested"] += trade.profit
-
-        total_trading_days = len(daily_pnl)
-        winning_days = sum(1 for pnl in daily_pnl.values() if pnl > 0)
-        losing_days = sum(1 for pnl in daily_pnl.values() if pnl < 0)
-        logged_days = total_trading_days
-        average_daily_pnl = (
-            sum(daily_pnl.values()) / total_trading_days
-            if total_trading_days > 0
-            else 0.0
+    @staticmethod
+    def get_statistics_comparison(
+        user,
+        from_date: datetime,
+        to_date: datetime,
+        disabled=None,
+        backend: str = None,
+    ) -> Dict:
+        """
+        Gets the statistics of the period and of the period before it, cached like get_statistics
+        """
+        from . import AccountService
+
+        backend = TradeService.get_statistics_backend(backend)
+        AccountService.check_refresh(user)
+
+        return StatisticsCache.get_or_compute(
+            "statistics",
+            user,
+            ("compare", from_date, to_date, disabled, backend),
+            lambda: TradeService.compute_statistics_comparison(
+                user, from_date, to_date, disabled, backend
+            ),
         )
 
-        day_of_week_analysis = TradeService.calculate_day_of_week_distribution(trades)
-        sessions_analysis = TradeService.calculate_session_distribution(trades)
-        largest_profitable_day = max(daily_profits.values(), default=0.0)
-        largest_losing_day = min(daily_profits.values(), default=0.0)
+    @staticmethod
+    def compute_statistics_comparison(
+        user,
+        from_date: datetime,
+        to_date: datetime,
+        disabled=None,
+        backend: str = None,
+    ) -> Dict:
+        """
+        Computes the statistics of the period and of the period before it.
+
+        The python backend routes every trade of a single load to the period it was
+        closed in, the numpy and database backends compute each period from its own
+        queryset. The snapshot backend has no date ranges and is scanned like python.
+        """
+        from django.utils.timezone import make_aware
 
-        # Calculate trade expectancy
-        win_rate = winning_trades / total_trades if total_trades > 0 else 0
-        loss_rate = (
-            (total_trades - winning_trades) / total_trades if total_trades > 0 else 0
+        backend = TradeService.get_statistics_backend(backend)
+        accounts = TradeService.get_all_accounts(user, disabled=disabled)
+        balance = sum(account.balance for account in accounts)
+        previous_from_date, previous_to_date = TradeService.get_previous_period(
+            from_date, to_date
         )
-        trade_expectancy = win_rate * average_win - loss_rate * average_loss
 
-        # Calculate max drawdown and max drawdown percent
-        max_drawdown = 0
-        peak = trades[0].profit
-        for trade in trades:
-            if trade.profit > peak:
-                peak = trade.profit
-            drawdown = peak - trade.profit
-            if drawdown > max_drawdown:
-                max_drawdown = drawdown
-        max_drawdown_percent = (max_drawdown / peak) * 100 if peak != 0 else 0
-
-        # Calculate average drawdown and average drawdown percent
-        drawdowns = []
-        peak = trades[0].profit
-        for trade in trades:
-            if trade.profit > peak:
-                peak = trade.profit
-            drawdown = peak - trade.profit
-            drawdowns.append(drawdown)
-        average_drawdown = sum(drawdowns) / len(drawdowns) if drawdowns else 0
-        average_drawdown_percent = (average_drawdown / peak) * 100 if peak != 0 else 0
-        # Calculate average hold times
-        average_hold_time_all = calculate_average_hold_time(trades)
-        average_hold_time_winning = calculate_average_hold_time_by_type(trades, "win")
-        average_hold_time_losing = calculate_average_hold_time_by_type(trades, "loss")
-        average_hold_time_scratch = calculate_average_hold_time_by_type(
-            trades, "scratch"
+        days = not DailyPnlService.is_enabled()
+        periods = [(from_date, to_date), (previous_from_date, previous_to_date)]
+
+        if backend in ("numpy", "database"):
+            results = [
+                TradeService.calculate_statistics(
+                    TradeService.get_all_trades(
+                        user, from_date=start, to_date=end, refresh=False
+                    ),
+                    accounts,
+                    backend=backend,
+                    days=days,
+                )
+                for start, end in periods
+            ]
+        else:
+            trades = TradeService.get_all_trades(
+                user, from_date=previous_from_date, to_date=to_date, refresh=False
+            ).values_list(*STATISTICS_FIELDS, named=True)
+
+            accumulators = [
+                (make_aware(start), make_aware(end), TradeStatisticsAccumulator(days=days))
+                for start, end in periods
+            ]
+            for row in trades:
+                for start, end, accumulator in accumulators:
+                    if start <= row.close_time <= end:
+                        accumulator.add(row)
+                        break
+
+            results = [
+                accumulator.result(balance=balance) for _, _, accumulator in accumulators
+            ]
+
+        current, previous = (
+            TradeService.complete_statistics(statistics, user, start, end)
+            for statistics, (start, end) in zip(results, periods)
         )
+
         return {
-            "overall_statistics": {
-                "long": long,
-                "short": short,
-                "balance": balance,
-                "total_trades": total_trades,
-                "total_profit": total_profit,
-                "total_invested": total_invested,
-                "win_rate": (
-                    (winning_trades / countable_trades_count * 100)
-                    if countable_trades_count > 0
-                    else 0
-                ),
-                "best_win": best_win,
-                "worst_loss": worst_loss,
-                "average_win": average_win,
-                "average_loss": average_loss,
-                "profit_factor": profit_factor,
-                "total_won": total_won,
-                "total_lost": total_lost,
-                "average_holding_time_minutes": average_holding_time_minutes,
-                # new add
-                "open_trades": open_trades,
-                "total_trading_days": total_trading_days,
-                "winning_days": winning_days,
-                "losing_days": losing_days,
-                "breakeven_days": breakeven_days,
-                "logged_days": logged_days,
-                "max_consecutive_winning_days": max_winning_streak,
-                "max_consecutive_losing_days": max_losing_streak,
-                "average_daily_pnl": average_daily_pnl,
-                "total_commission": total_commission,
-                "total_swap": total_swap,
-                "total_fees": total_fees,
-                "largest_profitable_day": largest_profitable_day,
-                "largest_losing_day": largest_losing_day,
-                "trade_expectancy": trade_expectancy,
-                "max_drawdown": max_drawdown,
-                "max_drawdown_percent": max_drawdown_percent,
-                "average_drawdown": average_drawdown,
-                "average_drawdown_percent": average_drawdown_percent,
-                "average_hold_time_all": average_hold_time_all,
-                "average_hold_time_winning": average_hold_time_winning,
-                "average_hold_time_losing": average_hold_time_losing,
-                "average_hold_time_scratch": average_hold_time_scratch,
-                "breakeven_trades": len(breakeven_trades),
-                "countable_trades": countable_trades_count,
-            },
-            "symbol_performances": list(symbol_stats.values()),
-            "monthly_summary": list(monthly_stats.values()),
-            "day_of_week_analysis": day_of_week_analysis,
-            "day_performances": day_performances,
-            "session_analysis": sessions_analysis,
+            "statistics": current,
+            "previous_statistics": previous,
+            "deltas": calculate_deltas(
+                current["overall_statistics"], previous["overall_statistics"]
+            ),
         }
 
     @staticmethod
@@ -0,0 +1,102 @@
+import hashlib
+import json
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from ..models import ManualTrade, TradeAccount
+from .sync_telemetry import get_current_sync_record
+
+BULK_BATCH_SIZE = 500
+
+
+def fold_trade_rows(rows: Iterable[Tuple[str, Dict]]) -> Dict[str, Dict]:
+    """
+    Merges the rows written for the same exchange_id in order, later values win,
+    which is what writing them one after another would leave in the database
+    """
+    folded = {}
+    for exchange_id, values in rows:
+        folded.setdefault(str(exchange_id), {}).update(values)
+    return folded
+
+
+def get_payload_hash(values: Dict) -> str:
+    """
+    Short digest of the values a sync writes for a trade
+    """
+    payload = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
+
+
+class TradeUpsertService:
+
+    @staticmethod
+    def get_changed_rows(account: TradeAccount, rows: Iterable[Tuple[str, Dict]]) -> List:
+        """
+        Folds the rows per trade and returns those whose values differ from what the
+        last sync wrote, with their payload_hash set. The stored hashes of the
+        account are loaded in one query.
+        """
+        stored = dict(
+            ManualTrade.objects.filter(account=account).values_list(
+                "exchange_id", "payload_hash"
+            )
+        )
+
+        changed = []
+        inserted = unchanged = 0
+        for exchange_id, values in fold_trade_rows(rows).items():
+            payload_hash = get_payload_hash(values)
+            if exchange_id not in stored:
+                inserted += 1
+            elif stored[exchange_id] == payload_hash:
+                unchanged += 1
+                continue
+            changed.append((exchange_id, {**values, "payload_hash": payload_hash}))
+
+        record = get_current_sync_record()
+        if record is not None:
+            record.add_rows(inserted, len(changed) - inserted, unchanged)
+        return changed
+
+    @staticmethod
+    def write(account: TradeAccount, rows: List[Tuple[str, Dict]], bulk: bool = None):
+        """
+        Creates or updates the trades of an account from (exchange_id, values) rows.
+        Existing trades only have the given values updated, like update_or_create.
+        """
+        if bulk is None:
+            bulk = getattr(settings, "TRADE_SYNC_BULK_UPSERT", True)
+
+        with transaction.atomic():
+            if bulk:
+                TradeUpsertService.bulk_upsert(account, rows)
+            else:
+                for exchange_id, values in rows:
+                    ManualTrade.objects.update_or_create(
+                        account=account, exchange_id=str(exchange_id), defaults=values
+                    )
+
+    @staticmethod
+    def bulk_upsert(account: TradeAccount, rows: List[Tuple[str, Dict]]):
+        """
+        Writes the rows with one INSERT ... ON CONFLICT statement per batch of trades
+        that set the same fields
+        """
+        groups = defaultdict(list)
+        for exchange_id, values in fold_trade_rows(rows).items():
+            groups[tuple(sorted(values))].append(
+                ManualTrade(account=account, exchange_id=exchange_id, **values)
+            )
+
+        for fields, trades in groups.items():
+            ManualTrade.objects.bulk_create(
+                trades,
+                batch_size=BULK_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=["account", "exchange_id"],
+                update_fields=[*fields, "updated_at"],
+            )
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ManualTrade, TradeAccount
+from .services.statistics_cache import CACHE_ONLY_ACCOUNT_FIELDS, StatisticsCache
+
+
+@receiver(post_save, sender=ManualTrade)
+@receiver(post_delete, sender=ManualTrade)
+def invalidate_trade_statistics(sender, instance: ManualTrade, **kwargs):
+    if instance.account_id is None:
+        return
+
+    # The sync services pass the account along, so this does not hit the database
+    try:
+        account = instance.account
+    except TradeAccount.DoesNotExist:
+        # Deleted along with its account, which invalidates the statistics itself
+        return
+
+    StatisticsCache.bump_version(account.user_id)
+
+
+@receiver(post_save, sender=TradeAccount)
+@receiver(post_delete, sender=TradeAccount)
+def invalidate_account_statistics(sender, instance: TradeAccount, **kwargs):
+    update_fields = kwargs.get("update_fields")
+    if update_fields and CACHE_ONLY_ACCOUNT_FIELDS.issuperset(update_fields):
+        return
+
+    StatisticsCache.bump_version(instance.user_id)
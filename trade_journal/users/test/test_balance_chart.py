@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from ..models import ManualTrade, TradeAccount
+from ..services import TradeService
+from ..services.balance_chart import BalanceCurve, downsample_lttb
+
+User = get_user_model()
+
+
+class BalanceCurveTests(TestCase):
+    def test_balance_at(self):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        curve = BalanceCurve(
+            [
+                (start + timedelta(hours=2), -5),
+                (start, 10),
+                (start + timedelta(hours=1), 20),
+            ]
+        )
+
+        self.assertEqual(curve.balance_at(start - timedelta(seconds=1)), 0)
+        self.assertEqual(curve.balance_at(start), 10)
+        self.assertEqual(curve.balance_at(start + timedelta(minutes=90)), 30)
+        self.assertEqual(curve.balance_at(start + timedelta(days=1)), 25)
+
+    def test_downsample_lttb_keeps_extremes(self):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        balances = [0] * 50 + [100] + [0] * 49
+        points = [
+            (start + timedelta(minutes=i), balance)
+            for i, balance in enumerate(balances)
+        ]
+
+        sampled = downsample_lttb(points, 10)
+
+        self.assertEqual(len(sampled), 10)
+        self.assertEqual(sampled[0], points[0])
+        self.assertEqual(sampled[-1], points[-1])
+        self.assertIn(points[50], sampled)
+        self.assertEqual(downsample_lttb(points[:5], 10), points[:5])
+
+
+@patch("users.services.AccountService.check_refresh")
+class AccountBalanceChartTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@test.com", password="testpass123"
+        )
+        self.account = TradeAccount.objects.create(
+            user=self.user, balance=Decimal("1000.00")
+        )
+        start = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+
+        ManualTrade.objects.create(
+            account=self.account,
+            profit=100,
+            is_top_up=True,
+            open_time=start,
+            close_time=start,
+        )
+        for day, profit in enumerate([10, -5, 20], start=1):
+            ManualTrade.objects.create(
+                account=self.account,
+                profit=profit,
+                open_time=start + timedelta(days=day),
+                close_time=start + timedelta(days=day, hours=1),
+            )
+        # Open trade, charted at its open time
+        ManualTrade.objects.create(
+            account=self.account,
+            profit=7,
+            open_time=start + timedelta(days=5),
+        )
+
+    def test_balance_chart_in_range(self, mock_check_refresh):
+        chart = TradeService.get_account_balance_chart(
+            self.user, from_date=datetime(2024, 1, 2), to_date=datetime(2024, 1, 4)
+        )
+
+        self.assertEqual(
+            chart,
+            {
+                "2024-01-02 00:00:00": 100,
+                "2024-01-03 13:00:00": 105,
+                "2024-01-02 13:00:00": 110,
+                "2024-01-04 00:00:00": 105,
+            },
+        )
+
+    def test_balance_chart_without_range(self, mock_check_refresh):
+        chart = TradeService.get_account_balance_chart(self.user)
+
+        self.assertEqual(chart["2024-01-06 12:00:00"], 132)
+        self.assertEqual(list(chart.values())[-1], 132)
+
+    def test_balance_chart_daily_resolution(self, mock_check_refresh):
+        chart = TradeService.get_account_balance_chart(
+            self.user,
+            from_date=datetime(2024, 1, 2),
+            to_date=datetime(2024, 1, 4),
+            resolution="day",
+        )
+
+        self.assertEqual(
+            chart,
+            {
+                "2024-01-02 00:00:00": 110,
+                "2024-01-03 00:00:00": 105,
+                "2024-01-04 00:00:00": 105,
+            },
+        )
+
+    def test_balance_chart_max_points(self, mock_check_refresh):
+        chart = TradeService.get_account_balance_chart(self.user, max_points=3)
+
+        self.assertEqual(len(chart), 3)
+        self.assertEqual(list(chart)[0], "2024-01-01 12:00:00")
+        self.assertEqual(list(chart.values())[-1], 132)
+
+    def test_balance_chart_unknown_resolution(self, mock_check_refresh):
+        with self.assertRaises(ValueError):
+            TradeService.get_account_balance_chart(self.user, resolution="minute")
+
+    def test_balance_chart_comparison(self, mock_check_refresh):
+        comparison = TradeService.get_account_balance_comparison(
+            self.user, from_date=datetime(2024, 1, 3), to_date=datetime(2024, 1, 5)
+        )
+
+        self.assertEqual(
+            comparison["account_balance_chart"],
+            TradeService.get_account_balance_chart(
+                self.user, from_date=datetime(2024, 1, 3), to_date=datetime(2024, 1, 5)
+            ),
+        )
+        self.assertEqual(
+            comparison["previous_account_balance_chart"],
+            {"2024-01-01 12:00:00": 100, "2024-01-02 00:00:00": 100},
+        )
+        self.assertEqual(
+            comparison["deltas"],
+            {"balance_change": 15, "previous_balance_change": 100, "change_delta": -85},
+        )
@@ -0,0 +1,179 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from ..models import ManualTrade, Platform, TradeAccount
+from ..services import AccountService
+from ..services.c_trader_sessions import (
+    CTraderSessionCache,
+    get_c_trader_sessions,
+    reset_c_trader_sessions,
+)
+from ..services.c_trader_service import CTraderService
+
+User = get_user_model()
+
+
+class FakeCTrader:
+    def __init__(self, server, username, password):
+        self.account = (server, username, password)
+        self.connected = True
+        self.logged_out = False
+        self.client = {"currency": "USD"}
+        self.position_list = []
+
+    def isconnected(self):
+        return self.connected
+
+    def logout(self):
+        self.logged_out = True
+        self.connected = False
+
+    def positions(self):
+        return self.position_list
+
+
+class CTraderSessionCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.clients = []
+        self.now = 1000.0
+
+        patcher = patch(
+            "users.services.c_trader_sessions.time.monotonic",
+            side_effect=lambda: self.now,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def connect(self, server, username, password):
+        client = FakeCTrader(server, username, password)
+        self.clients.append(client)
+        return client
+
+    def get_cache(self, **kwargs):
+        return CTraderSessionCache(
+            self.connect, **{"idle_timeout": 60, "max_sessions": 10, **kwargs}
+        )
+
+    def use(self, cache, username="1001", password="secret"):
+        with cache.session("Broker", username, password) as client:
+            return client
+
+    def test_live_session_is_reused(self):
+        cache = self.get_cache()
+
+        self.assertIs(self.use(cache), self.use(cache))
+        self.assertEqual(len(self.clients), 1)
+        self.assertEqual(cache.get_metrics()["hits"], 1)
+
+    def test_dropped_session_reconnects(self):
+        cache = self.get_cache()
+        first = self.use(cache)
+        first.connected = False
+
+        second = self.use(cache)
+
+        self.assertIsNot(first, second)
+        self.assertTrue(first.logged_out)
+        self.assertEqual(cache.get_metrics()["reconnects"], 1)
+
+    def test_changed_password_reconnects(self):
+        cache = self.get_cache()
+        first = self.use(cache)
+
+        self.assertIsNot(self.use(cache, password="changed"), first)
+        self.assertTrue(first.logged_out)
+
+    def test_idle_sessions_are_logged_out(self):
+        cache = self.get_cache()
+        idle = self.use(cache, username="1001")
+        self.now += 30
+        active = self.use(cache, username="1002")
+        self.now += 40
+
+        cache.evict_idle()
+
+        self.assertTrue(idle.logged_out)
+        self.assertFalse(active.logged_out)
+        self.assertEqual(cache.get_metrics()["sessions"], 1)
+
+    def test_least_recently_used_session_is_evicted(self):
+        cache = self.get_cache(max_sessions=2)
+        first = self.use(cache, username="1001")
+        second = self.use(cache, username="1002")
+        self.use(cache, username="1001")
+
+        self.use(cache, username="1003")
+
+        self.assertTrue(second.logged_out)
+        self.assertFalse(first.logged_out)
+
+    def test_failed_call_discards_session(self):
+        cache = self.get_cache()
+
+        with self.assertRaises(RuntimeError):
+            with cache.session("Broker", "1001", "secret"):
+                raise RuntimeError("Connection reset")
+
+        self.assertTrue(self.clients[0].logged_out)
+        self.assertEqual(cache.get_metrics()["sessions"], 0)
+
+
+class CTraderRefreshTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@test.com", password="testpass123"
+        )
+        self.account = TradeAccount.objects.create(
+            user=self.user,
+            account_id="2001",
+            platform=Platform.c_trader,
+            server="Broker",
+            password="secret",
+        )
+
+        self.clients = []
+
+        def create_client(server, username, password):
+            client = FakeCTrader(server, username, password)
+            client.position_list = [
+                {
+                    "position_id": 7,
+                    "side": "Buy",
+                    "name": "EURUSD",
+                    "amount": 1000,
+                    "price": 1.1,
+                    "gain": 0.5,
+                    "diff": 12.5,
+                }
+            ]
+            self.clients.append(client)
+            return client
+
+        reset_c_trader_sessions()
+        self.addCleanup(reset_c_trader_sessions)
+        patcher = patch.object(
+            CTraderService, "create_client", side_effect=create_client
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_refreshes_reuse_the_session(self):
+        AccountService.refresh_account(self.account)
+        AccountService.refresh_account(self.account)
+
+        self.assertEqual(len(self.clients), 1)
+        self.assertEqual(get_c_trader_sessions().get_metrics()["hits"], 1)
+        trade = ManualTrade.objects.get(account=self.account)
+        self.assertEqual((trade.exchange_id, trade.profit), ("7", 12.5))
+
+    def test_failed_logon_renews_the_cache(self):
+        CTraderService.create_client.side_effect = ConnectionError("Logon failed")
+
+        AccountService.refresh_account(self.account)
+
+        self.account.refresh_from_db()
+        self.assertIsNotNone(self.account.cached_until)
+        self.assertGreater(self.account.cached_until, self.account.cached_at)
+        self.assertFalse(ManualTrade.objects.filter(account=self.account).exists())
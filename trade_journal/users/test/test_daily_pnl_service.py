@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from ..models import DailyAccountPnl, TradeAccount
+from ..services import TradeService
+from ..services.daily_pnl_service import DailyPnlService
+from ..services.meta_trader_service import MetaTraderService
+from .test_snapshot_service import deal
+
+User = get_user_model()
+
+
+def get_rollup(account):
+    return {
+        row["day"]: row
+        for row in DailyAccountPnl.objects.filter(account=account).values(
+            "day", "trade_count", "profit", "won", "lost", "volume", "breakeven_count"
+        )
+    }
+
+
+@override_settings(TRADE_STATISTICS_DAILY_ROLLUP=True)
+@patch("users.services.AccountService.check_refresh")
+class DailyPnlServiceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@test.com", password="testpass123"
+        )
+        self.account = TradeAccount.objects.create(
+            user=self.user, balance=Decimal("1000.00")
+        )
+        self.start = datetime(2024, 3, 4, 10, tzinfo=timezone.utc)
+
+        MetaTraderService.update_trades(
+            [
+                deal(1, 0, self.start, 1.1),
+                deal(1, 1, self.start + timedelta(hours=1), 1.2, profit=50),
+                deal(2, 0, self.start + timedelta(hours=2), 1.3),
+                deal(2, 1, self.start + timedelta(hours=3), 1.2, profit=-20),
+                deal(3, 0, self.start + timedelta(days=1), 1.3),
+            ],
+            self.account,
+        )
+
+    def test_sync_maintains_rollup(self, mock_check_refresh):
+        rollup = get_rollup(self.account)
+
+        self.assertEqual(len(rollup), 1)
+        day = rollup[self.start.date()]
+        self.assertEqual(day["trade_count"], 2)
+        self.assertEqual(day["profit"], 30)
+        self.assertEqual(day["won"], 50)
+        self.assertEqual(day["lost"], -20)
+        self.assertEqual(day["volume"], 2)
+
+        MetaTraderService.update_trades(
+            [
+                deal(2, 1, self.start + timedelta(hours=3), 1.2, profit=-25),
+                deal(3, 1, self.start + timedelta(days=1, hours=1), 1.4, profit=15),
+            ],
+            self.account,
+        )
+
+        rollup = get_rollup(self.account)
+        self.assertEqual(rollup[self.start.date()]["profit"], 25)
+        self.assertEqual(rollup[self.start.date() + timedelta(days=1)]["trade_count"], 1)
+
+        DailyPnlService.rebuild(self.account)
+        self.assertEqual(get_rollup(self.account), rollup)
+
+    def test_day_created_by_a_concurrent_sync_is_added_to(self, mock_check_refresh):
+        next_day = self.start.date() + timedelta(days=1)
+        # Another sync of the account wrote the day between our reads and writes
+        DailyAccountPnl.objects.create(
+            account=self.account, day=next_day, trade_count=1, profit=5, volume=1
+        )
+
+        MetaTraderService.update_trades(
+            [deal(3, 1, self.start + timedelta(days=1, hours=1), 1.4, profit=15)],
+            self.account,
+        )
+
+        day = get_rollup(self.account)[next_day]
+        self.assertEqual((day["trade_count"], day["profit"]), (2, 20))
+
+    def test_statistics_from_rollup(self, mock_check_refresh):
+        # Opened on one day and closed on the next
+        MetaTraderService.update_trades(
+            [deal(3, 1, self.start + timedelta(days=2, hours=1), 1.4, profit=-15)],
+            self.account,
+        )
+
+        with override_settings(TRADE_STATISTICS_DAILY_ROLLUP=False):
+            statistics = TradeService.get_statistics(self.user)
+        rollup_statistics = TradeService.get_statistics(self.user)
+
+        self.assertEqual(rollup_statistics, statistics)
+        self.assertEqual(len(rollup_statistics["day_performances"]), 2)
+        self.assertEqual(rollup_statistics["monthly_summary"][0]["total_profit"], 15)
+        overall = rollup_statistics["overall_statistics"]
+        self.assertEqual((overall["winning_days"], overall["losing_days"]), (1, 1))
+        self.assertEqual(overall["average_daily_pnl"], 7.5)
+
+    @override_settings(TRADE_STATISTICS_DAILY_ROLLUP=False)
+    def test_syncs_do_not_write_a_disabled_rollup(self, mock_check_refresh):
+        DailyAccountPnl.objects.all().delete()
+
+        MetaTraderService.update_trades(
+            [deal(3, 1, self.start + timedelta(days=1, hours=1), 1.4, profit=15)],
+            self.account,
+        )
+
+        self.assertFalse(DailyAccountPnl.objects.exists())
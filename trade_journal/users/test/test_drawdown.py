@@ -0,0 +1,166 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ..models import ManualTrade, TradeAccount
+from ..services import AccountService, TradeService
+from ..services.drawdown import DrawdownEngine
+from ..services.equity_curve_service import EquityCurveService
+from ..services.trade_changes import TradeChanges
+
+User = get_user_model()
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def at(hours):
+    return START + timedelta(hours=hours)
+
+
+class DrawdownEngineTests(TestCase):
+    def test_drawdown_duration_and_recovery(self):
+        engine = DrawdownEngine().add_all(
+            [
+                (at(0), 1000, True),
+                (at(1), 200, False),
+                (at(2), -300, False),
+                (at(3), -60, False),
+                (at(4), 400, False),
+                (at(5), -50, False),
+            ]
+        )
+        result = engine.result()
+
+        self.assertEqual(result["max_drawdown"], 360)
+        self.assertEqual(result["max_drawdown_percent"], 30)
+        self.assertEqual(result["max_drawdown_started_at"], at(1))
+        self.assertEqual(result["max_drawdown_trough_at"], at(3))
+        self.assertEqual(result["max_drawdown_recovered_at"], at(4))
+        self.assertEqual(result["max_drawdown_duration"], timedelta(hours=3))
+        self.assertEqual(result["max_drawdown_recovery_time"], timedelta(hours=1))
+        self.assertEqual(
+            list(engine.get_underwater_chart().values()), [0, 0, 300, 360, 0, 50]
+        )
+
+    def test_deposits_do_not_recover_a_drawdown(self):
+        result = (
+            DrawdownEngine()
+            .add_all(
+                [
+                    (at(0), 1000, True),
+                    (at(1), -200, False),
+                    (at(2), 500, True),
+                    (at(3), -100, False),
+                ]
+            )
+            .result()
+        )
+
+        self.assertEqual(result["max_drawdown"], 300)
+        self.assertIsNone(result["max_drawdown_recovered_at"])
+        self.assertEqual(result["max_drawdown_duration"], timedelta(hours=3))
+        self.assertIsNone(result["max_drawdown_recovery_time"])
+
+    def test_underwater_chart_is_downsampled(self):
+        engine = DrawdownEngine().add_all(
+            [(at(0), 1000, True)]
+            + [(at(hours), 1, False) for hours in range(1, 100)]
+            + [(at(100), -400, False)]
+            + [(at(hours), 5, False) for hours in range(101, 200)]
+        )
+
+        chart = engine.get_underwater_chart(max_points=20)
+
+        self.assertEqual(len(chart), 20)
+        self.assertEqual(max(chart.values()), 400)
+        self.assertEqual(len(engine.get_underwater_chart()), 200)
+
+    def test_no_points(self):
+        result = DrawdownEngine().result()
+
+        self.assertEqual(result["max_drawdown"], 0)
+        self.assertEqual(result["max_drawdown_duration"], timedelta(0))
+
+
+@patch("users.services.AccountService.check_refresh")
+class EquityCurveServiceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@test.com", password="testpass123"
+        )
+        self.account = TradeAccount.objects.create(
+            user=self.user, balance=Decimal("1000.00")
+        )
+        for hours, profit, is_top_up in (
+            (0, 1000, True),
+            (1, 200, False),
+            (2, -300, False),
+            (3, 100, False),
+        ):
+            ManualTrade.objects.create(
+                account=self.account,
+                profit=profit,
+                is_top_up=is_top_up,
+                open_time=at(hours),
+                close_time=at(hours),
+            )
+
+    def test_statistics_drawdown(self, mock_check_refresh):
+        statistics = TradeService.get_statistics(self.user)
+
+        self.assertEqual(statistics["overall_statistics"]["max_drawdown"], 300)
+        self.assertEqual(statistics["overall_statistics"]["max_drawdown_percent"], 25)
+        self.assertEqual(len(statistics["underwater_chart"]), 4)
+
+    @override_settings(STATISTICS_CACHE_ALLOW_LOCAL=True)
+    def test_curve_is_cached_until_trades_change(self, mock_check_refresh):
+        EquityCurveService.get_curves([self.account])
+
+        with self.assertNumQueries(0):
+            EquityCurveService.get_curves([self.account])
+
+        ManualTrade.objects.create(
+            account=self.account, profit=-500, open_time=at(4), close_time=at(4)
+        )
+        drawdown, _ = EquityCurveService.get_drawdown([self.account])
+
+        self.assertEqual(drawdown["max_drawdown"], 700)
+
+    @override_settings(STATISTICS_CACHE_ALLOW_LOCAL=True)
+    def test_curve_is_cached_until_the_account_is_synced(self, mock_check_refresh):
+        EquityCurveService.get_curves([self.account])
+
+        # Bulk writes send no signals, the sync bumps the version itself
+        changes = TradeChanges(self.account, ["4"])
+        ManualTrade.objects.bulk_create(
+            [
+                ManualTrade(
+                    account=self.account,
+                    exchange_id="4",
+                    profit=-500,
+                    open_time=at(4),
+                    close_time=at(4),
+                )
+            ]
+        )
+        AccountService.apply_trade_changes(changes.collect())
+        drawdown, _ = EquityCurveService.get_drawdown([self.account])
+
+        self.assertEqual(drawdown["max_drawdown"], 700)
+
+    def test_curve_is_not_cached_in_a_local_cache(self, mock_check_refresh):
+        EquityCurveService.get_curves([self.account])
+
+        with self.assertNumQueries(1):
+            EquityCurveService.get_curves([self.account])
+
+    @override_settings(UNDERWATER_CHART_MAX_POINTS=3)
+    def test_statistics_underwater_chart_is_limited(self, mock_check_refresh):
+        statistics = TradeService.get_statistics(self.user)
+
+        self.assertEqual(list(statistics["underwater_chart"].values()), [0, 300, 200])
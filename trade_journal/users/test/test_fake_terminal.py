@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from ..fake_terminal import FakeCTrader, FakeTerminal, FakeTerminalServer, generate_deals
+from ..models import ManualTrade, Platform, TradeAccount
+from ..services import AccountService
+from ..services.meta_trader_service import MetaTraderService
+
+User = get_user_model()
+
+
+class FakeTerminalTests(TestCase):
+    def test_histories_are_deterministic(self):
+        deals = generate_deals("1001", 100, seed=1)
+
+        self.assertEqual(deals, generate_deals("1001", 100, seed=1))
+        self.assertNotEqual(deals, generate_deals("1002", 100, seed=1))
+        # Growing a history only adds deals
+        self.assertEqual(
+            [deal for deal in generate_deals("1001", 120, seed=1) if deal in deals],
+            deals,
+        )
+        self.assertEqual(
+            FakeCTrader("Broker", "2001", "secret").positions(),
+            FakeCTrader("Broker", "2001", "secret").positions(),
+        )
+
+    def test_accounts_sync_from_the_fake_server(self):
+        user = User.objects.create_user(
+            username="testuser", email="test@test.com", password="testpass123"
+        )
+        account = TradeAccount.objects.create(
+            user=user, account_id="1001", platform=Platform.meta_trader_5
+        )
+        terminal = FakeTerminal(deals=40, new_deals=4)
+
+        with FakeTerminalServer(terminal) as server, override_settings(
+            TERMINAL_SERVER_URL=server.url
+        ):
+            self.assertEqual(
+                MetaTraderService.authenticate_sync("Broker", "1001", "secret", "mt5"),
+                ("1001", "USD"),
+            )
+            AccountService.refresh_account(account)
+            self.assertEqual(ManualTrade.objects.filter(account=account).count(), 21)
+
+            AccountService.refresh_account(account)
+
+        # The deposit and 22 positions
+        self.assertEqual(ManualTrade.objects.filter(account=account).count(), 23)
+        self.assertEqual(terminal.requests, 3)
+
+    def test_failing_requests(self):
+        terminal = FakeTerminal(error_rate=1)
+
+        self.assertEqual(terminal.handle("/api/mt5/get_trades/", {})[0], 503)
+        self.assertEqual(terminal.errors, 1)
@@ -0,0 +1,201 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from ..models import ManualTrade, Platform, TradeAccount
+from ..services import AccountService
+from ..services.meta_trader_service import MetaTraderService
+from .test_snapshot_service import deal
+
+User = get_user_model()
+
+START = datetime(2024, 3, 4, 10, tzinfo=timezone.utc)
+
+
+class IncrementalSyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@test.com", password="testpass123"
+        )
+        self.account = TradeAccount.objects.create(
+            user=self.user, account_id="1001", platform=Platform.meta_trader_5
+        )
+        self.history = [
+            dict(deal(1, 0, START, 1.1), ticket=11),
+            dict(deal(1, 1, START + timedelta(hours=1), 1.2, profit=50), ticket=12),
+        ]
+        self.requests = []
+
+        def fetch_trades_terminal(account_id, since=None):
+            # Like a terminal without since support, the client filters
+            self.requests.append(since)
+            return list(self.history)
+
+        patcher = patch.object(
+            MetaTraderService,
+            "fetch_trades_terminal",
+            side_effect=fetch_trades_terminal,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sync(self):
+        with patch.object(
+            MetaTraderService,
+            "update_trades",
+            wraps=MetaTraderService.update_trades,
+        ) as update_trades:
+            MetaTraderService.refresh_account(self.account)
+        return update_trades.call_args.args[0] if update_trades.called else []
+
+    def test_only_deals_after_the_cursor_are_written(self):
+        self.assertEqual(len(self.sync()), 2)
+        self.account.refresh_from_db()
+        cursor = int((START + timedelta(hours=1)).timestamp() * 1000)
+        self.assertEqual(self.account.sync_cursor_time_msc, cursor)
+        self.assertEqual(self.account.sync_cursor_ticket, 12)
+
+        self.assertEqual(self.sync(), [])
+
+        self.history.append(
+            dict(deal(2, 0, START + timedelta(hours=2), 1.3), ticket=13)
+        )
+        written = self.sync()
+
+        self.assertEqual([trade["ticket"] for trade in written], [13])
+        self.assertEqual(self.requests, [None, cursor, cursor])
+        self.assertEqual(ManualTrade.objects.filter(account=self.account).count(), 2)
+
+    def test_full_reconcile_when_due(self):
+        self.sync()
+        TradeAccount.objects.filter(id=self.account.id).update(
+            last_full_sync_at=datetime(2020, 1, 1, tzinfo=timezone.utc)
+        )
+        self.account.refresh_from_db()
+
+        self.assertEqual(len(self.sync()), 2)
+        self.assertEqual(self.requests, [None, None])
+
+    def test_cursor_is_kept_when_terminal_is_unreachable(self):
+        self.sync()
+        self.account.refresh_from_db()
+        cursor = self.account.sync_cursor_time_msc
+
+        MetaTraderService.fetch_trades_terminal.side_effect = lambda *args, **kwargs: None
+        self.sync()
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.sync_cursor_time_msc, cursor)
+
+    def test_position_closed_over_two_syncs(self):
+        self.history += [
+            dict(deal(3, 0, START + timedelta(hours=2), 1.3), ticket=13, volume=2.0),
+            dict(deal(3, 1, START + timedelta(hours=3), 1.31, profit=30), ticket=14),
+        ]
+        AccountService.refresh_account(self.account)
+
+        self.history.append(
+            dict(deal(3, 1, START + timedelta(hours=4), 1.32, profit=20), ticket=15)
+        )
+        self.assertEqual([trade["ticket"] for trade in self.sync()], [15])
+
+        trade = ManualTrade.objects.get(account=self.account, exchange_id="3")
+        self.assertEqual(trade.profit, 50)
+        self.assertEqual(trade.volume, 2.0)
+        self.assertEqual(trade.close_time, START + timedelta(hours=4))
+
+        AccountService.update_account_cache(self.account)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("100.00"))
+
+    def test_balance_moves_by_the_synced_profit(self):
+        AccountService.refresh_account(self.account)
+        self.assertEqual(self.account.balance, Decimal("50.00"))
+
+        self.history += [
+            dict(deal(2, 0, START + timedelta(hours=2), 1.3), ticket=13),
+            dict(deal(2, 1, START + timedelta(hours=3), 1.29, profit=-20.5), ticket=14),
+        ]
+        with patch.object(
+            AccountService,
+            "calculate_account_balance",
+            wraps=AccountService.calculate_account_balance,
+        ) as calculate_account_balance:
+            AccountService.refresh_account(self.account)
+
+        calculate_account_balance.assert_not_called()
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("29.50"))
+
+    def test_balance_is_reconciled_when_due(self):
+        AccountService.refresh_account(self.account)
+        TradeAccount.objects.filter(id=self.account.id).update(
+            balance=Decimal("49.99"),
+            balance_reconciled_at=datetime(2020, 1, 1, tzinfo=timezone.utc),
+        )
+        self.account.refresh_from_db()
+
+        AccountService.refresh_account(self.account)
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("50.00"))
+        self.assertGreater(self.account.balance_reconciled_at, START)
+
+
+class PositionFoldingTests(TestCase):
+    def test_deals_fold_into_one_record_per_position(self):
+        deals = [
+            deal(1, 0, START, 1.1),
+            dict(deal(1, 1, START + timedelta(hours=1), 1.2, profit=20), volume=0.5),
+            deal(2, 0, START + timedelta(hours=1), 1.3, symbol="GBPUSD"),
+            dict(deal(1, 1, START + timedelta(hours=2), 1.25, profit=30), volume=0.5),
+        ]
+
+        positions = MetaTraderService.get_positions(deals)
+
+        self.assertEqual(list(positions), ["1", "2"])
+        closed = positions["1"]
+        self.assertEqual(closed["profit"], 50)
+        self.assertEqual(closed["volume"], 1.0)
+        self.assertEqual(closed["close_price"], 1.25)
+        self.assertEqual(closed["open_time"], START)
+        self.assertEqual(closed["close_time"], START + timedelta(hours=2))
+        self.assertEqual(closed["duration_in_minutes"], 120)
+        self.assertNotIn("duration_in_minutes", positions["2"])
+
+    def test_each_position_is_written_once(self):
+        user = User.objects.create_user(
+            username="testuser", email="test@test.com", password="testpass123"
+        )
+        account = TradeAccount.objects.create(
+            user=user, account_id="1001", platform=Platform.meta_trader_5
+        )
+        deals = [
+            deal(1, 0, START, 1.1),
+            deal(1, 1, START + timedelta(hours=1), 1.2, profit=50),
+            deal(2, 0, START + timedelta(hours=2), 1.3),
+            deal(2, 1, START + timedelta(hours=3), 1.4, profit=-20),
+        ]
+        writes = []
+
+        def count_writes(execute, sql, params, many, context):
+            if sql.startswith("INSERT INTO \"users_manualtrade\""):
+                writes.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_writes):
+            MetaTraderService.update_trades(deals, account)
+
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(
+            sorted(
+                ManualTrade.objects.filter(account=account).values_list(
+                    "exchange_id", "profit", "duration_in_minutes"
+                )
+            ),
+            [("1", 50, 60), ("2", -20, 60)],
+        )
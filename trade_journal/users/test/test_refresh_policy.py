@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ..models import ManualTrade, Platform, TradeAccount
+from ..services import AccountService
+from ..services.refresh_policy import RefreshPolicy, get_market_reopen
+
+User = get_user_model()
+
+# A Wednesday, the market is open
+NOW = datetime(2024, 3, 6, 12, tzinfo=timezone.utc)
+
+
+@override_settings(
+    ACCOUNT_REFRESH_TTL_MIN=10,
+    ACCOUNT_REFRESH_TTL_MAX=3600,
+    ACCOUNT_REFRESH_OFFLINE_FACTOR=10,
+)
+class RefreshPolicyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@test.com", password="testpass123"
+        )
+        self.account = TradeAccount.objects.create(
+            user=self.user, account_id="1001", platform=Platform.meta_trader_5
+        )
+
+    def trade(self, closed_ago, symbol="EURUSD", **kwargs):
+        close_time = NOW - closed_ago if closed_ago is not None else None
+        return ManualTrade.objects.create(
+            account=self.account,
+            symbol=symbol,
+            open_time=NOW - (closed_ago or timedelta()) - timedelta(minutes=5),
+            close_time=close_time,
+            profit=10,
+            **kwargs,
+        )
+
+    def get_ttl(self, now=NOW):
+        return RefreshPolicy.get_ttl(self.account, now)
+
+    def test_ttl_grows_with_time_since_last_trade(self):
+        RefreshPolicy.mark_user_seen(self.user)
+
+        self.assertEqual(self.get_ttl(), 15 * 60)
+
+        trade = self.trade(timedelta(days=3))
+        self.assertEqual(self.get_ttl(), 5 * 60)
+
+        trade.close_time = NOW - timedelta(minutes=10)
+        trade.save()
+        self.assertEqual(self.get_ttl(), 10)
+
+    def test_open_positions_keep_the_floor(self):
+        RefreshPolicy.mark_user_seen(self.user)
+        self.trade(None)
+
+        self.assertEqual(self.get_ttl(), 10)
+
+    def test_deposits_are_not_activity(self):
+        RefreshPolicy.mark_user_seen(self.user)
+        self.trade(timedelta(minutes=1), symbol="", is_top_up=True)
+
+        self.assertEqual(self.get_ttl(), 15 * 60)
+
+    def test_offline_users_are_refreshed_less_often(self):
+        trade = self.trade(timedelta(hours=3))
+        self.assertEqual(self.get_ttl(), 600)
+
+        trade.open_time = NOW - timedelta(days=4)
+        trade.close_time = NOW - timedelta(days=3)
+        trade.save()
+        self.assertEqual(self.get_ttl(), 3000)
+
+        # Capped by the ceiling
+        trade.delete()
+        self.assertEqual(self.get_ttl(), 3600)
+
+    def test_forex_accounts_wait_for_the_market_to_open(self):
+        RefreshPolicy.mark_user_seen(self.user)
+        self.trade(None)
+
+        saturday = datetime(2024, 3, 9, 21, 30, tzinfo=timezone.utc)
+        self.assertEqual(
+            get_market_reopen(saturday), datetime(2024, 3, 10, 22, tzinfo=timezone.utc)
+        )
+        self.assertEqual(self.get_ttl(saturday), 3600)
+
+        sunday_evening = datetime(2024, 3, 10, 21, 30, tzinfo=timezone.utc)
+        self.assertEqual(self.get_ttl(sunday_evening), 30 * 60)
+
+    def test_crypto_accounts_trade_through_the_weekend(self):
+        RefreshPolicy.mark_user_seen(self.user)
+        saturday = datetime(2024, 3, 9, 12, tzinfo=timezone.utc)
+        ManualTrade.objects.create(
+            account=self.account, symbol="BTCUSD", open_time=saturday, profit=0
+        )
+
+        self.assertEqual(self.get_ttl(saturday), 10)
+
+    def test_online_state_is_shared_through_the_database(self):
+        RefreshPolicy.mark_user_seen(self.user)
+        cache.clear()
+
+        self.assertTrue(RefreshPolicy.is_user_online(self.user.id))
+        with self.assertNumQueries(0):
+            self.assertFalse(RefreshPolicy.mark_user_seen(self.user))
+
+    def test_returning_user_expires_long_cache_times(self):
+        cached_until = datetime.now(timezone.utc) + timedelta(hours=1)
+        TradeAccount.objects.filter(id=self.account.id).update(
+            cached_at=datetime.now(timezone.utc), cached_until=cached_until
+        )
+
+        self.assertTrue(RefreshPolicy.mark_user_seen(self.user))
+        self.assertFalse(RefreshPolicy.mark_user_seen(self.user))
+        User.objects.filter(id=self.user.id).update(
+            last_seen_at=datetime.now(timezone.utc) - timedelta(hours=1)
+        )
+        self.user.refresh_from_db()
+
+        with override_settings(ACCOUNT_REFRESH_MODE="background"):
+            AccountService.check_refresh(self.user)
+
+        self.account.refresh_from_db()
+        self.assertLess(self.account.cached_until, cached_until)
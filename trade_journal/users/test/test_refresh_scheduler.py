@@ -0,0 +1,159 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from ..models import ManualTrade, Platform, TradeAccount
+from ..services import AccountService
+from ..services.refresh_scheduler import AccountRefreshScheduler
+from .test_snapshot_service import deal
+
+User = get_user_model()
+
+START = datetime(2024, 3, 4, 10, tzinfo=timezone.utc)
+
+
+class StubTerminalHandler(BaseHTTPRequestHandler):
+    deals = {
+        "1001": [
+            deal(1, 0, START, 1.1),
+            deal(1, 1, START + timedelta(hours=1), 1.2, profit=50),
+        ]
+    }
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append((self.path, body))
+
+        payload = json.dumps(
+            {"orders": self.deals.get(body.get("account_id"), [])}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class AccountRefreshSchedulerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubTerminalHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.terminal_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        StubTerminalHandler.requests.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@test.com", password="testpass123"
+        )
+        self.account = TradeAccount.objects.create(
+            user=self.user,
+            account_id="1001",
+            platform=Platform.meta_trader_5,
+            balance=Decimal("0"),
+        )
+        TradeAccount.objects.create(
+            user=self.user,
+            account_id="1002",
+            platform=Platform.meta_trader_5,
+            disabled=True,
+        )
+
+    def test_refreshes_due_accounts_from_terminal(self):
+        scheduler = AccountRefreshScheduler()
+
+        with override_settings(TERMINAL_SERVER_URL=self.terminal_url):
+            refreshed = scheduler.run_pending()
+
+        self.account.refresh_from_db()
+        self.assertEqual(refreshed, 1)
+        self.assertEqual(
+            StubTerminalHandler.requests,
+            [("/api/mt5/get_trades/", {"account_id": "1001"})],
+        )
+        self.assertEqual(ManualTrade.objects.get(account=self.account).profit, 50)
+        self.assertEqual(self.account.balance, Decimal("50.00"))
+        self.assertEqual(
+            scheduler.queue, [(self.account.cached_until.timestamp(), self.account.id)]
+        )
+
+        # Nothing is due until the cache of the account expires
+        with override_settings(TERMINAL_SERVER_URL=self.terminal_url):
+            self.assertEqual(scheduler.run_pending(), 0)
+
+    @patch(
+        "users.services.account_service.AccountService.refresh_account",
+        side_effect=ConnectionError,
+    )
+    def test_failed_refresh_is_retried(self, mock_refresh_account):
+        scheduler = AccountRefreshScheduler(retry_delay=30)
+
+        self.assertEqual(scheduler.run_pending(now=1000), 0)
+        self.assertEqual(scheduler.failed, 1)
+        self.assertEqual(scheduler.queue, [(1030, self.account.id)])
+
+    @override_settings(ACCOUNT_REFRESH_MODE="background")
+    @patch(
+        "users.services.account_service.AccountService.refresh_accounts",
+        return_value={},
+    )
+    def test_reads_do_not_refresh_in_background_mode(self, mock_refresh_accounts):
+        AccountService.check_refresh(self.user)
+        mock_refresh_accounts.assert_not_called()
+
+        AccountService.check_refresh(self.user, force_refresh=True)
+        self.assertEqual(len(mock_refresh_accounts.call_args.args[0]), 2)
+
+
+class ConcurrentRefreshTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@test.com", password="testpass123"
+        )
+        for account_id in range(4):
+            TradeAccount.objects.create(
+                user=self.user,
+                account_id=str(account_id),
+                platform=Platform.meta_trader_5,
+            )
+
+    @override_settings(ACCOUNT_REFRESH_CONCURRENCY=4)
+    def test_accounts_are_fetched_in_parallel(self):
+        fetch_threads = set()
+
+        def slow_fetch(account_id):
+            fetch_threads.add(threading.current_thread().name)
+            time.sleep(0.2)
+            return []
+
+        with patch(
+            "users.services.meta_trader_service.MetaTraderService.fetch_trades_terminal",
+            side_effect=slow_fetch,
+        ):
+            started = time.monotonic()
+            AccountService.check_refresh(self.user)
+            elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 0.6)
+        self.assertEqual(len(fetch_threads), 4)
+        self.assertFalse(
+            TradeAccount.objects.filter(user=self.user, cached_until=None).exists()
+        )
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import ManualTrade, Platform, TradeAccount
+from ..services import AccountService
+
+User = get_user_model()
+
+
+@override_settings(ACCOUNT_REFRESH_MODE="revalidate", ACCOUNT_REFRESH_MAX_STALENESS=600)
+class StaleWhileRevalidateTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@test.com", password="testpass123"
+        )
+        self.now = datetime.now(timezone.utc)
+        self.account = TradeAccount.objects.create(
+            user=self.user,
+            account_id="1001",
+            platform=Platform.meta_trader_5,
+            cached_at=self.now - timedelta(minutes=2),
+            cached_until=self.now - timedelta(minutes=1),
+        )
+
+        patcher = patch("users.services.background_refresh.refresh_in_background")
+        self.refresh_in_background = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # The user is online, their accounts are not expired for coming back
+        patcher = patch(
+            "users.services.refresh_policy.RefreshPolicy.mark_user_seen",
+            return_value=False,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch.object(AccountService, "refresh_accounts", return_value={})
+    def test_stale_accounts_refresh_after_the_read(self, refresh_accounts):
+        AccountService.check_refresh(self.user)
+
+        self.refresh_in_background.assert_called_once_with([self.account])
+        refresh_accounts.assert_called_once_with([], stale_only=True)
+
+    @patch.object(AccountService, "refresh_accounts", return_value={})
+    def test_very_old_accounts_refresh_before_the_read(self, refresh_accounts):
+        TradeAccount.objects.filter(id=self.account.id).update(
+            cached_at=self.now - timedelta(hours=1)
+        )
+
+        AccountService.check_refresh(self.user)
+
+        self.refresh_in_background.assert_called_once_with([])
+        refresh_accounts.assert_called_once_with([self.account], stale_only=True)
+
+    @patch("users.services.TradeService.get_exchange", return_value=1)
+    def test_responses_carry_data_as_of(self, mock_get_exchange):
+        TradeAccount.objects.create(
+            user=self.user,
+            account_id="1002",
+            platform=Platform.meta_trader_5,
+            cached_at=self.now,
+            disabled=True,
+        )
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        response = client.get(reverse("comprehensive-trade-statistics"))
+
+        self.assertEqual(response.status_code, 200)
+        data_as_of = self.now - timedelta(minutes=2)
+        self.assertEqual(response.data["data_as_of"], data_as_of)
+        self.assertEqual(response["X-Data-As-Of"], data_as_of.isoformat())
+
+    @patch("users.services.TradeService.get_exchange", return_value=1)
+    def test_balance_chart_only_carries_dates(self, mock_get_exchange):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        response = client.get(reverse("account-balance-statistics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {})
+
+        ManualTrade.objects.create(
+            account=self.account,
+            exchange_id="1",
+            profit=100,
+            is_top_up=True,
+            open_time=self.now - timedelta(days=1),
+            close_time=self.now - timedelta(days=1),
+        )
+        response = client.get(reverse("account-balance-statistics"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data)
+        for key in response.data:
+            datetime.strptime(key, "%Y-%m-%d %H:%M:%S")
+        self.assertEqual(
+            response["X-Data-As-Of"], (self.now - timedelta(minutes=2)).isoformat()
+        )
+
+    def test_data_as_of_is_unknown_until_every_account_refreshed(self):
+        TradeAccount.objects.create(
+            user=self.user, account_id="1002", platform=Platform.meta_trader_5
+        )
+
+        self.assertIsNone(AccountService.get_data_as_of(self.user))
@@ -0,0 +1,90 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from ..models import Platform, TradeAccount
+from ..services import AccountService
+from ..services.single_flight import account_refreshes
+
+User = get_user_model()
+
+
+class CoalescedRefreshTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@test.com", password="testpass123"
+        )
+        self.account = TradeAccount.objects.create(
+            user=self.user, account_id="1001", platform=Platform.meta_trader_5
+        )
+
+    def refresh_concurrently(self, result):
+        """
+        Refreshes the account while another thread is refreshing it,
+        returns the errors of both callers
+        """
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def run_refreshes(accounts):
+            calls.append([account.id for account in accounts])
+            started.set()
+            release.wait(5)
+            return result
+
+        leader_errors = {}
+
+        with patch.object(AccountService, "run_refreshes", side_effect=run_refreshes):
+            leader = threading.Thread(
+                target=lambda: leader_errors.update(
+                    AccountService.refresh_accounts([TradeAccount(id=self.account.id)])
+                )
+            )
+            leader.start()
+            started.wait(5)
+
+            threading.Timer(0.1, release.set).start()
+            errors = AccountService.refresh_accounts(
+                [TradeAccount.objects.get(id=self.account.id)]
+            )
+            leader.join(5)
+
+        self.assertEqual(calls, [[self.account.id]])
+        return leader_errors, errors
+
+    def test_concurrent_callers_share_one_refresh(self):
+        joined = account_refreshes.get_metrics()["joined"]
+
+        leader_errors, errors = self.refresh_concurrently({})
+
+        self.assertEqual((leader_errors, errors), ({}, {}))
+        self.assertEqual(account_refreshes.get_metrics()["joined"], joined + 1)
+        self.assertEqual(account_refreshes.get_metrics()["in_flight"], 0)
+
+    def test_error_of_the_refresh_is_shared(self):
+        error = ConnectionError("Terminal unreachable")
+
+        leader_errors, errors = self.refresh_concurrently({self.account.id: error})
+
+        self.assertIs(leader_errors[self.account.id], error)
+        self.assertIs(errors[self.account.id], error)
+
+    def test_accounts_refreshed_meanwhile_are_skipped(self):
+        stale = TradeAccount.objects.get(id=self.account.id)
+        TradeAccount.objects.filter(id=self.account.id).update(
+            cached_at=datetime.now(timezone.utc),
+            cached_until=datetime.now(timezone.utc) + timedelta(minutes=1),
+        )
+
+        with patch.object(
+            AccountService, "run_refreshes", return_value={}
+        ) as run_refreshes:
+            AccountService.refresh_accounts([stale], stale_only=True)
+            run_refreshes.assert_not_called()
+
+            AccountService.refresh_accounts([stale])
+            run_refreshes.assert_called_once_with([stale])
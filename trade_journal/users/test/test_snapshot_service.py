@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import AccountStatisticsSnapshot, ManualTrade, TradeAccount
+from ..services import TradeService
+from ..services.meta_trader_service import MetaTraderService
+from ..services.snapshot_service import StatisticsSnapshotService
+
+User = get_user_model()
+
+DRAWDOWN_FIELDS = (
+    "max_drawdown",
+    "max_drawdown_percent",
+    "average_drawdown",
+    "average_drawdown_percent",
+)
+
+
+def deal(position_id, entry, time, price, profit=0, symbol="EURUSD"):
+    return {
+        "position_id": position_id,
+        "entry": entry,
+        "type": 0 if entry == 0 else 1,
+        "symbol": symbol,
+        "volume": 1.0,
+        "price": price,
+        "profit": profit,
+        "time": int(time.timestamp()),
+        "time_msc": int(time.timestamp() * 1000),
+    }
+
+
+@patch("users.services.AccountService.check_refresh")
+class StatisticsSnapshotTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@test.com", password="testpass123"
+        )
+        self.account = TradeAccount.objects.create(
+            user=self.user, balance=Decimal("1000.00")
+        )
+        self.start = datetime(2024, 3, 4, 10, tzinfo=timezone.utc)
+
+        MetaTraderService.update_trades(
+            [
+                deal(1, 0, self.start, 1.1),
+                deal(1, 1, self.start + timedelta(hours=1), 1.2, profit=50),
+                deal(2, 0, self.start + timedelta(days=1), 1.3, symbol="GBPUSD"),
+            ],
+            self.account,
+        )
+
+    def assertMatchesFullScan(self):
+        snapshot_statistics = TradeService.get_statistics(self.user, backend="snapshot")
+        python_statistics = TradeService.get_statistics(self.user, backend="python")
+
+        snapshot_overall = snapshot_statistics["overall_statistics"]
+        python_overall = python_statistics["overall_statistics"]
+        for field in DRAWDOWN_FIELDS:
+            snapshot_overall.pop(field)
+            python_overall.pop(field)
+
+        self.assertEqual(snapshot_overall, python_overall)
+        self.assertCountEqual(
+            snapshot_statistics["symbol_performances"],
+            python_statistics["symbol_performances"],
+        )
+        self.assertEqual(
+            snapshot_statistics["day_performances"],
+            python_statistics["day_performances"],
+        )
+
+    def test_snapshot_is_built_on_first_read(self, mock_check_refresh):
+        self.assertFalse(AccountStatisticsSnapshot.objects.exists())
+
+        self.assertMatchesFullScan()
+
+        snapshot = AccountStatisticsSnapshot.objects.get(account=self.account)
+        self.assertEqual(snapshot.trade_count, 2)
+
+    def test_sync_updates_snapshot(self, mock_check_refresh):
+        StatisticsSnapshotService.rebuild(self.account)
+
+        MetaTraderService.update_trades(
+            [
+                deal(2, 1, self.start + timedelta(days=1, hours=2), 1.25, profit=-20),
+                deal(3, 0, self.start + timedelta(days=2), 1.4),
+            ],
+            self.account,
+        )
+
+        snapshot = AccountStatisticsSnapshot.objects.get(account=self.account)
+        self.assertEqual(snapshot.trade_count, 3)
+        self.assertFalse(snapshot.is_stale)
+        self.assertMatchesFullScan()
+
+    def test_unchanged_sync_keeps_snapshot(self, mock_check_refresh):
+        snapshot = StatisticsSnapshotService.rebuild(self.account)
+
+        MetaTraderService.update_trades(
+            [deal(1, 1, self.start + timedelta(hours=1), 1.2, profit=50)],
+            self.account,
+        )
+
+        self.assertEqual(
+            AccountStatisticsSnapshot.objects.get(account=self.account).state,
+            snapshot.state,
+        )
+
+    def test_rebuild_command(self, mock_check_refresh):
+        StatisticsSnapshotService.rebuild(self.account)
+        ManualTrade.objects.filter(exchange_id="2").update(profit=10)
+
+        call_command(
+            "rebuild_statistics_snapshots", account=[self.account.id], stdout=StringIO()
+        )
+
+        self.assertMatchesFullScan()
@@ -0,0 +1,245 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import unittest
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import ManualTrade, TradeAccount, TradeType
+from ..services import TradeService
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+User = get_user_model()
+
+
+class CalculateStatisticsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@test.com", password="testpass123"
+        )
+        self.account = TradeAccount.objects.create(
+            user=self.user, balance=Decimal("1000.00")
+        )
+        start = datetime(2024, 1, 1, 9, tzinfo=timezone.utc)  # Monday
+
+        self.create_trade(start, 60, profit=30, gain="0.03")
+        self.create_trade(start + timedelta(days=1), 30, profit=-10, gain="-0.01")
+        self.create_trade(start + timedelta(days=2), 90, profit=0.1, gain="0.001")
+        self.create_trade(
+            start + timedelta(days=2, hours=5), None, profit=0, gain="0", symbol="GBPUSD"
+        )
+
+    def create_trade(self, open_time, minutes, profit, gain, symbol="EURUSD"):
+        return ManualTrade.objects.create(
+            account=self.account,
+            symbol=symbol,
+            trade_type=TradeType.buy if profit >= 0 else TradeType.sell,
+            quantity=1,
+            profit=profit,
+            gain=Decimal(gain),
+            open_time=open_time,
+            close_time=open_time + timedelta(minutes=minutes) if minutes else None,
+            duration_in_minutes=minutes or 0,
+        )
+
+    def get_statistics(self):
+        trades = ManualTrade.objects.filter(account__user=self.user).order_by(
+            "-close_time"
+        )
+        return TradeService.calculate_statistics(trades, [self.account])
+
+    def test_overall_statistics(self):
+        overall = self.get_statistics()["overall_statistics"]
+
+        self.assertEqual(overall["balance"], Decimal("1000.00"))
+        self.assertEqual(overall["total_trades"], 4)
+        self.assertEqual(overall["open_trades"], 1)
+        self.assertEqual(overall["long"], 3)
+        self.assertEqual(overall["short"], 1)
+        self.assertEqual(overall["breakeven_trades"], 2)
+        self.assertEqual(overall["countable_trades"], 2)
+        self.assertEqual(overall["win_rate"], 50)
+        self.assertEqual(overall["best_win"], 30)
+        self.assertEqual(overall["worst_loss"], -10)
+        self.assertEqual(overall["profit_factor"], 3)
+        self.assertEqual(overall["average_holding_time_minutes"], 60)
+        self.assertEqual(overall["winning_days"], 2)
+        self.assertEqual(overall["losing_days"], 1)
+        self.assertEqual(overall["max_consecutive_winning_days"], 1)
+        self.assertEqual(overall["max_consecutive_losing_days"], 1)
+
+    def test_groupings(self):
+        statistics = self.get_statistics()
+
+        symbols = {s["symbol"]: s for s in statistics["symbol_performances"]}
+        self.assertEqual(symbols["EURUSD"]["total_trades"], 3)
+        self.assertEqual(symbols["GBPUSD"]["breakeven_trades"], 1)
+
+        self.assertEqual(len(statistics["day_performances"]), 3)
+        self.assertEqual(statistics["day_performances"]["2024-01-01"]["total_won"], 30)
+        # Months are those of the close days, the open trade is in none
+        self.assertEqual(statistics["monthly_summary"][0]["month"], "2024-01")
+        self.assertEqual(statistics["monthly_summary"][0]["total_trades"], 3)
+
+        self.assertEqual(
+            statistics["day_of_week_analysis"]["raw_counts"]["Wednesday"], 2
+        )
+        self.assertEqual(
+            statistics["day_of_week_analysis"]["distribution"]["Wednesday"], 1
+        )
+        self.assertEqual(statistics["session_analysis"]["raw_counts"]["london"], 3)
+        self.assertEqual(statistics["session_analysis"]["raw_counts"]["new-york"], 1)
+
+    def test_single_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.get_statistics()
+
+        self.assertEqual(len(queries), 1)
+
+    def test_no_trades(self):
+        statistics = TradeService.calculate_statistics(
+            ManualTrade.objects.none(), [self.account]
+        )
+
+        self.assertEqual(statistics["overall_statistics"]["total_trades"], 0)
+        self.assertEqual(statistics["symbol_performances"], [])
+
+    @unittest.skipUnless(numpy, "numpy is not installed")
+    def test_numpy_backend_matches_python_backend(self):
+        trades = ManualTrade.objects.filter(account__user=self.user).order_by(
+            "-close_time"
+        )
+
+        python_statistics = TradeService.calculate_statistics(
+            trades, [self.account], backend="python"
+        )
+        numpy_statistics = TradeService.calculate_statistics(
+            trades, [self.account], backend="numpy"
+        )
+
+        self.assertEqual(python_statistics, numpy_statistics)
+
+    @unittest.skipUnless(numpy, "numpy is not installed")
+    def test_numpy_backend_matches_python_backend_on_losing_days(self):
+        ManualTrade.objects.all().delete()
+        start = datetime(2024, 3, 4, 9, tzinfo=timezone.utc)
+        for day, profit in enumerate((-3, -5, -4)):
+            self.create_trade(start + timedelta(days=day), 30, profit=profit, gain="-0.01")
+        trades = ManualTrade.objects.filter(account__user=self.user).order_by(
+            "-close_time"
+        )
+
+        python_statistics = TradeService.calculate_statistics(
+            trades, [self.account], backend="python"
+        )
+        numpy_statistics = TradeService.calculate_statistics(
+            trades, [self.account], backend="numpy"
+        )
+
+        self.assertEqual(python_statistics, numpy_statistics)
+        overall = numpy_statistics["overall_statistics"]
+        self.assertEqual(overall["largest_profitable_day"], -3)
+        self.assertEqual(overall["largest_losing_day"], -5)
+
+    @unittest.skipUnless(numpy, "numpy is not installed")
+    def test_numpy_backend_reads_lists_of_trades(self):
+        trades = list(
+            ManualTrade.objects.filter(account__user=self.user).order_by("-close_time")
+        )
+
+        self.assertEqual(
+            TradeService.calculate_statistics(trades, [self.account], backend="python"),
+            TradeService.calculate_statistics(trades, [self.account], backend="numpy"),
+        )
+
+    def test_database_backend_matches_python_backend(self):
+        start = datetime(2024, 2, 5, 23, 30, tzinfo=timezone.utc)
+        self.create_trade(start, 45, profit=12.5, gain="0.02", symbol="XAUUSD")
+        self.create_trade(start + timedelta(days=6), None, profit=-4, gain="-0.004")
+        ManualTrade.objects.create(account=self.account, symbol="", profit=None)
+        trades = ManualTrade.objects.filter(account__user=self.user).order_by(
+            "-close_time"
+        )
+
+        python_statistics = TradeService.calculate_statistics(
+            trades, [self.account], backend="python"
+        )
+        with CaptureQueriesContext(connection) as queries:
+            database_statistics = TradeService.calculate_statistics(
+                trades, [self.account], backend="database"
+            )
+
+        self.assertEqual(len(queries), 4)
+        self.assertEqual(python_statistics, database_statistics)
+
+    @patch("users.services.AccountService.check_refresh")
+    def test_statistics_comparison(self, mock_check_refresh):
+        comparison = TradeService.get_statistics_comparison(
+            self.user, from_date=datetime(2024, 1, 3), to_date=datetime(2024, 1, 5)
+        )
+
+        current = comparison["statistics"]["overall_statistics"]
+        previous = comparison["previous_statistics"]["overall_statistics"]
+        self.assertEqual(current["total_trades"], 1)
+        self.assertEqual(current["total_profit"], 0.1)
+        self.assertEqual(previous["total_trades"], 1)
+        self.assertEqual(previous["total_profit"], 30)
+        self.assertAlmostEqual(comparison["deltas"]["total_profit"], -29.9)
+        self.assertEqual(comparison["deltas"]["total_trades"], 0)
+
+    @patch("users.services.AccountService.check_refresh")
+    def test_statistics_comparison_backends_match(self, mock_check_refresh):
+        backends = ["python", "database"]
+        if numpy:
+            backends.append("numpy")
+
+        comparisons = [
+            TradeService.compute_statistics_comparison(
+                self.user,
+                from_date=datetime(2024, 1, 3),
+                to_date=datetime(2024, 1, 5),
+                backend=backend,
+            )
+            for backend in backends
+        ]
+
+        for backend, comparison in zip(backends[1:], comparisons[1:]):
+            with self.subTest(backend=backend):
+                self.assertEqual(comparison, comparisons[0])
+        self.assertEqual(
+            comparisons[0]["statistics"]["overall_statistics"]["total_trades"], 1
+        )
+        self.assertEqual(
+            comparisons[0]["previous_statistics"]["overall_statistics"]["total_trades"], 1
+        )
+
+    @patch("users.services.trade_service.find_spec", return_value=None)
+    @patch("users.services.AccountService.check_refresh")
+    def test_numpy_backend_without_numpy(self, mock_check_refresh, mock_find_spec):
+        with self.assertRaises(ValueError):
+            TradeService.get_statistics_backend("numpy")
+
+        with override_settings(TRADE_STATISTICS_BACKEND="numpy"):
+            self.assertEqual(TradeService.get_statistics_backend(), "python")
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.get(
+            reverse("comprehensive-trade-statistics"), {"backend": "numpy"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            TradeService.calculate_statistics(
+                ManualTrade.objects.all(), [self.account], backend="fortran"
+            )
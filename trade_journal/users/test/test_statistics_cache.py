@@ -0,0 +1,99 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone as django_timezone
+
+from ..models import ManualTrade, TradeAccount
+from ..services import TradeService
+from ..services.statistics_cache import StatisticsCache
+
+User = get_user_model()
+
+
+@override_settings(STATISTICS_CACHE_ALLOW_LOCAL=True)
+@patch("users.services.TradeService.get_exchange", return_value=1)
+@patch("users.services.AccountService.check_refresh")
+class StatisticsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@test.com", password="testpass123"
+        )
+        self.account = TradeAccount.objects.create(
+            user=self.user, balance=Decimal("1000.00")
+        )
+        self.trade = ManualTrade.objects.create(
+            account=self.account,
+            symbol="EURUSD",
+            profit=10,
+            open_time=datetime(2024, 1, 1, 9, tzinfo=timezone.utc),
+            close_time=datetime(2024, 1, 1, 10, tzinfo=timezone.utc),
+        )
+
+    @override_settings(STATISTICS_CACHE_ALLOW_LOCAL=False)
+    def test_process_local_cache_is_not_used(self, mock_check_refresh, mock_get_exchange):
+        TradeService.get_statistics(self.user)
+        self.assertEqual(StatisticsCache.get_counters()["statistics"]["misses"], 0)
+
+        ManualTrade.objects.filter(id=self.trade.id).update(profit=30)
+        statistics = TradeService.get_statistics(self.user)
+        self.assertEqual(statistics["overall_statistics"]["total_profit"], 30)
+
+    def test_repeated_calls_are_served_from_cache(self, mock_check_refresh, mock_get_exchange):
+        first = TradeService.get_statistics(self.user)
+
+        with self.assertNumQueries(0):
+            second = TradeService.get_statistics(self.user)
+
+        self.assertEqual(first, second)
+        self.assertEqual(
+            StatisticsCache.get_counters()["statistics"], {"hits": 1, "misses": 1}
+        )
+
+    def test_trade_write_invalidates(self, mock_check_refresh, mock_get_exchange):
+        TradeService.get_statistics(self.user)
+
+        self.trade.profit = 25
+        self.trade.save()
+        statistics = TradeService.get_statistics(self.user)
+
+        self.assertEqual(statistics["overall_statistics"]["total_profit"], 25)
+        self.assertEqual(StatisticsCache.get_counters()["statistics"]["misses"], 2)
+
+    def test_cache_only_account_save_keeps_entries(self, mock_check_refresh, mock_get_exchange):
+        TradeService.get_account_performance(self.user)
+
+        self.account.cached_at = django_timezone.now()
+        self.account.save(update_fields=["cached_at", "updated_at"])
+        TradeService.get_account_performance(self.user)
+
+        self.account.account_name = "Renamed"
+        self.account.save()
+        performance = TradeService.get_account_performance(self.user)
+
+        self.assertEqual(
+            performance["accounts_performance"][0]["account_name"], "Renamed"
+        )
+        self.assertEqual(
+            StatisticsCache.get_counters()["account_performance"],
+            {"hits": 1, "misses": 2},
+        )
+
+    def test_accounts_are_refreshed_once_per_request(self, mock_check_refresh, mock_get_exchange):
+        for backend in ("python", "numpy", "snapshot", "database"):
+            cache.clear()
+            mock_check_refresh.reset_mock()
+            TradeService.get_statistics(self.user, backend=backend)
+            TradeService.get_account_performance(self.user, backend=backend)
+            self.assertEqual(mock_check_refresh.call_count, 2, backend)
+
+        mock_check_refresh.reset_mock()
+        TradeService.get_account_balance_chart(self.user)
+        TradeService.get_statistics_comparison(
+            self.user, datetime(2024, 1, 1), datetime(2024, 1, 31)
+        )
+        self.assertEqual(mock_check_refresh.call_count, 2)
@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import AccountSyncLog, Platform, TradeAccount
+from ..services import AccountService, TradeService
+from ..services.meta_trader_service import MetaTraderService
+from .test_snapshot_service import deal
+
+User = get_user_model()
+
+START = datetime(2024, 3, 4, 10, tzinfo=timezone.utc)
+
+
+class SyncTelemetryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@test.com", password="testpass123"
+        )
+        self.account = TradeAccount.objects.create(
+            user=self.user, account_id="1001", platform=Platform.meta_trader_5
+        )
+        self.history = [
+            dict(deal(1, 0, START, 1.1), ticket=11),
+            dict(deal(1, 1, START + timedelta(hours=1), 1.2, profit=50), ticket=12),
+            dict(deal(2, 0, START + timedelta(hours=2), 1.3), ticket=13),
+        ]
+
+        patcher = patch.object(
+            MetaTraderService,
+            "fetch_trades_terminal",
+            side_effect=lambda account_id, since=None: list(self.history),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_refresh_is_logged(self):
+        AccountService.refresh_account(self.account)
+
+        log = AccountSyncLog.objects.get(account=self.account)
+        self.assertEqual(log.platform, Platform.meta_trader_5)
+        self.assertEqual(log.payload_size, 3)
+        self.assertEqual(log.rows_inserted, 2)
+        self.assertEqual(log.rows_updated, 0)
+        self.assertIsNone(log.lag_seconds)
+        self.assertEqual(log.error, "")
+        self.assertGreaterEqual(
+            log.total_seconds, log.fetch_seconds + log.parse_seconds + log.upsert_seconds
+        )
+
+        # Closing the open position changes one trade and leaves the other alone
+        self.history.append(
+            dict(deal(2, 1, START + timedelta(hours=3), 1.4, profit=10), ticket=14)
+        )
+        TradeAccount.objects.filter(id=self.account.id).update(last_full_sync_at=None)
+        self.account.refresh_from_db()
+        AccountService.refresh_account(self.account)
+
+        log = AccountSyncLog.objects.filter(account=self.account).latest("id")
+        self.assertEqual(
+            (log.rows_inserted, log.rows_updated, log.rows_unchanged), (0, 1, 1)
+        )
+        self.assertIsNotNone(log.lag_seconds)
+
+    def test_failed_refresh_is_logged(self):
+        MetaTraderService.fetch_trades_terminal.side_effect = RuntimeError("Terminal down")
+
+        with self.assertRaises(RuntimeError):
+            AccountService.refresh_account(self.account)
+
+        log = AccountSyncLog.objects.get(account=self.account)
+        self.assertEqual(log.error, "Terminal down")
+
+    @override_settings(ACCOUNT_SYNC_LOG_SIZE=3)
+    def test_only_the_latest_entries_are_kept(self):
+        for _ in range(5):
+            AccountService.refresh_account(self.account)
+
+        logs = AccountSyncLog.objects.filter(account=self.account)
+        self.assertEqual(logs.count(), 3)
+        self.assertEqual(
+            logs.latest("id").id - logs.earliest("id").id, 2
+        )
+
+    def test_report_is_for_staff_only(self):
+        AccountService.refresh_account(self.account)
+        client = APIClient()
+
+        client.force_authenticate(user=self.user)
+        self.assertEqual(client.get(reverse("sync-telemetry")).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        client.force_authenticate(user=self.user)
+        response = client.get(reverse("sync-telemetry"), {"hours": 1})
+
+        self.assertEqual(response.status_code, 200)
+        platform = response.data["platforms"][Platform.meta_trader_5]
+        self.assertEqual(platform["syncs"], 1)
+        self.assertEqual(platform["rows_inserted"], 2)
+        self.assertEqual(platform["histograms"]["total_seconds"]["+Inf"], 1)
+        self.assertEqual(response.data["slowest_accounts"][0]["account_id"], self.account.id)
+        self.assertEqual(response.data["stale_accounts"][0]["account_id"], self.account.id)
+        self.assertIn("terminal_client", response.data["process"])
+
+        self.assertEqual(
+            client.get(reverse("sync-telemetry"), {"hours": "x"}).status_code, 400
+        )
+
+    @override_settings(STATISTICS_CACHE_ALLOW_LOCAL=True)
+    @patch("users.services.TradeService.get_exchange", return_value=1)
+    def test_report_has_the_statistics_cache_counters(self, mock_get_exchange):
+        cache.clear()
+        with patch("users.services.AccountService.check_refresh"):
+            TradeService.get_statistics(self.user)
+            TradeService.get_statistics(self.user)
+
+        self.user.is_staff = True
+        self.user.save()
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        report = client.get(reverse("sync-telemetry")).data["statistics_cache"]
+
+        self.assertTrue(report["enabled"])
+        self.assertFalse(report["shared"])
+        self.assertEqual(report["counters"]["statistics"], {"hits": 1, "misses": 1})
+        self.assertEqual(report["counters"]["balance_chart"], {"hits": 0, "misses": 0})
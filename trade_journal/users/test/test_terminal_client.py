@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.test import SimpleTestCase, override_settings
+
+from ..services.terminal_client import (
+    TerminalClient,
+    get_terminal_client,
+    reset_terminal_client,
+)
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Status codes to answer with before answering 200
+    failures = []
+    delay = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(self.delay)
+
+        status = self.failures.pop(0) if self.failures else 200
+        payload = json.dumps({"orders": []}).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up waiting
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TerminalClientTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.terminal_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        KeepAliveHandler.failures = []
+        KeepAliveHandler.delay = 0
+        settings = override_settings(TERMINAL_SERVER_URL=self.terminal_url)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def get_client(self, **kwargs):
+        client = TerminalClient(retry_backoff=0, **kwargs)
+        self.addCleanup(client.close)
+        return client
+
+    def test_connections_are_reused(self):
+        client = self.get_client()
+
+        for _ in range(3):
+            response = client.post("/api/mt5/get_trades/", {"account_id": "1001"})
+            self.assertEqual(response.json(), {"orders": []})
+
+        metrics = client.get_metrics()
+        self.assertEqual(metrics["requests"], 3)
+        self.assertEqual(metrics["connections_opened"], 1)
+        self.assertEqual(metrics["idle_connections"], 1)
+
+    def test_gateway_errors_are_retried(self):
+        client = self.get_client(max_retries=2)
+        KeepAliveHandler.failures = [503, 502]
+
+        response = client.post("/api/mt5/get_trades/", {"account_id": "1001"})
+
+        self.assertEqual(response.status_code, 200)
+        metrics = client.get_metrics()
+        self.assertEqual((metrics["requests"], metrics["attempts"]), (1, 3))
+        self.assertEqual(metrics["failures"], 0)
+
+    def test_retries_are_bounded(self):
+        client = self.get_client(max_retries=1)
+        KeepAliveHandler.failures = [503, 503, 503]
+
+        response = client.post("/api/mt5/get_trades/", {"account_id": "1001"})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(client.get_metrics()["attempts"], 2)
+        self.assertEqual(client.get_metrics()["failures"], 1)
+
+    def test_hung_terminal_times_out(self):
+        client = self.get_client(read_timeout=0.1, max_retries=0)
+        KeepAliveHandler.delay = 0.5
+
+        started = time.monotonic()
+        with self.assertRaises(requests.RequestException):
+            client.post("/api/mt5/get_trades/", {"account_id": "1001"})
+
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(client.get_metrics()["failures"], 1)
+
+    def test_client_is_shared_within_process(self):
+        reset_terminal_client()
+        self.addCleanup(reset_terminal_client)
+
+        self.assertIs(get_terminal_client(), get_terminal_client())
@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import ManualTrade, Platform, TradeAccount, TradeType
+from ..services.meta_trader_service import MetaTraderService
+from ..services.trade_metrics import derive_trade_fields, get_pip_size
+from .test_snapshot_service import deal
+
+User = get_user_model()
+
+START = datetime(2024, 3, 4, 10, tzinfo=timezone.utc)
+
+
+def closed_trade(**values):
+    return {
+        "trade_type": TradeType.buy,
+        "symbol": "EURUSD",
+        "open_price": 1.1,
+        "close_price": 1.105,
+        "open_time": START,
+        "close_time": START + timedelta(minutes=90),
+        "profit": 50,
+        **values,
+    }
+
+
+class DeriveTradeFieldsTests(TestCase):
+    def test_pip_sizes(self):
+        self.assertEqual(get_pip_size("EURUSD"), 0.0001)
+        self.assertEqual(get_pip_size("USDJPY.m"), 0.01)
+        self.assertEqual(get_pip_size("XAUUSD"), 0.1)
+        self.assertIsNone(get_pip_size("US30"))
+        self.assertIsNone(get_pip_size("BTCUSD"))
+        self.assertIsNone(get_pip_size(None))
+
+    def test_closed_trade(self):
+        derived = derive_trade_fields(closed_trade(stop_loss=1.098))
+
+        self.assertEqual(derived["duration_in_minutes"], 90)
+        self.assertEqual(derived["gain"], 0.0045)
+        self.assertEqual(derived["success"], "win")
+        self.assertAlmostEqual(derived["pips"], 50)
+        self.assertAlmostEqual(derived["risk_in_pips"], 20)
+        self.assertAlmostEqual(derived["r_multiple"], 2.5)
+
+    def test_sell_and_scratch(self):
+        derived = derive_trade_fields(
+            closed_trade(trade_type=TradeType.sell, close_price=1.1001, profit=-1)
+        )
+
+        self.assertEqual(derived["gain"], -0.0001)
+        self.assertEqual(derived["success"], "scratch")
+        self.assertAlmostEqual(derived["pips"], -1)
+        self.assertNotIn("r_multiple", derived)
+
+    def test_open_positions_and_deposits_have_no_result(self):
+        self.assertEqual(derive_trade_fields(closed_trade(close_time=None)), {})
+        self.assertEqual(
+            derive_trade_fields(closed_trade(is_top_up=True)), {"duration_in_minutes": 90}
+        )
+
+    def test_pips_are_left_out_without_a_pip_size(self):
+        derived = derive_trade_fields(closed_trade(symbol="US30", stop_loss=1.09))
+
+        self.assertNotIn("pips", derived)
+        self.assertNotIn("risk_in_pips", derived)
+        self.assertAlmostEqual(derived["r_multiple"], 0.5)
+
+
+class TradeMetricsIngestTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@test.com", password="testpass123"
+        )
+        self.account = TradeAccount.objects.create(
+            user=self.user, account_name="Main", platform=Platform.meta_trader_5
+        )
+
+    def test_exit_in_a_later_sync_uses_the_stored_open_side(self):
+        MetaTraderService.update_trades([deal(1, 0, START, 1.1)], self.account)
+        opened = ManualTrade.objects.get(account=self.account, exchange_id="1")
+        self.assertIsNone(opened.success)
+
+        MetaTraderService.update_trades(
+            [deal(1, 1, START + timedelta(hours=2), 1.111, profit=100)], self.account
+        )
+
+        trade = ManualTrade.objects.get(account=self.account, exchange_id="1")
+        self.assertEqual(trade.duration_in_minutes, 120)
+        self.assertEqual(float(trade.gain), 0.01)
+        self.assertEqual(trade.success, "win")
+        self.assertAlmostEqual(trade.pips, 110)
+
+    def test_backfill_updates_stale_columns(self):
+        MetaTraderService.update_trades(
+            [
+                deal(1, 0, START, 1.1),
+                deal(1, 1, START + timedelta(hours=1), 1.111, profit=100),
+                deal(2, 0, START, 1.2),
+                deal(2, 1, START + timedelta(hours=1), 1.188, profit=-80),
+            ],
+            self.account,
+        )
+        ManualTrade.objects.filter(account=self.account).update(
+            gain=0, success=None, pips=0, duration_in_minutes=0
+        )
+
+        out = StringIO()
+        call_command("backfill_trade_metrics", "--chunk-size", "1", "--workers", "1", stdout=out)
+
+        trades = {
+            trade.exchange_id: trade
+            for trade in ManualTrade.objects.filter(account=self.account)
+        }
+        self.assertEqual(trades["1"].success, "win")
+        self.assertEqual(trades["2"].success, "loss")
+        self.assertEqual(float(trades["2"].gain), -0.01)
+        self.assertEqual(trades["2"].duration_in_minutes, 60)
+        self.assertIn("1 account(s)", out.getvalue())
+
+        out = StringIO()
+        call_command("backfill_trade_metrics", "--dry-run", "--workers", "1", stdout=out)
+        self.assertIn("0 account(s)", out.getvalue())
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from ..models import ManualTrade, Platform, TradeAccount
+from ..services.meta_trader_service import MetaTraderService
+from ..services.trade_upsert import TradeUpsertService, fold_trade_rows
+from .test_snapshot_service import deal
+
+User = get_user_model()
+
+START = datetime(2024, 3, 4, 10, tzinfo=timezone.utc)
+
+COMPARED_FIELDS = (
+    "exchange_id",
+    "trade_type",
+    "symbol",
+    "quantity",
+    "volume",
+    "open_price",
+    "close_price",
+    "profit",
+    "gain",
+    "open_time",
+    "close_time",
+    "is_top_up",
+    "active",
+)
+
+
+class TradeUpsertTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@test.com", password="testpass123"
+        )
+        self.deals = [
+            deal(1, 0, START, 1.1),
+            deal(1, 1, START + timedelta(hours=1), 1.2, profit=50),
+            deal(2, 0, START + timedelta(hours=2), 1.3, symbol="GBPUSD"),
+            deal(3, 1, START + timedelta(hours=3), 1.4, profit=-20),
+        ]
+
+    def create_account(self, name):
+        return TradeAccount.objects.create(
+            user=self.user, account_name=name, platform=Platform.meta_trader_5
+        )
+
+    def get_trades(self, account):
+        return list(
+            ManualTrade.objects.filter(account=account)
+            .order_by("exchange_id")
+            .values(*COMPARED_FIELDS)
+        )
+
+    def test_fold_keeps_the_last_value(self):
+        folded = fold_trade_rows(
+            [("1", {"profit": 0, "symbol": "EURUSD"}), ("1", {"profit": 50}), (2, {})]
+        )
+
+        self.assertEqual(folded, {"1": {"profit": 50, "symbol": "EURUSD"}, "2": {}})
+
+    def test_bulk_path_matches_per_row_path(self):
+        per_row = self.create_account("per-row")
+        bulk = self.create_account("bulk")
+
+        MetaTraderService.update_trades(self.deals[:3], per_row, bulk=False)
+        MetaTraderService.update_trades(self.deals[:3], bulk, bulk=True)
+
+        # Updates only touch the fields of the new deals
+        MetaTraderService.update_trades(self.deals[2:], per_row, bulk=False)
+        rows = MetaTraderService.get_trade_rows(self.deals[2:])
+
+        # One statement per field set, inside a savepoint
+        with self.assertNumQueries(4):
+            TradeUpsertService.write(bulk, rows, bulk=True)
+
+        self.assertEqual(len(self.get_trades(bulk)), 3)
+        self.assertEqual(self.get_trades(per_row), self.get_trades(bulk))
+
+    def test_unchanged_trades_are_not_written_again(self):
+        account = self.create_account("account")
+        MetaTraderService.update_trades(self.deals, account)
+        updated_at = dict(
+            ManualTrade.objects.filter(account=account).values_list(
+                "exchange_id", "updated_at"
+            )
+        )
+
+        # Only the stored hashes are read
+        with self.assertNumQueries(1):
+            MetaTraderService.update_trades(self.deals, account)
+
+        changed = [dict(self.deals[3], profit=-25)]
+        rows = TradeUpsertService.get_changed_rows(
+            account, MetaTraderService.get_trade_rows(self.deals[:3] + changed)
+        )
+        self.assertEqual([exchange_id for exchange_id, _ in rows], ["3"])
+
+        MetaTraderService.update_trades(self.deals[:3] + changed, account)
+        trades = ManualTrade.objects.filter(account=account)
+        self.assertEqual(trades.get(exchange_id="3").profit, -25)
+        self.assertEqual(
+            {
+                exchange_id: time
+                for exchange_id, time in trades.values_list("exchange_id", "updated_at")
+                if exchange_id != "3"
+            },
+            {key: value for key, value in updated_at.items() if key != "3"},
+        )
@@ -6,6 +6,7 @@ from rest_framework.permissions import AllowAny
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.tokens import AccessToken
 from .services import TradeService, AccountService
+from .services.sync_telemetry import SyncTelemetry
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from .email_service import brevo_email_service
@@ -25,6 +26,22 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+def fresh_response(user, data, in_body: bool = True, **kwargs) -> Response:
+    """
+    Response with when the account data it was computed from was last refreshed,
+    in the data_as_of field and the X-Data-As-Of header. Payloads keyed by date,
+    like the balance chart, pass in_body=False to only get the header.
+    """
+    data_as_of = AccountService.get_data_as_of(user)
+
+    if in_body:
+        data = {**data, "data_as_of": data_as_of}
+    response = Response(data, **kwargs)
+    if data_as_of:
+        response["X-Data-As-Of"] = data_as_of.isoformat()
+    return response
+
+
 class HelloThereView(generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -329,10 +346,13 @@ class AccountPerformanceView(APIView):
     def get(self, request):
         try:
             disabled = request.query_params.get("disabled", None)
+            backend = request.query_params.get("backend", None)
             performance = TradeService.get_account_performance(
-                request.user, disabled=disabled
+                request.user, disabled=disabled, backend=backend
             )
-            return Response(performance, status=status.HTTP_200_OK)
+            return fresh_response(request.user, performance, status=status.HTTP_200_OK)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response(
                 {"error": f"Error fetching account performance: {str(e)}"},
@@ -347,6 +367,14 @@ class ComprehensiveTradeStatisticsView(APIView):
         from_date = request.query_params.get("from")
         until_date = request.query_params.get("to")
         disabled = request.query_params.get("disabled", None)
+        backend = request.query_params.get("backend", None)
+
+        try:
+            backend = TradeService.get_statistics_backend(backend)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        compare = request.query_params.get("compare", "").lower() == "true"
 
         parsed_from_date = None
         parsed_until_date = None
@@ -355,16 +383,31 @@ class ComprehensiveTradeStatisticsView(APIView):
             parsed_from_date = timezone.datetime.strptime(from_date, "%Y-%m-%d")
             parsed_until_date = timezone.datetime.strptime(until_date, "%Y-%m-%d")
 
-        # Fetch trades using the service method with optional datetime filtering
-        trades = TradeService.get_all_trades(
-            request.user, from_date=parsed_from_date, to_date=parsed_until_date
-        )
-
-        accounts = TradeService.get_all_accounts(request.user, disabled=disabled)
+        if compare:
+            if not parsed_from_date:
+                return Response(
+                    {"error": "compare requires from and to"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
-        statistics = TradeService.calculate_statistics(trades, accounts)
+            comparison = TradeService.get_statistics_comparison(
+                request.user,
+                from_date=parsed_from_date,
+                to_date=parsed_until_date,
+                disabled=disabled,
+                backend=backend,
+            )
+            return fresh_response(request.user, comparison)
+
+        statistics = TradeService.get_statistics(
+            request.user,
+            from_date=parsed_from_date,
+            to_date=parsed_until_date,
+            disabled=disabled,
+            backend=backend,
+        )
 
-        return Response(statistics)
+        return fresh_response(request.user, statistics)
 
 
 class AccountBalanceView(APIView):
@@ -376,36 +419,62 @@ class AccountBalanceView(APIView):
             from_date = request.query_params.get("from")
             until_date = request.query_params.get("to")
 
+            compare = request.query_params.get("compare", "").lower() == "true"
+
             # Parse datetime parameters
             parsed_from_date = None
             parsed_until_date = None
-            previous_from_date = None
-            previous_until_date = None
 
             if from_date and until_date:
                 parsed_from_date = timezone.datetime.strptime(from_date, "%Y-%m-%d")
                 parsed_until_date = timezone.datetime.strptime(until_date, "%Y-%m-%d")
-                # Calculate the previous date range
-                delta = parsed_until_date - parsed_from_date
-                previous_from_date = parsed_from_date - delta
-                previous_until_date = parsed_from_date - timezone.timedelta(days=1)
 
-            # Fetch trades using the service method with optional datetime filtering
-            current_balance_chart = TradeService.get_account_balance_chart(
-                request.user, from_date=parsed_from_date, to_date=parsed_until_date
-            )
+            if compare and not parsed_from_date:
+                return Response(
+                    {"error": "compare requires from and to"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
-            previous_balance_chart = TradeService.get_account_balance_chart(
-                request.user, from_date=previous_from_date, to_date=previous_until_date
-            )
+            resolution = request.query_params.get("resolution", "raw")
+            max_points = request.query_params.get("max_points")
+            try:
+                max_points = int(max_points) if max_points else None
+            except ValueError:
+                return Response(
+                    {"error": "max_points must be a number"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if max_points is not None and max_points < 3:
+                return Response(
+                    {"error": "max_points must be at least 3"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
-            return Response(
-                current_balance_chart,
-                # {
-                #     "account_balance_chart": current_balance_chart,
-                #     "previous_account_balance_chart": previous_balance_chart,
-                # },
-                status=status.HTTP_200_OK,
+            # Fetch trades using the service method with optional datetime filtering
+            try:
+                if compare:
+                    # Current and previous period from a single load of the trades
+                    balance_chart = TradeService.get_account_balance_comparison(
+                        request.user,
+                        from_date=parsed_from_date,
+                        to_date=parsed_until_date,
+                        resolution=resolution,
+                        max_points=max_points,
+                    )
+                else:
+                    balance_chart = TradeService.get_account_balance_chart(
+                        request.user,
+                        from_date=parsed_from_date,
+                        to_date=parsed_until_date,
+                        resolution=resolution,
+                        max_points=max_points,
+                    )
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            # The chart is keyed by date, the refresh time only goes in the header
+            return fresh_response(
+                request.user, balance_chart, in_body=False, status=status.HTTP_200_OK
             )
         except Exception as e:
             return Response(
@@ -434,6 +503,29 @@ class RefreshAllAccountsView(APIView):
         return Response({"message": "Refresh complete"}, status=status.HTTP_200_OK)
 
 
+class SyncTelemetryView(APIView):
+    """
+    Sync timings per platform, the slowest and busiest accounts and the accounts
+    waiting longest for a refresh, for staff
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        try:
+            hours = float(request.query_params.get("hours", 24))
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            return Response(
+                {"error": "hours and limit must be numbers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            SyncTelemetry.get_report(hours=hours, limit=limit), status=status.HTTP_200_OK
+        )
+
+
 class UserGetAllTradesView(APIView):
     def get(self, request):
 
@@ -466,7 +558,9 @@ class UserGetAllTradesView(APIView):
                 "trades": [trade.to_dict() for trade in trades],
             }
 
-            return Response(response_data, status=status.HTTP_200_OK)
+            return fresh_response(
+                request.user, response_data, status=status.HTTP_200_OK
+            )
         except Exception as e:
             print(f"Error fetching global trades: {str(e)}")
             return Response(